@@ -1,53 +1,59 @@
 import os
+import time
 import tempfile
 import json
-from typing import TypedDict, List, Dict
-import PyPDF2
-from flask import Flask, request, jsonify
+from functools import lru_cache
+from typing import Any, TypedDict, List, Dict
+import numpy as np
+from flask import Blueprint, Flask, Response, g, request, jsonify, stream_with_context
 from flask_cors import CORS
-from pymongo import MongoClient
-from langchain_core.output_parsers import JsonOutputParser
-from langchain_core.prompts import ChatPromptTemplate
-from langchain_groq import ChatGroq
-from langchain_community.document_loaders import PyPDFLoader, TextLoader, Docx2txtLoader
-from langsmith import Client
-from langchain_core.tracers import LangChainTracer
-from langchain.text_splitter import RecursiveCharacterTextSplitter
-from langchain.vectorstores import FAISS
-from langchain_community.embeddings import HuggingFaceEmbeddings
-from langchain.retrievers import MultiQueryRetriever
-from langgraph.graph import END, StateGraph
+from pymongo import UpdateOne
 from bson.objectid import ObjectId
-from google.oauth2 import service_account
-from googleapiclient.discovery import build
 from dotenv import load_dotenv
+# .env has to be read before the configuration below and the local modules (applog) read the environment
+load_dotenv()
 import datetime
 import traceback
-from langchain_core.exceptions import LangChainException
-from extractorClass import ContextExtractor
+import io
+import shutil
+import hashlib
+from concurrent.futures import ThreadPoolExecutor
+from applog import get_logger
+from metrics import MetricsRegistry
+from components import ComponentRegistry
+from formsync import FormResponseSync
+from grading import (
+    index_form, score_response,
+    answer_row, key_row, grade_matrix, question_results_from_row
+)
+from jobqueue import JobQueue, MongoJobStore, QueueFullError
+from quizcache import QuizCache
+from sqlitestore import SQLiteResponseStore
+from jsonstream import JsonArrayStreamParser
+from formsgateway import FormsGateway, FormStructureStore
+from storage import create_mongo_client, ensure_indexes, utcnow, Collections, QUIZ_FIELDS, FORM_SCORING_FIELDS, RESPONSE_ANSWER_FIELDS, LATEST_FIRST
+
+# LangChain, LangGraph, FAISS, sentence-transformers/torch, googleapiclient, PyPDF2 and the Groq client are
+# imported inside the component loaders and pipeline functions that need them, and no model or connection is
+# opened at import time, so a new worker can answer /api/health straight away.
+
+api = Blueprint("api", __name__)
+log = get_logger("app")
 
-app = Flask(__name__)
 # Updated CORS configuration to include /create-google-form endpoint
-CORS(app, resources={
+CORS_RESOURCES = {
     r"/api/*": {"origins": "http://localhost:5173"},
     r"/create-google-form": {"origins": "http://localhost:5173"},
+    r"/create-google-forms": {"origins": "http://localhost:5173"},
     r"/latest-form-id": {"origins": "http://localhost:5173"},
     r"/fetch-responses/*": {"origins": "http://localhost:5173"},
     r"/evaluate-quiz": {"origins": "http://localhost:5173"},
+    r"/evaluate-quiz/*": {"origins": "http://localhost:5173"},
     r"/api/health": {"origins": "http://localhost:5173"}
-})
+}
 
 # MongoDB Configuration
 MONGO_URI = os.environ.get("MONGO_URI")
-try:
-    client = MongoClient(MONGO_URI)
-    db = client["Question"]
-    quiz_collection = db["listofquestion"]
-    form_responses_collection = db["form_responses"]
-    user_response_collection = db["user_response"]
-    print("MongoDB connection successful")
-except Exception as e:
-    print(f"MongoDB connection failed: {str(e)}")
 
 # Google Forms API Authentication
 SERVICE_ACCOUNT_FILE = os.getenv("SERVICE_ACCOUNT_FILE", "service-account.json")
@@ -55,122 +61,397 @@ SCOPES = [
     "https://www.googleapis.com/auth/forms.body",
     "https://www.googleapis.com/auth/forms.responses.readonly"
 ]
-try:
-    creds = service_account.Credentials.from_service_account_file(SERVICE_ACCOUNT_FILE, scopes=SCOPES)
-    service = build("forms", "v1", credentials=creds)
-    print("Google Forms API initialized successfully")
-except Exception as e:
-    print(f"Google Forms API initialization failed: {str(e)}")
+# Retry/backoff for Forms API quota and transient errors, and threads for batched form creation
+FORMS_NUM_RETRIES = int(os.environ.get("FORMS_NUM_RETRIES", 5))
+FORMS_BACKOFF_BASE = float(os.environ.get("FORMS_BACKOFF_BASE", 1.0))
+FORMS_MAX_BACKOFF = float(os.environ.get("FORMS_MAX_BACKOFF", 32.0))
+FORMS_BATCH_WORKERS = int(os.environ.get("FORMS_BATCH_WORKERS", 4))
+# Forms API clients shared by request threads and create_forms workers
+FORMS_CLIENT_POOL = int(os.environ.get("FORMS_CLIENT_POOL", FORMS_BATCH_WORKERS))
+FORM_TITLE = "Auto-Generated Quiz"
 
 # API Keys & Config
+LLM_MODEL_NAME = "llama-3.3-70b-versatile"
+LLM_TEMPERATURE = 0.2
 GROQ_API_KEY = os.environ.get("GROQ_API_KEY", "xxxx")
-LANGCHAIN_API_KEY = os.environ.get("LANGCHAIN_API_KEY", "xxxxx")
-LANGCHAIN_PROJECT = os.environ.get("LANGCHAIN_PROJECT", "xxxxx")
 UPLOAD_FOLDER = tempfile.mkdtemp()
-app.config['UPLOAD_FOLDER'] = UPLOAD_FOLDER
+# Uploads up to this size are extracted straight from memory; larger ones spill to a unique temp file
+UPLOAD_SPOOL_MAX_BYTES = int(os.environ.get("UPLOAD_SPOOL_MAX_MB", 16)) * 1024 * 1024
+
+# Document indexing settings (also part of the index cache key)
+EMBEDDING_MODEL_NAME = os.environ.get("EMBEDDING_MODEL_NAME", "sentence-transformers/all-MiniLM-L6-v2")
+# "torch" (default) or "onnx"; EMBEDDING_ONNX_FILE selects e.g. a quantized export such as onnx/model_qint8_avx2.onnx
+EMBEDDING_BACKEND = os.environ.get("EMBEDDING_BACKEND", "torch")
+EMBEDDING_ONNX_FILE = os.environ.get("EMBEDDING_ONNX_FILE", "")
+EMBED_BATCH_SIZE = int(os.environ.get("EMBED_BATCH_SIZE", 64))
+EMBED_MAX_BATCH = int(os.environ.get("EMBED_MAX_BATCH", 256))
+EMBED_MAX_WAIT_MS = int(os.environ.get("EMBED_MAX_WAIT_MS", 10))
+EMBED_TORCH_THREADS = int(os.environ.get("EMBED_TORCH_THREADS", 0))
+CHUNK_SIZE = int(os.environ.get("CHUNK_SIZE", 2000))
+CHUNK_OVERLAP = int(os.environ.get("CHUNK_OVERLAP", 200))
+# Persistent caches live in a directory owned by the server's user, never in shared /tmp: the FAISS index
+# cache unpickles what it finds there
+CACHE_ROOT = os.environ.get("CACHE_ROOT", os.path.join(
+    os.environ.get("XDG_CACHE_HOME") or os.path.join(os.path.expanduser("~"), ".cache"), "quiz-generator"
+))
+INDEX_CACHE_DIR = os.environ.get("INDEX_CACHE_DIR", os.path.join(CACHE_ROOT, "index"))
+INDEX_CACHE_MAX_MB = int(os.environ.get("INDEX_CACHE_MAX_MB", 1024))
+CHUNK_CACHE_DIR = os.environ.get("CHUNK_CACHE_DIR", os.path.join(CACHE_ROOT, "chunks"))
+
+# How retrieval diversifies the fixed per-difficulty query:
+#   "precomputed" - LLM query expansion computed once per difficulty and reused across documents
+#   "mmr"         - max marginal relevance over the FAISS store, no LLM call
+#   "multi_query" - MultiQueryRetriever, one LLM expansion call per request
+RETRIEVAL_MODE = os.environ.get("RETRIEVAL_MODE", "precomputed")
+PRECOMPUTE_QUERY_EXPANSIONS = os.environ.get("PRECOMPUTE_QUERY_EXPANSIONS", "false").lower() == "true"
+QUIZ_DIFFICULTIES = ["easy", "medium", "hard"]
+
+# Large quizzes are generated in concurrent sub-batches of this many questions
+QUESTION_BATCH_SIZE = int(os.environ.get("QUESTION_BATCH_SIZE", 10))
+GENERATION_CONCURRENCY = int(os.environ.get("GENERATION_CONCURRENCY", 4))
+GENERATION_MAX_RETRIES = int(os.environ.get("GENERATION_MAX_RETRIES", 2))
+
+# Bulk grading reads and writes responses in batches of this size
+BULK_GRADE_BATCH_SIZE = int(os.environ.get("BULK_GRADE_BATCH_SIZE", 500))
+
+# Background quiz-generation jobs
+JOB_WORKERS = int(os.environ.get("JOB_WORKERS", 2))
+JOB_MAX_PENDING = int(os.environ.get("JOB_MAX_PENDING", 16))
+JOB_RESULT_TTL = int(os.environ.get("JOB_RESULT_TTL", 3600))
+JOB_RETRY_AFTER_SECONDS = int(os.environ.get("JOB_RETRY_AFTER_SECONDS", 30))
+# "mongo" keeps job state in MongoDB so any worker process can answer a status poll; "memory" is only
+# correct when the app runs as a single process (e.g. `python app.py` or gunicorn with one worker)
+JOB_STORE = os.environ.get("JOB_STORE", "mongo")
+
+# LLM response cache
+LLM_CACHE_ENABLED = os.environ.get("LLM_CACHE_ENABLED", "true").lower() == "true"
+LLM_CACHE_PATH = os.environ.get("LLM_CACHE_PATH", os.path.join(CACHE_ROOT, "llm-cache.sqlite"))
+LLM_CACHE_MAX_ENTRIES = int(os.environ.get("LLM_CACHE_MAX_ENTRIES", 512))
+LLM_CACHE_TTL = int(os.environ.get("LLM_CACHE_TTL", 7 * 24 * 3600))
+
+# Read-through cache for /api/get-quiz; QUIZ_CACHE_SHARED_PATH adds a SQLite tier shared by workers on a host
+QUIZ_CACHE_MAX_ENTRIES = int(os.environ.get("QUIZ_CACHE_MAX_ENTRIES", 256))
+QUIZ_CACHE_TTL = int(os.environ.get("QUIZ_CACHE_TTL", 60))
+QUIZ_CACHE_SHARED_PATH = os.environ.get("QUIZ_CACHE_SHARED_PATH", "")
+
+# Components loaded in the background when the app is created, in order ("all" or a comma-separated list;
+# empty to load every component lazily on first use)
+WARM_UP_COMPONENTS = os.environ.get("WARM_UP_COMPONENTS", "all")
+
+# Prometheus metrics served on /metrics; cache, queue and component values are read at scrape time
+metrics = MetricsRegistry()
+PIPELINE_STAGE_SECONDS = metrics.histogram("quiz_pipeline_stage_seconds", "Time spent in each quiz pipeline stage.", ["stage"])
+GRAPH_NODE_SECONDS = metrics.histogram("quiz_graph_node_seconds", "Time spent in each node of the quiz graph.", ["node"])
+PIPELINE_RUNS = metrics.counter("quiz_pipeline_runs_total", "Quiz pipeline runs by outcome.", ["outcome"])
+INDEX_CACHE_LOOKUPS = metrics.counter("quiz_index_cache_lookups_total", "FAISS index cache lookups by result.", ["result"])
+LLM_TOKENS = metrics.counter("llm_tokens_total", "LLM tokens reported by the provider.", ["model", "kind"])
+LLM_CALL_SECONDS = metrics.histogram("llm_call_seconds", "Latency of individual LLM calls.", ["model"])
+LLM_CALL_ERRORS = metrics.counter("llm_call_errors_total", "LLM calls that raised.", ["model"])
+HTTP_REQUEST_SECONDS = metrics.histogram("http_request_duration_seconds", "HTTP request latency by route.", ["method", "route", "status"])
+
+components = ComponentRegistry()
+
+def load_mongo():
+    collections = Collections(create_mongo_client(MONGO_URI))
+    # Fail (and be retried on next use) rather than report ready when the server is unreachable
+    collections.client.admin.command("ping")
+    ensure_indexes(collections.db)
+    log.info("mongo_connected")
+    return collections
+
+def load_forms_gateway():
+    from google.oauth2 import service_account
+    from googleapiclient.discovery import build
 
-client = Client(api_key=LANGCHAIN_API_KEY)
-tracer = LangChainTracer(project_name=LANGCHAIN_PROJECT)
-load_dotenv()
-
-try:
-    llm = ChatGroq(
-        temperature=0.2,
-        model_name="llama-3.3-70b-versatile",
-        groq_api_key="xxxxxx"
+    creds = service_account.Credentials.from_service_account_file(SERVICE_ACCOUNT_FILE, scopes=SCOPES)
+    # Pooled clients: discovery clients and their HTTP connections are not thread-safe, so each is used by one thread at a time
+    gateway = FormsGateway(
+        lambda: build("forms", "v1", credentials=creds, cache_discovery=False),
+        num_retries=FORMS_NUM_RETRIES,
+        backoff_base=FORMS_BACKOFF_BASE,
+        max_backoff=FORMS_MAX_BACKOFF,
+        max_workers=FORMS_BATCH_WORKERS,
+        pool_size=FORMS_CLIENT_POOL
+    )
+    # Build the first client now so credential errors surface at load time
+    with gateway.client():
+        pass
+    log.info("forms_api_initialized")
+    return gateway
+
+def load_form_structure_store():
+    # The gateway is only needed for forms stored without questionId tables
+    return FormStructureStore(get_mongo().form_responses, get_forms_gateway)
+
+def load_llm_cache():
+    if not LLM_CACHE_ENABLED:
+        return None
+    from llmcache import TieredLLMCache
+
+    llm_cache = TieredLLMCache(
+        persistent=SQLiteResponseStore(LLM_CACHE_PATH) if LLM_CACHE_PATH else None,
+        max_entries=LLM_CACHE_MAX_ENTRIES,
+        ttl=LLM_CACHE_TTL or None
+    )
+    log.info("llm_cache_initialized", path=LLM_CACHE_PATH or "memory")
+    return llm_cache
+
+def load_question_cache():
+    if not LLM_CACHE_ENABLED:
+        return None
+    from questioncache import QuestionCache
+
+    # A new model, temperature or prompt starts from an empty cache
+    namespace = hashlib.sha1(f"{LLM_MODEL_NAME}|{LLM_TEMPERATURE}|{QUIZ_PROMPT_TEMPLATE}".encode("utf-8")).hexdigest()
+    question_cache = QuestionCache(
+        persistent=SQLiteResponseStore(LLM_CACHE_PATH, table="question_cache") if LLM_CACHE_PATH else None,
+        max_entries=LLM_CACHE_MAX_ENTRIES,
+        ttl=LLM_CACHE_TTL or None,
+        namespace=namespace
+    )
+    log.info("question_cache_initialized", path=LLM_CACHE_PATH or "memory")
+    return question_cache
+
+def build_chat_model(cache):
+    from langchain_groq import ChatGroq
+    from llmmetrics import LLMMetricsCallbackHandler
+
+    return ChatGroq(
+        temperature=LLM_TEMPERATURE,
+        model_name=LLM_MODEL_NAME,
+        groq_api_key="xxxxxx",
+        cache=cache,
+        callbacks=[LLMMetricsCallbackHandler(LLM_MODEL_NAME, LLM_TOKENS, LLM_CALL_SECONDS, LLM_CALL_ERRORS)]
     )
-    print("ChatGroq initialized successfully")
-except Exception as e:
-    print(f"ChatGroq initialization failed: {str(e)}")
 
-try:
-    embeddings = HuggingFaceEmbeddings(
-        model_name="sentence-transformers/all-MiniLM-L6-v2"
+def load_llm():
+    # Query expansion still works uncached if the response cache cannot be opened
+    llm_cache = components["llm_cache"].get() if components["llm_cache"].warm() else None
+    return build_chat_model(llm_cache)
+
+def load_generation_llm():
+    # Quiz generation is cached after parsing (question_cache), never as raw model output, so a malformed
+    # answer cannot be replayed to every identical request
+    return build_chat_model(False)
+
+def embedding_model_kwargs():
+    if EMBEDDING_BACKEND != "onnx":
+        return {}
+    model_kwargs = {"backend": "onnx"}
+    if EMBEDDING_ONNX_FILE:
+        model_kwargs["model_kwargs"] = {"file_name": EMBEDDING_ONNX_FILE}
+    return model_kwargs
+
+def load_embeddings():
+    from langchain_community.embeddings import HuggingFaceEmbeddings
+    from embedservice import BatchingEmbeddings, configure_torch_threads
+
+    configure_torch_threads(EMBED_TORCH_THREADS)
+    embedding_service = BatchingEmbeddings(
+        HuggingFaceEmbeddings(
+            model_name=EMBEDDING_MODEL_NAME,
+            model_kwargs=embedding_model_kwargs(),
+            encode_kwargs={"batch_size": EMBED_BATCH_SIZE}
+        ),
+        max_batch_size=EMBED_MAX_BATCH,
+        max_wait_ms=EMBED_MAX_WAIT_MS
+    )
+    if not CHUNK_CACHE_DIR:
+        return embedding_service
+    from chunkcache import ChunkVectorStore, CachedChunkEmbeddings
+
+    # One vector store per model/backend so every stored vector has the same dimension
+    fingerprint = hashlib.sha1(f"{EMBEDDING_MODEL_NAME}|{EMBEDDING_BACKEND}|{EMBEDDING_ONNX_FILE}".encode("utf-8")).hexdigest()[:16]
+    return CachedChunkEmbeddings(
+        embedding_service,
+        ChunkVectorStore(os.path.join(CHUNK_CACHE_DIR, fingerprint))
     )
-    print("HuggingFaceEmbeddings initialized successfully")
-except Exception as e:
-    print(f"HuggingFaceEmbeddings initialization failed: {str(e)}")
 
-try:
-    context_extractor = ContextExtractor()
-    print("ContextExtractor initialized successfully")
-except Exception as e:
-    print(f"ContextExtractor initialization failed: {str(e)}")
+def load_context_extractor():
+    from extractorClass import ContextExtractor
+    return ContextExtractor()
+
+def load_index_cache():
+    from indexcache import IndexCache
+    index_cache = IndexCache(INDEX_CACHE_DIR, max_bytes=INDEX_CACHE_MAX_MB * 1024 * 1024)
+    log.info("index_cache_initialized", path=INDEX_CACHE_DIR)
+    return index_cache
+
+components.register("mongo", load_mongo)
+components.register("forms", load_forms_gateway, required=False)
+components.register("form_structure", load_form_structure_store, required=False)
+components.register("llm_cache", load_llm_cache, required=False)
+components.register("llm", load_llm)
+components.register("question_cache", load_question_cache, required=False)
+components.register("generation_llm", load_generation_llm)
+components.register("embeddings", load_embeddings)
+components.register("extractor", load_context_extractor)
+components.register("index_cache", load_index_cache, required=False)
+
+def get_mongo():
+    return components.get("mongo")
+
+def get_forms_gateway():
+    return components.get("forms")
+
+def get_form_structure_store():
+    return components.get("form_structure")
+
+def get_llm():
+    return components.get("llm")
+
+def get_generation_llm():
+    return components.get("generation_llm")
+
+def get_question_cache():
+    """The parsed question cache, or None if it is disabled or could not be opened (generation then runs uncached)."""
+    component = components["question_cache"]
+    return component.get() if component.warm() else None
+
+def get_embeddings():
+    return components.get("embeddings")
+
+def get_context_extractor():
+    return components.get("extractor")
+
+def get_index_cache():
+    """The FAISS index cache, or None if it could not be initialized (indexing then runs uncached)."""
+    component = components["index_cache"]
+    return component.get() if component.warm() else None
+
+job_queue = JobQueue(
+    max_workers=JOB_WORKERS,
+    max_pending=JOB_MAX_PENDING,
+    result_ttl=JOB_RESULT_TTL,
+    store=MongoJobStore(lambda: get_mongo().jobs, result_ttl=JOB_RESULT_TTL) if JOB_STORE == "mongo" else None
+)
+
+def retrieval_query(difficulty):
+    return f"Information for {difficulty} difficulty quiz"
+
+def precompute_query_expansions():
+    if RETRIEVAL_MODE == "precomputed" and PRECOMPUTE_QUERY_EXPANSIONS:
+        from retrieval import precompute_expansions
+        precompute_expansions(get_llm(), [retrieval_query(d) for d in QUIZ_DIFFICULTIES])
 
 class GraphState(TypedDict):
-    retriever: MultiQueryRetriever
+    retriever: Any  # a LangChain BaseRetriever
     content: str
+    chunks: List[str]
     difficulty: str
     num_questions: int
     questions: List[Dict]
 
-def process_document(file_path, file_type=None):
-    try:
-        print(f"Processing document: {file_path} (type: {file_type})")
-        content = context_extractor.extract(file_path)
-        print(f"Extracted content length: {len(content) if content else 0}")
-        if not content:
-            raise ValueError("Failed to extract content from the document")
-
-        text_splitter = RecursiveCharacterTextSplitter(
-            chunk_size=2000,
-            chunk_overlap=200
+def build_vectorstore(source, file_type):
+    from langchain.text_splitter import RecursiveCharacterTextSplitter
+    from langchain.vectorstores import FAISS
+    from indexcache import IndexCache
+
+    embeddings = get_embeddings()
+    index_cache = get_index_cache()
+    cache_key = None
+    if index_cache is not None:
+        cache_key = IndexCache.make_key(
+            source,
+            file_type=file_type,
+            chunk_size=CHUNK_SIZE,
+            chunk_overlap=CHUNK_OVERLAP,
+            embedding_model=EMBEDDING_MODEL_NAME,
+            embedding_backend=EMBEDDING_BACKEND,
+            embedding_onnx_file=EMBEDDING_ONNX_FILE
         )
+        with PIPELINE_STAGE_SECONDS.timer(stage="index_cache_load"):
+            cached = index_cache.load(cache_key, embeddings)
+        if cached is not None:
+            vectorstore, chunks = cached
+            INDEX_CACHE_LOOKUPS.inc(result="hit")
+            log.info("index_cache_hit", key=cache_key, chunks=len(chunks))
+            return vectorstore
+        INDEX_CACHE_LOOKUPS.inc(result="miss")
+        log.info("index_cache_miss", key=cache_key)
+
+    with PIPELINE_STAGE_SECONDS.timer(stage="extract"):
+        content = get_context_extractor().extract(source, file_type)
+    log.info("content_extracted", length=len(content) if content else 0)
+    if not content:
+        raise ValueError("Failed to extract content from the document")
+
+    text_splitter = RecursiveCharacterTextSplitter(
+        chunk_size=CHUNK_SIZE,
+        chunk_overlap=CHUNK_OVERLAP
+    )
+    with PIPELINE_STAGE_SECONDS.timer(stage="split"):
         chunks = text_splitter.split_text(content)
-        print(f"Number of chunks: {len(chunks)}")
-        if not chunks:
-            raise ValueError("No text chunks created from document")
+    log.info("text_split", chunks=len(chunks))
+    if not chunks:
+        raise ValueError("No text chunks created from document")
 
-        print("Creating FAISS vector store...")
+    with PIPELINE_STAGE_SECONDS.timer(stage="embed_index"):
         vectorstore = FAISS.from_texts(chunks, embeddings)
-        base_retriever = vectorstore.as_retriever(search_kwargs={"k": 4})
+    if cache_key is not None:
+        with PIPELINE_STAGE_SECONDS.timer(stage="index_cache_store"):
+            index_cache.store(cache_key, vectorstore, chunks)
+    return vectorstore
+
+def process_document(source, file_type=None, k=4):
+    from langchain.retrievers import MultiQueryRetriever
+    from retrieval import PrecomputedMultiQueryRetriever
 
-        print("Creating MultiQueryRetriever...")
+    try:
+        log.info("processing_document", source=source if isinstance(source, str) else "in-memory upload", file_type=file_type)
+        vectorstore = build_vectorstore(source, file_type)
+        if RETRIEVAL_MODE == "mmr":
+            log.debug("retriever_created", mode="mmr")
+            return vectorstore.as_retriever(
+                search_type="mmr",
+                search_kwargs={"k": k, "fetch_k": max(20, k * 5)}
+            )
+
+        base_retriever = vectorstore.as_retriever(search_kwargs={"k": k})
+        if RETRIEVAL_MODE == "precomputed":
+            log.debug("retriever_created", mode="precomputed")
+            return PrecomputedMultiQueryRetriever(retriever=base_retriever, llm=get_llm())
+
+        log.debug("retriever_created", mode="multi_query")
         retriever = MultiQueryRetriever.from_llm(
             retriever=base_retriever,
-            llm=llm,
+            llm=get_llm(),
         )
         return retriever
     except Exception as e:
-        error_details = traceback.format_exc()
-        print(f"Error in process_document: {error_details}")
+        log.exception("process_document_failed")
         raise ValueError(f"Failed to process document: {str(e)}")
 
 def retrieve_content(state: GraphState) -> GraphState:
     try:
         retriever = state.get("retriever")
         difficulty = state.get("difficulty", "medium")
-        print(f"Retrieving content for difficulty: {difficulty}")
+        log.debug("retrieving_content", difficulty=difficulty)
 
         if retriever is None:
             raise ValueError("Retriever object is missing")
 
-        query = f"Information for {difficulty} difficulty quiz"
-        docs = retriever.invoke(query)
-        content = "\n\n".join([doc.page_content for doc in docs]) if docs else ""
-        print(f"Retrieved content length: {len(content)}")
+        query = retrieval_query(difficulty)
+        with PIPELINE_STAGE_SECONDS.timer(stage="retrieve"):
+            docs = retriever.invoke(query)
+        chunks = [doc.page_content for doc in docs] if docs else []
+        content = "\n\n".join(chunks)
+        log.info("content_retrieved", length=len(content), chunks=len(chunks))
         if not content:
             raise ValueError("No relevant content retrieved")
 
         return {
             "retriever": retriever,
             "content": content,
+            "chunks": chunks,
             "difficulty": difficulty,
             "num_questions": state["num_questions"]
         }
     except Exception as e:
-        error_details = traceback.format_exc()
-        print(f"Error in retrieve_content: {error_details}")
+        log.exception("retrieve_content_failed")
         raise ValueError(f"Failed to retrieve content: {str(e)}")
 
-def generate_questions(state: GraphState) -> GraphState:
-    try:
-        content = state["content"]
-        difficulty = state["difficulty"]
-        num_questions = state["num_questions"]
-        print(f"Generating {num_questions} questions (difficulty: {difficulty}, content length: {len(content)})")
-
-        prompt = ChatPromptTemplate.from_template(""" 
+QUIZ_PROMPT_TEMPLATE = """ 
         You are an expert quiz creator. Create {num_questions} quiz questions with the following parameters:
         
         1. Difficulty level: {difficulty}
@@ -197,26 +478,154 @@ def generate_questions(state: GraphState) -> GraphState:
         ]
         
         Only return the JSON without any additional explanation or text.
-        """)
+        """
+
+@lru_cache(maxsize=None)
+def get_quiz_prompt():
+    from langchain_core.prompts import ChatPromptTemplate
+    return ChatPromptTemplate.from_template(QUIZ_PROMPT_TEMPLATE)
+
+def split_question_batches(chunks, content, num_questions):
+    """Split a large request into sub-batches, each tied to a different slice of the retrieved chunks."""
+    num_batches = -(-num_questions // QUESTION_BATCH_SIZE)
+    chunks = chunks or [content]
+    batches = []
+    for i in range(num_batches):
+        batch_size = min(QUESTION_BATCH_SIZE, num_questions - i * QUESTION_BATCH_SIZE)
+        if len(chunks) >= num_batches:
+            batch_chunks = chunks[i::num_batches]
+        else:
+            batch_chunks = [chunks[i % len(chunks)]]
+        batches.append({"content": "\n\n".join(batch_chunks), "num_questions": batch_size})
+    return batches
+
+def retrieval_k(num_questions):
+    """Chunks to retrieve for a quiz: at least one per generation sub-batch."""
+    return max(4, -(-num_questions // QUESTION_BATCH_SIZE))
+
+def question_key(question):
+    """Duplicate-detection key of a generated question (case/whitespace-insensitive), or None if it is malformed."""
+    if not isinstance(question, dict) or not question.get("question") or not question.get("options"):
+        return None
+    return " ".join(question["question"].lower().split())
+
+def merge_questions(batches_of_questions, limit):
+    """Merge generated batches, dropping malformed entries and questions that repeat."""
+    merged = []
+    seen = set()
+    for questions in batches_of_questions:
+        for question in questions:
+            key = question_key(question)
+            if key is None or key in seen:
+                continue
+            seen.add(key)
+            merged.append(question)
+    return merged[:limit]
+
+def run_generation(chain, inputs, refresh=False):
+    """
+    Run the quiz chain over a list of inputs, answering from the question cache where possible.
+
+    :param chain: prompt | generation model | JSON parser.
+    :param inputs: List of dicts with content, difficulty and num_questions.
+    :param refresh: Skip the cache lookup (retries of failed generations); a valid new answer is still stored.
+    :return: Outputs aligned with inputs; an item is the parsed output or the exception it raised.
+    """
+    question_cache = get_question_cache()
+    keys = [
+        question_cache.make_key(item["content"], item["difficulty"], item["num_questions"]) if question_cache else None
+        for item in inputs
+    ]
+    outputs = [None] * len(inputs)
+    misses = []
+    for i, key in enumerate(keys):
+        cached = question_cache.get(key) if question_cache is not None and not refresh else None
+        if cached is not None:
+            outputs[i] = cached
+        else:
+            misses.append(i)
+
+    if misses:
+        results = chain.batch(
+            [inputs[i] for i in misses],
+            config={"max_concurrency": GENERATION_CONCURRENCY},
+            return_exceptions=True
+        )
+        for i, result in zip(misses, results):
+            outputs[i] = result
+            if question_cache is not None and not isinstance(result, Exception):
+                question_cache.set(keys[i], result)
+    return outputs
+
+def generate_batches(chain, batches, difficulty):
+    """
+    Generate sub-batches concurrently, retrying failed ones up to GENERATION_MAX_RETRIES times.
+
+    :return: Question lists aligned with batches; None for a sub-batch that was abandoned.
+    """
+    results = [None] * len(batches)
+    pending = list(range(len(batches)))
+
+    for attempt in range(GENERATION_MAX_RETRIES + 1):
+        inputs = [dict(batches[i], difficulty=difficulty) for i in pending]
+        # Retries bypass the cache so they really ask the model again
+        outputs = run_generation(chain, inputs, refresh=attempt > 0)
+        failed = []
+        for i, output in zip(pending, outputs):
+            if isinstance(output, Exception) or not isinstance(output, list):
+                log.warning("sub_batch_failed", batch=i, attempt=attempt + 1, error=str(output) if isinstance(output, Exception) else "not a JSON list")
+                failed.append(i)
+            else:
+                results[i] = output
+        pending = failed
+        if not pending:
+            break
+        log.info("sub_batches_retrying", count=len(pending))
+
+    if pending:
+        log.warning("sub_batches_abandoned", count=len(pending), retries=GENERATION_MAX_RETRIES)
+    return results
+
+def generate_questions_batched(chain, chunks, content, difficulty, num_questions):
+    batches = split_question_batches(chunks, content, num_questions)
+    log.info("generation_fan_out", num_questions=num_questions, sub_batches=len(batches), concurrency=GENERATION_CONCURRENCY)
+    return merge_questions([r for r in generate_batches(chain, batches, difficulty) if r], num_questions)
+
+def generate_questions(state: GraphState) -> GraphState:
+    from langchain_core.exceptions import LangChainException
+    from langchain_core.output_parsers import JsonOutputParser
+
+    try:
+        content = state["content"]
+        difficulty = state["difficulty"]
+        num_questions = state["num_questions"]
+        log.info("generating_questions", num_questions=num_questions, difficulty=difficulty, content_length=len(content))
 
         parser = JsonOutputParser()
-        chain = prompt | llm | parser
-        questions = chain.invoke({
-            "content": content,
-            "difficulty": difficulty,
-            "num_questions": num_questions
-        })
-        print(f"Generated {len(questions) if questions else 0} questions")
+        chain = get_quiz_prompt() | get_generation_llm() | parser
+        with PIPELINE_STAGE_SECONDS.timer(stage="generate"):
+            if num_questions > QUESTION_BATCH_SIZE:
+                questions = generate_questions_batched(chain, state.get("chunks"), content, difficulty, num_questions)
+            else:
+                questions = run_generation(chain, [{
+                    "content": content,
+                    "difficulty": difficulty,
+                    "num_questions": num_questions
+                }])[0]
+                if isinstance(questions, Exception):
+                    raise questions
+        log.info("questions_generated", count=len(questions) if questions else 0)
         if not questions or not isinstance(questions, list):
             raise ValueError("No valid questions generated")
         
         return {"questions": questions}
     except Exception as e:
-        error_details = traceback.format_exc()
-        print(f"Error in generate_questions: {error_details}")
+        log.exception("generate_questions_failed")
         raise LangChainException(f"Failed to generate questions: {str(e)}")
 
 def create_quiz_graph():
+    from langgraph.graph import END, StateGraph
+
     workflow = StateGraph(GraphState)
     workflow.add_node("retrieve_content", retrieve_content)
     workflow.add_node("generate_questions", generate_questions)
@@ -225,356 +634,611 @@ def create_quiz_graph():
     workflow.set_entry_point("retrieve_content")
     return workflow.compile()
 
-@app.route('/api/generate-quiz', methods=['POST'])
-def generate_quiz():
-    print("Received request to /api/generate-quiz")
+def parse_quiz_request():
+    """Validate a quiz-generation form post. Returns (params, None) or (None, error response)."""
     if 'file' not in request.files and request.form.get('content_type') != 'youtube':
-        print("Validation failed: No file part or invalid content type")
-        return jsonify({"error": "No file part or invalid content type"}), 400
+        log.info("quiz_request_rejected", reason="no file part or invalid content type")
+        return None, (jsonify({"error": "No file part or invalid content type"}), 400)
     
     content_type = request.form.get('content_type', 'pdf')
-    print(f"Content type: {content_type}")
     if content_type not in ['pdf', 'docx', 'text', 'youtube', 'audio']:
-        print(f"Validation failed: Unsupported content type: {content_type}")
-        return jsonify({"error": f"Unsupported content type: {content_type}"}), 400
+        log.info("quiz_request_rejected", reason="unsupported content type", content_type=content_type)
+        return None, (jsonify({"error": f"Unsupported content type: {content_type}"}), 400)
 
     if content_type == 'youtube':
         youtube_url = request.form.get('youtube_url')
-        print(f"YouTube URL: {youtube_url}")
         if not youtube_url or not youtube_url.strip():
-            print("Validation failed: YouTube URL is required")
-            return jsonify({"error": "YouTube URL is required for content_type 'youtube'"}), 400
-        print("YouTube processing not implemented")
-        return jsonify({"error": "YouTube URL processing is not implemented"}), 501
+            log.info("quiz_request_rejected", reason="youtube url missing")
+            return None, (jsonify({"error": "YouTube URL is required for content_type 'youtube'"}), 400)
+        log.info("quiz_request_rejected", reason="youtube not implemented")
+        return None, (jsonify({"error": "YouTube URL processing is not implemented"}), 501)
 
     file = request.files['file']
     if file.filename == '':
-        print("Validation failed: No selected file")
-        return jsonify({"error": "No selected file"}), 400
+        log.info("quiz_request_rejected", reason="no selected file")
+        return None, (jsonify({"error": "No selected file"}), 400)
 
     difficulty = request.form.get('difficulty', 'medium')
-    print(f"Difficulty: {difficulty}")
+    # Each difficulty has its own retrieval query and cached query expansion, so only known values are accepted
+    if difficulty not in QUIZ_DIFFICULTIES:
+        log.info("quiz_request_rejected", reason="unsupported difficulty", difficulty=difficulty)
+        return None, (jsonify({"error": f"Unsupported difficulty: {difficulty}. Use one of: {', '.join(QUIZ_DIFFICULTIES)}"}), 400)
     try:
         num_questions = int(request.form.get('num_questions', 5))
-        print(f"Number of questions: {num_questions}")
         if num_questions < 1:
             raise ValueError("Number of questions must be at least 1")
     except ValueError as e:
-        print(f"Validation failed: Invalid num_questions: {str(e)}")
-        return jsonify({"error": f"Invalid num_questions: {str(e)}"}), 400
+        log.info("quiz_request_rejected", reason="invalid num_questions", error=str(e))
+        return None, (jsonify({"error": f"Invalid num_questions: {str(e)}"}), 400)
 
     file_extension = file.filename.rsplit('.', 1)[1].lower() if '.' in file.filename else 'txt'
     file_type = 'pdf' if file_extension == 'pdf' else 'docx' if file_extension in ['doc', 'docx'] else 'audio' if file_extension in ['mp3', 'wav', 'ogg', 'm4a'] else 'text'
-    print(f"File: {file.filename}, Extension: {file_extension}, File type: {file_type}")
     if file_type != content_type:
-        print(f"Validation failed: File extension ({file_extension}) does not match content type ({content_type})")
-        return jsonify({"error": f"File extension ({file_extension}) does not match content type ({content_type})"}), 400
+        log.info("quiz_request_rejected", reason="extension does not match content type", extension=file_extension, content_type=content_type)
+        return None, (jsonify({"error": f"File extension ({file_extension}) does not match content type ({content_type})"}), 400)
+
+    return {
+        "file": file,
+        "file_type": file_type,
+        "difficulty": difficulty,
+        "num_questions": num_questions,
+        "metadata": {
+            "difficulty": difficulty,
+            "source": file.filename,
+            "class_name": request.form.get('class_name', ''),
+            "year_level": request.form.get('year_level', '')
+        }
+    }, None
 
-    file_path = os.path.join(app.config['UPLOAD_FOLDER'], file.filename)
-    print(f"Saving file to: {file_path}")
-    try:
-        file.save(file_path)
-    except Exception as e:
-        error_details = traceback.format_exc()
-        print(f"Failed to save file: {error_details}")
-        return jsonify({"error": f"Failed to save file: {str(e)}", "details": error_details}), 500
+def run_quiz_pipeline(source, file_type, difficulty, num_questions, metadata, progress=None):
+    """Run extraction, retrieval, generation and storage. Returns (quiz_id, questions)."""
+    progress = progress or (lambda stage: None)
 
+    started = time.perf_counter()
     try:
-        print("Calling process_document...")
-        retriever = process_document(file_path, file_type)
+        progress("processing_document")
+        retriever = process_document(source, file_type, k=retrieval_k(num_questions))
         if not retriever:
             raise ValueError("Failed to create retriever from document")
 
-        print("Creating quiz graph...")
         quiz_graph = create_quiz_graph()
-        print("Invoking quiz graph...")
-        result = quiz_graph.invoke({
+        result = {}
+        node_started = time.perf_counter()
+        for update in quiz_graph.stream({
             "retriever": retriever,
             "difficulty": difficulty,
             "num_questions": num_questions
-        })
+        }, stream_mode="updates"):
+            # Each update arrives as its node finishes, so the gap since the previous one is the node's run time
+            for node, output in update.items():
+                GRAPH_NODE_SECONDS.observe(time.perf_counter() - node_started, node=node)
+                progress(node)
+                result.update(output or {})
+            node_started = time.perf_counter()
 
-        print("Validating quiz result...")
         if not result.get("questions") or not isinstance(result["questions"], list):
             raise ValueError("No valid questions generated")
 
-        quiz_data = {
-            "quiz": result["questions"],
-            "metadata": {
-                "difficulty": difficulty,
-                "num_questions": len(result["questions"]),
-                "source": file.filename,
-                "class_name": request.form.get('class_name', ''),
-                "year_level": request.form.get('year_level', '')
-            }
-        }
-        print(f"Quiz data prepared: {json.dumps(quiz_data, indent=2)}")
+        progress("storing")
+        quiz_id = store_quiz(result["questions"], metadata)
+    except Exception:
+        PIPELINE_RUNS.inc(outcome="error")
+        raise
+    elapsed = time.perf_counter() - started
+    PIPELINE_RUNS.inc(outcome="success")
+    PIPELINE_STAGE_SECONDS.observe(elapsed, stage="total")
+    log.info("quiz_pipeline_completed", quiz_id=quiz_id, num_questions=len(result["questions"]), seconds=round(elapsed, 3))
+    return quiz_id, result["questions"]
+
+def store_quiz(questions, metadata):
+    quiz_data = {
+        "quiz": questions,
+        "metadata": dict(metadata, num_questions=len(questions)),
+        "created_at": utcnow()
+    }
 
-        print("Inserting quiz data into MongoDB...")
-        try:
-            inserted_id = quiz_collection.insert_one(quiz_data).inserted_id
-            print(f"Quiz stored successfully with ID: {inserted_id}")
-        except Exception as e:
-            error_details = traceback.format_exc()
-            print(f"MongoDB insertion failed: {error_details}")
-            return jsonify({"error": f"MongoDB insertion failed: {str(e)}", "details": error_details}), 500
+    try:
+        with PIPELINE_STAGE_SECONDS.timer(stage="store"):
+            inserted_id = get_mongo().quizzes.insert_one(quiz_data).inserted_id
+    except Exception as e:
+        log.exception("quiz_insert_failed")
+        raise RuntimeError(f"MongoDB insertion failed: {str(e)}")
+    log.info("quiz_stored", quiz_id=str(inserted_id), num_questions=len(questions))
+    return str(inserted_id)
+
+UPLOAD_SUFFIXES = {"pdf": ".pdf", "docx": ".docx", "text": ".txt"}
+
+def buffer_upload(file, file_type):
+    """
+    Read an upload into memory, spilling to a uniquely named temp file only above UPLOAD_SPOOL_MAX_BYTES.
+    Returns a BytesIO or the temp file path; pass it to release_upload when done.
+    """
+    head = file.stream.read(UPLOAD_SPOOL_MAX_BYTES + 1)
+    if len(head) <= UPLOAD_SPOOL_MAX_BYTES:
+        log.debug("upload_buffered", bytes=len(head))
+        return io.BytesIO(head)
+
+    spill = tempfile.NamedTemporaryFile(
+        dir=UPLOAD_FOLDER,
+        suffix=UPLOAD_SUFFIXES.get(file_type, ""),
+        delete=False
+    )
+    try:
+        with spill:
+            spill.write(head)
+            shutil.copyfileobj(file.stream, spill, 1024 * 1024)
+    except Exception:
+        os.remove(spill.name)
+        raise
+    log.info("upload_spilled", path=spill.name)
+    return spill.name
+
+def release_upload(source):
+    if not isinstance(source, str):
+        return
+    try:
+        if os.path.exists(source):
+            os.remove(source)
+            log.debug("upload_removed", path=source)
+    except Exception as e:
+        log.warning("upload_remove_failed", path=source, error=str(e))
+
+@api.route('/api/generate-quiz', methods=['POST'])
+def generate_quiz():
+    from langchain_core.exceptions import LangChainException
+
+    params, error = parse_quiz_request()
+    if error:
+        return error
+
+    try:
+        source = buffer_upload(params["file"], params["file_type"])
+    except Exception as e:
+        error_details = traceback.format_exc()
+        log.exception("upload_buffer_failed")
+        return jsonify({"error": f"Failed to save file: {str(e)}", "details": error_details}), 500
+
+    try:
+        quiz_id, questions = run_quiz_pipeline(
+            source,
+            params["file_type"],
+            params["difficulty"],
+            params["num_questions"],
+            params["metadata"]
+        )
 
-        print("Returning successful response")
         return jsonify({
             "message": "Quiz successfully generated and stored in MongoDB",
-            "quiz_id": str(inserted_id),
-            "quiz": result["questions"],
+            "quiz_id": quiz_id,
+            "quiz": questions,
         })
 
     except ValueError as ve:
         error_details = traceback.format_exc()
-        print(f"ValueError in generate_quiz: {error_details}")
+        log.exception("generate_quiz_failed", error_type="ValueError")
         return jsonify({"error": str(ve), "details": error_details}), 400
     except LangChainException as le:
         error_details = traceback.format_exc()
-        print(f"LangChainException in generate_quiz: {error_details}")
+        log.exception("generate_quiz_failed", error_type="LangChainException")
         return jsonify({"error": f"Language model error: {str(le)}", "details": error_details}), 500
     except Exception as e:
         error_details = traceback.format_exc()
-        print(f"Unexpected error in generate_quiz: {error_details}")
+        log.exception("generate_quiz_failed", error_type=type(e).__name__)
         return jsonify({"error": f"Internal server error: {str(e)}", "details": error_details}), 500
     finally:
+        release_upload(source)
+
+def sse_event(event, data):
+    return f"event: {event}\ndata: {json.dumps(data)}\n\n"
+
+@api.route('/api/generate-quiz/stream', methods=['POST'])
+def generate_quiz_stream():
+    """
+    Same inputs as /api/generate-quiz, but streams each question as an SSE event as soon as it is complete.
+    Quizzes larger than QUESTION_BATCH_SIZE use the same sub-batches as the non-streaming path: the first one is
+    streamed token by token while the others are generated concurrently in the background, and their questions
+    follow once it is done.
+    """
+
+    params, error = parse_quiz_request()
+    if error:
+        return error
+
+    try:
+        source = buffer_upload(params["file"], params["file_type"])
+    except Exception as e:
+        error_details = traceback.format_exc()
+        log.exception("upload_buffer_failed")
+        return jsonify({"error": f"Failed to save file: {str(e)}", "details": error_details}), 500
+
+    difficulty = params["difficulty"]
+    num_questions = params["num_questions"]
+
+    def events():
+        started = time.perf_counter()
         try:
-            if os.path.exists(file_path):
-                os.remove(file_path)
-                print(f"Temporary file removed: {file_path}")
+            yield sse_event("status", {"stage": "processing_document"})
+            retriever = process_document(source, params["file_type"], k=retrieval_k(num_questions))
+            yield sse_event("status", {"stage": "retrieve_content"})
+            retrieved = retrieve_content({
+                "retriever": retriever,
+                "difficulty": difficulty,
+                "num_questions": num_questions
+            })
+
+            yield sse_event("status", {"stage": "generate_questions"})
+            batches = split_question_batches(retrieved["chunks"], retrieved["content"], num_questions)
+            first = dict(batches[0], difficulty=difficulty)
+            rest = None
+            if len(batches) > 1:
+                log.info("generation_fan_out", num_questions=num_questions, sub_batches=len(batches), concurrency=GENERATION_CONCURRENCY, streamed=1)
+                from langchain_core.output_parsers import JsonOutputParser
+                chain = get_quiz_prompt() | get_generation_llm() | JsonOutputParser()
+                executor = ThreadPoolExecutor(max_workers=1)
+                rest = executor.submit(generate_batches, chain, batches[1:], difficulty)
+                executor.shutdown(wait=False)
+
+            questions = []
+            seen = set()
+
+            def accept(question):
+                key = question_key(question)
+                if key is None or key in seen or len(questions) >= num_questions:
+                    return False
+                seen.add(key)
+                questions.append(question)
+                return True
+
+            question_cache = get_question_cache()
+            cache_key = question_cache.make_key(first["content"], difficulty, first["num_questions"]) if question_cache else None
+            cached = question_cache.get(cache_key) if question_cache is not None else None
+            # Includes time spent blocked on a slow client, since the generator is paused while events are sent
+            generate_started = time.perf_counter()
+            if cached is not None:
+                streamed = cached
+                for question in cached:
+                    if accept(question):
+                        yield sse_event("question", {"index": len(questions) - 1, "question": question})
+            else:
+                streamed = []
+                parser = JsonArrayStreamParser()
+                for chunk in (get_quiz_prompt() | get_generation_llm()).stream(first):
+                    for question in parser.feed(chunk.content):
+                        if isinstance(question, dict):
+                            streamed.append(question)
+                        if accept(question):
+                            log.debug("question_streamed", index=len(questions) - 1)
+                            yield sse_event("question", {"index": len(questions) - 1, "question": question})
+                # Cache a streamed answer only when every requested question came through intact
+                if question_cache is not None and len(streamed) == first["num_questions"]:
+                    question_cache.set(cache_key, streamed)
+
+            if rest is not None:
+                for batch_questions in rest.result():
+                    for question in batch_questions or []:
+                        if accept(question):
+                            yield sse_event("question", {"index": len(questions) - 1, "question": question})
+            PIPELINE_STAGE_SECONDS.observe(time.perf_counter() - generate_started, stage="generate_stream")
+            if not questions:
+                raise ValueError("No valid questions generated")
+
+            yield sse_event("status", {"stage": "storing"})
+            quiz_id = store_quiz(questions, params["metadata"])
+            PIPELINE_RUNS.inc(outcome="success")
+            PIPELINE_STAGE_SECONDS.observe(time.perf_counter() - started, stage="total")
+            yield sse_event("done", {
+                "message": "Quiz successfully generated and stored in MongoDB",
+                "quiz_id": quiz_id,
+                "num_questions": len(questions)
+            })
         except Exception as e:
-            print(f"Failed to remove temporary file {file_path}: {str(e)}")
-@app.route('/api/get-quiz/<quiz_id>', methods=['GET'])
+            PIPELINE_RUNS.inc(outcome="error")
+            log.exception("generate_quiz_stream_failed")
+            yield sse_event("error", {"error": str(e)})
+        finally:
+            release_upload(source)
+
+    return Response(
+        stream_with_context(events()),
+        mimetype="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+def run_quiz_job(source, file_type, difficulty, num_questions, metadata, progress=None):
+    try:
+        quiz_id, questions = run_quiz_pipeline(source, file_type, difficulty, num_questions, metadata, progress)
+        progress("done")
+        return {"quiz_id": quiz_id, "quiz": questions}
+    finally:
+        release_upload(source)
+
+@api.route('/api/quiz-jobs', methods=['POST'])
+def submit_quiz_job():
+    params, error = parse_quiz_request()
+    if error:
+        return error
+
+    try:
+        source = buffer_upload(params["file"], params["file_type"])
+    except Exception as e:
+        error_details = traceback.format_exc()
+        log.exception("upload_buffer_failed")
+        return jsonify({"error": f"Failed to save file: {str(e)}", "details": error_details}), 500
+
+    try:
+        job_id = job_queue.submit(
+            run_quiz_job,
+            source,
+            params["file_type"],
+            params["difficulty"],
+            params["num_questions"],
+            params["metadata"]
+        )
+    except QueueFullError as e:
+        release_upload(source)
+        log.warning("quiz_job_rejected", error=str(e))
+        return jsonify({"error": str(e)}), 429, {"Retry-After": str(JOB_RETRY_AFTER_SECONDS)}
+    except Exception as e:
+        release_upload(source)
+        log.exception("quiz_job_submit_failed")
+        return jsonify({"error": f"Failed to queue job: {str(e)}"}), 500
+
+    log.info("quiz_job_queued", job_id=job_id)
+    return jsonify({
+        "message": "Quiz generation job queued",
+        "job_id": job_id,
+        "status_url": f"/api/quiz-jobs/{job_id}",
+        "result_url": f"/api/quiz-jobs/{job_id}/result"
+    }), 202
+
+@api.route('/api/quiz-jobs/<job_id>', methods=['GET'])
+def get_quiz_job(job_id):
+    job = job_queue.get(job_id)
+    if job is None:
+        return jsonify({"error": "Job not found"}), 404
+    return jsonify({
+        "job_id": job_id,
+        "status": job["status"],
+        "stage": job["stage"],
+        "stages": job["stages"],
+        "created_at": job["created_at"],
+        "updated_at": job["updated_at"],
+        "error": job["error"]
+    })
+
+@api.route('/api/quiz-jobs/<job_id>/result', methods=['GET'])
+def get_quiz_job_result(job_id):
+    job = job_queue.get(job_id)
+    if job is None:
+        return jsonify({"error": "Job not found"}), 404
+    if job["status"] == "failed":
+        return jsonify({"error": job["error"], "status": job["status"]}), 500
+    if job["status"] != "completed":
+        return jsonify({"status": job["status"], "stage": job["stage"]}), 202
+    return jsonify({
+        "message": "Quiz successfully generated and stored in MongoDB",
+        "quiz_id": job["result"]["quiz_id"],
+        "quiz": job["result"]["quiz"]
+    })
+
+def load_quiz_payload(quiz_id):
+    """Loader for quiz_cache: the /api/get-quiz payload for a quiz, or None if it is missing or empty."""
+    quiz = get_mongo().quizzes.find_one({"_id": ObjectId(quiz_id)}, QUIZ_FIELDS)
+    if not quiz or not quiz.get("quiz"):
+        return None
+    log.info("quiz_loaded", quiz_id=quiz_id, num_questions=len(quiz["quiz"]))
+    return {
+        "message": "Quiz retrieved successfully",
+        "quiz_id": str(quiz["_id"]),
+        "quiz": quiz["quiz"],
+        "metadata": quiz["metadata"]
+    }
+
+quiz_cache = QuizCache(
+    load_quiz_payload,
+    max_entries=QUIZ_CACHE_MAX_ENTRIES,
+    ttl=QUIZ_CACHE_TTL or None,
+    shared=SQLiteResponseStore(QUIZ_CACHE_SHARED_PATH, table="quiz_cache") if QUIZ_CACHE_SHARED_PATH else None,
+    shared_ttl=QUIZ_CACHE_TTL or None
+)
+
+@api.route('/api/get-quiz/<quiz_id>', methods=['GET'])
 def get_quiz(quiz_id):
-    """Fetch a quiz by its quiz_id from MongoDB."""
+    """Fetch a quiz by its quiz_id, served from quiz_cache with ETag/If-None-Match revalidation."""
     try:
-        print(f"Fetching quiz with ID: {quiz_id}")
-        try:
-            quiz = quiz_collection.find_one({"_id": ObjectId(quiz_id)})
-        except Exception as e:
-            print(f"Invalid quiz_id format: {str(e)}")
+        if not ObjectId.is_valid(quiz_id):
+            log.info("invalid_quiz_id", quiz_id=quiz_id)
             return jsonify({"error": "Invalid quiz_id format"}), 400
 
-        if not quiz or not quiz.get("quiz"):
-            print(f"No quiz found for ID: {quiz_id}")
+        # Canonical (lowercase hex) form, the same key invalidate() uses
+        quiz_id = str(ObjectId(quiz_id))
+        entry = quiz_cache.get(quiz_id)
+        if entry is None:
+            log.info("quiz_not_found", quiz_id=quiz_id)
             return jsonify({"error": "No quiz found"}), 404
 
-        print(f"Found quiz with {len(quiz['quiz'])} questions")
-        return jsonify({
-            "message": "Quiz retrieved successfully",
-            "quiz_id": str(quiz["_id"]),
-            "quiz": quiz["quiz"],
-            "metadata": quiz["metadata"]
-        })
+        etag, body = entry
+        if request.if_none_match.contains(etag):
+            response = Response(status=304)
+        else:
+            response = Response(body, mimetype="application/json")
+        response.set_etag(etag)
+        # Let clients keep the body but revalidate it on every use
+        response.headers["Cache-Control"] = "no-cache"
+        return response
 
     except Exception as e:
         error_details = traceback.format_exc()
-        print(f"Error in get_quiz: {error_details}")
+        log.exception("get_quiz_failed", quiz_id=quiz_id)
         return jsonify({"error": f"Internal server error: {str(e)}", "details": error_details}), 500
 
-@app.route('/create-google-form', methods=['GET'])
+def publish_quiz_form(quiz, form):
+    """
+    Record a created Google Form: link it from the quiz and store the form document, including the
+    questionId tables taken from the batchUpdate replies so scoring never has to fetch the form again.
+
+    :param quiz: Quiz document with _id and quiz.
+    :param form: Result of FormsGateway.create_form.
+    """
+    questions = quiz["quiz"]
+    form_id = form["form_id"]
+    form_link = form["google_form_link"]
+    question_ids, answer_key = index_form(questions, form["question_id_map"])
+    log.info("form_published", quiz_id=str(quiz["_id"]), form_id=form_id, form_link=form_link)
+
+    get_mongo().quizzes.update_one({"_id": quiz["_id"]}, {"$set": {"google_form_link": form_link}})
+    quiz_cache.invalidate(quiz["_id"])
+    get_mongo().form_responses.insert_one({
+        "quiz_id": quiz["_id"],
+        "form_id": form_id,
+        "title": FORM_TITLE,
+        "questions": questions,
+        "question_id_map": form["question_id_map"],
+        "question_ids": question_ids,
+        "answer_key": answer_key,
+        "google_form_link": form_link,
+        "created_at": utcnow()
+    })
+
+@api.route('/create-google-form', methods=['GET'])
 def create_google_form():
-    print("Starting create_google_form endpoint")
     try:
-        print("Fetching latest quiz from MongoDB...")
-        quiz = quiz_collection.find_one(sort=[("_id", -1)])
+        quiz = get_mongo().quizzes.find_one({}, {"quiz": 1}, sort=LATEST_FIRST)
         if not quiz or not quiz.get("quiz"):
-            print("No quizzes found or quiz is empty")
+            log.info("no_quiz_for_form")
             return jsonify({"error": "No quizzes found or quiz is empty"}), 404
 
         questions = quiz["quiz"]
-        print(f"Found quiz with ID {quiz['_id']} and {len(questions)} questions")
-        form_metadata = {"info": {"title": "Auto-Generated Quiz"}}
-        print("Creating Google Form...")
-        form = service.forms().create(body=form_metadata).execute()
-        form_id = form["formId"]
-        print(f"Created Google Form with ID: {form_id}")
-
-        requests = [{
-            "createItem": {
-                "item": {
-                    "title": question["question"],
-                    "questionItem": {
-                        "question": {
-                            "required": True,
-                            "choiceQuestion": {
-                                "type": "RADIO",
-                                "options": [{"value": option} for option in question["options"]],
-                                "shuffle": False
-                            }
-                        }
-                    }
-                },
-                "location": {"index": 0}
-            }
-        } for question in questions]
-
-        print(f"Batch updating Google Form with {len(requests)} questions...")
-        service.forms().batchUpdate(formId=form_id, body={"requests": requests}).execute()
-        form_link = f"https://docs.google.com/forms/d/{form_id}/viewform"
-        print(f"Google Form link: {form_link}")
-
-        print("Updating quiz in MongoDB with form link...")
-        quiz_collection.update_one({"_id": quiz["_id"]}, {"$set": {"google_form_link": form_link}})
-        print("Storing form response in MongoDB...")
-        form_responses_collection.insert_one({
-            "quiz_id": quiz["_id"],
-            "form_id": form_id,
-            "title": "Auto-Generated Quiz",
-            "questions": questions,
-            "google_form_link": form_link
-        })
+        log.info("creating_google_form", quiz_id=str(quiz["_id"]), num_questions=len(questions))
+        form = get_forms_gateway().create_form(FORM_TITLE, questions)
+        publish_quiz_form(quiz, form)
+
+        return jsonify({"message": "Form created successfully", "google_form_link": form["google_form_link"]})
+
+    except Exception as e:
+        error_details = traceback.format_exc()
+        log.exception("create_google_form_failed")
+        return jsonify({"error": str(e), "details": error_details}), 500
 
-        print("Returning successful response")
-        return jsonify({"message": "Form created successfully", "google_form_link": form_link})
+@api.route('/create-google-forms', methods=['POST'])
+def create_google_forms():
+    """Create one Google Form per quiz for a list of quiz_ids, with the Forms API calls made concurrently."""
+    try:
+        data = request.get_json(silent=True) or {}
+        quiz_ids = data.get("quiz_ids")
+        if not isinstance(quiz_ids, list) or not quiz_ids:
+            return jsonify({"error": "quiz_ids must be a non-empty list"}), 400
+        invalid = [quiz_id for quiz_id in quiz_ids if not ObjectId.is_valid(str(quiz_id))]
+        if invalid:
+            return jsonify({"error": "Invalid quiz_id format", "quiz_ids": invalid}), 400
+
+        object_ids = list(dict.fromkeys(ObjectId(str(quiz_id)) for quiz_id in quiz_ids))
+        quizzes = {quiz["_id"]: quiz for quiz in get_mongo().quizzes.find({"_id": {"$in": object_ids}}, {"quiz": 1})}
+        found = [quizzes[object_id] for object_id in object_ids if quizzes.get(object_id, {}).get("quiz")]
+        log.info("creating_google_forms", quizzes=len(found), requested=len(object_ids))
+        forms = get_forms_gateway().create_forms([(FORM_TITLE, quiz["quiz"]) for quiz in found])
+
+        results = {str(object_id): {"error": "No quiz found"} for object_id in object_ids}
+        for quiz, form in zip(found, forms):
+            if isinstance(form, Exception):
+                log.warning("form_creation_failed", quiz_id=str(quiz["_id"]), error=str(form))
+                results[str(quiz["_id"])] = {"error": str(form)}
+                continue
+            publish_quiz_form(quiz, form)
+            results[str(quiz["_id"])] = {"form_id": form["form_id"], "google_form_link": form["google_form_link"]}
+
+        created = sum(1 for result in results.values() if "form_id" in result)
+        status = 200 if created else (404 if not found else 502)
+        return jsonify({
+            "message": f"Created {created} of {len(results)} forms",
+            "results": [dict(result, quiz_id=quiz_id) for quiz_id, result in results.items()]
+        }), status
 
     except Exception as e:
         error_details = traceback.format_exc()
-        print(f"Error in create_google_form: {error_details}")
+        log.exception("create_google_forms_failed")
         return jsonify({"error": str(e), "details": error_details}), 500
 
-@app.route('/latest-form-id', methods=['GET'])
+@api.route('/latest-form-id', methods=['GET'])
 def get_latest_form_id():
     try:
-        print("Fetching latest form ID...")
-        latest_form = form_responses_collection.find_one(sort=[("_id", -1)])
+        latest_form = get_mongo().form_responses.find_one({}, {"form_id": 1}, sort=LATEST_FIRST)
         if not latest_form or "form_id" not in latest_form:
-            print("No form responses found")
+            log.info("no_forms_found")
             return jsonify({"error": "No form responses found"}), 404
-        print(f"Latest form ID: {latest_form['form_id']}")
+        log.debug("latest_form_id", form_id=latest_form["form_id"])
         return jsonify({"form_id": latest_form["form_id"]})
     except Exception as e:
         error_details = traceback.format_exc()
-        print(f"Error in get_latest_form_id: {error_details}")
+        log.exception("get_latest_form_id_failed")
         return jsonify({"error": str(e), "details": error_details}), 500
 
-@app.route('/fetch-responses/<form_id>', methods=['GET'])
+@api.route('/fetch-responses/<form_id>', methods=['GET'])
 def fetch_store_responses(form_id):
     try:
-        print(f"Fetching responses for form ID: {form_id}")
-        response_data = service.forms().responses().list(formId=form_id).execute()
-        if "responses" not in response_data:
-            print("No responses found")
-            return jsonify({"message": "No responses found"}), 404
-
-        user_responses = []
-        for response in response_data["responses"]:
-            response_id = response["responseId"]
-            response_time = response.get("createTime", "")
-            answers = response.get("answers", {})
-
-            formatted_answers = {
-                q_id: ans.get("textAnswers", {}).get("answers", [{}])[0].get("value", "")
-                for q_id, ans in answers.items()
-            }
-
-            user_responses.append({
-                "response_id": response_id,
-                "response_time": response_time,
-                "answers": formatted_answers
-            })
+        log.info("fetching_responses", form_id=form_id)
+        result = FormResponseSync(get_forms_gateway(), get_mongo().user_responses, get_mongo().sync_state).sync(form_id)
+        user_responses = result["responses"]
 
         if user_responses:
-            print(f"Storing {len(user_responses)} responses in MongoDB...")
-            insert_result = user_response_collection.insert_many(user_responses)
-            for i, obj_id in enumerate(insert_result.inserted_ids):
-                user_responses[i]["_id"] = str(obj_id)
-            print("Responses stored successfully")
+            log.info("responses_stored", form_id=form_id, count=len(user_responses), pages=result["pages"])
             return jsonify({
                 "message": "Responses stored successfully",
-                "data": user_responses
+                "data": user_responses,
+                "pages": result["pages"],
+                "high_water_mark": result["high_water_mark"]
             })
 
-        print("No new responses")
-        return jsonify({"message": "No new responses"}), 200
+        if not get_mongo().user_responses.find_one({"form_id": form_id}, {"_id": 1}):
+            log.info("no_responses_found", form_id=form_id)
+            return jsonify({"message": "No responses found"}), 404
+
+        log.info("no_new_responses", form_id=form_id)
+        return jsonify({"message": "No new responses", "high_water_mark": result["high_water_mark"]}), 200
     except Exception as e:
         error_details = traceback.format_exc()
-        print(f"Error in fetch_store_responses: {error_details}")
+        log.exception("fetch_responses_failed", form_id=form_id)
         return jsonify({"error": str(e), "details": error_details}), 500
 
-@app.route('/evaluate-quiz', methods=['POST', 'GET'])
+@api.route('/evaluate-quiz', methods=['POST', 'GET'])
 def evaluate_quiz():
     try:
-        print("Starting quiz evaluation...")
         response_id = None
         if request.method == 'POST' and request.is_json:
             data = request.get_json(silent=True)
             response_id = data.get("response_id") if data else None
         elif request.method == 'GET':
             response_id = request.args.get("response_id")
-        print(f"Response ID: {response_id}")
 
-        user_response = user_response_collection.find_one({"response_id": response_id}) if response_id else user_response_collection.find_one(sort=[("_id", -1)])
+        if response_id:
+            user_response = get_mongo().user_responses.find_one({"response_id": response_id}, RESPONSE_ANSWER_FIELDS)
+        else:
+            user_response = get_mongo().user_responses.find_one({}, RESPONSE_ANSWER_FIELDS, sort=LATEST_FIRST)
         if not user_response:
-            print("No user responses found")
+            log.info("no_user_responses")
             return jsonify({"error": "No user responses found"}), 404
 
         user_answers = user_response.get("answers", {})
         user_response_id = user_response.get("response_id")
-        print(f"User response found: {user_response_id}")
 
-        latest_form_response = form_responses_collection.find_one(sort=[("_id", -1)])
+        latest_form_response = get_mongo().form_responses.find_one({}, FORM_SCORING_FIELDS, sort=LATEST_FIRST)
         if not latest_form_response:
-            print("No form responses found")
+            log.info("no_forms_found")
             return jsonify({"error": "No form responses found"}), 404
 
         form_id = latest_form_response.get("form_id")
         quiz_questions = latest_form_response.get("questions", [])
-        print(f"Form ID: {form_id}, Questions: {len(quiz_questions)}")
 
         if not quiz_questions:
-            print("No questions found")
+            log.info("no_questions_found", form_id=form_id)
             return jsonify({"error": "No questions found"}), 404
 
-        correct_answers = {q["question"]: q["correct_answer"] for q in quiz_questions}
-
-        question_id_map = {}
-        if form_id:
-            try:
-                print(f"Fetching form structure for form ID: {form_id}")
-                form_data = service.forms().get(formId=form_id).execute()
-                for item in form_data.get("items", []):
-                    question_text = item.get("title", "")
-                    question_id = item.get("questionItem", {}).get("question", {}).get("questionId", "")
-                    if question_text and question_id:
-                        question_id_map[question_id] = question_text
-            except Exception as e:
-                print(f"Warning: Could not fetch form structure: {str(e)}")
-
-        score = 0
+        question_ids, answer_key = get_form_structure_store().scoring_tables(latest_form_response)
         total_questions = len(quiz_questions)
-        question_results = []
-
-        for question_data in quiz_questions:
-            question_text = question_data["question"]
-            correct_answer = question_data["correct_answer"]
-            
-            user_answer = ""
-            if question_id_map:
-                for q_id, q_text in question_id_map.items():
-                    if q_text.strip() == question_text.strip() and q_id in user_answers:
-                        user_answer = user_answers[q_id].strip()
-                        break
-            else:
-                for answer_key, answer_value in user_answers.items():
-                    if question_text in answer_key or answer_key in question_text:
-                        user_answer = answer_value.strip()
-                        break
-
-            is_correct = user_answer == correct_answer
-            if is_correct:
-                score += 1
-
-            question_results.append({
-                "question": question_text,
-                "correct_answer": correct_answer,
-                "user_answer": user_answer,
-                "is_correct": is_correct
-            })
+        score, question_results = score_response(quiz_questions, question_ids, answer_key, user_answers)
 
         percentage_score = (score / total_questions * 100) if total_questions > 0 else 0
-        print(f"Score: {score}/{total_questions} ({percentage_score}%)")
+        log.info("response_evaluated", response_id=user_response_id, form_id=form_id, score=score, total_questions=total_questions)
 
         evaluation_result = {
             "user_response_id": str(user_response["_id"]),
@@ -587,25 +1251,231 @@ def evaluate_quiz():
             "evaluated_at": datetime.datetime.now().isoformat()
         }
 
-        print("Updating user response in MongoDB...")
-        user_response_collection.update_one(
+        get_mongo().user_responses.update_one(
             {"_id": user_response["_id"]},
             {"$set": evaluation_result}
         )
 
-        print("Returning evaluation result")
         return jsonify(evaluation_result)
 
     except Exception as e:
         error_details = traceback.format_exc()
-        print(f"Error in evaluate_quiz: {error_details}")
+        log.exception("evaluate_quiz_failed")
+        return jsonify({"error": str(e), "details": error_details}), 500
+
+@api.route('/evaluate-quiz/bulk', methods=['POST', 'GET'])
+def evaluate_quiz_bulk():
+    """Grade every stored response of a form (default: the latest form) and return class-level aggregates."""
+    try:
+        data = request.get_json(silent=True) or {}
+        form_id = data.get("form_id") or request.args.get("form_id")
+        log.info("bulk_evaluation_started", form_id=form_id or "latest")
+
+        if form_id:
+            form_doc = get_mongo().form_responses.find_one({"form_id": form_id}, FORM_SCORING_FIELDS)
+        else:
+            form_doc = get_mongo().form_responses.find_one({}, FORM_SCORING_FIELDS, sort=LATEST_FIRST)
+        if not form_doc:
+            log.info("no_forms_found")
+            return jsonify({"error": "No form responses found"}), 404
+
+        form_id = form_doc.get("form_id")
+        quiz_questions = form_doc.get("questions", [])
+        if not quiz_questions:
+            log.info("no_questions_found", form_id=form_id)
+            return jsonify({"error": "No questions found"}), 404
+
+        question_ids, answer_key = get_form_structure_store().scoring_tables(form_doc)
+        answers = key_row(quiz_questions, question_ids, answer_key)
+        total_questions = len(quiz_questions)
+        correct_per_question = np.zeros(total_questions, dtype=np.int64)
+        score_counts = np.zeros(total_questions + 1, dtype=np.int64)
+        graded = 0
+
+        cursor = get_mongo().user_responses.find(
+            {"form_id": form_id},
+            RESPONSE_ANSWER_FIELDS
+        ).batch_size(BULK_GRADE_BATCH_SIZE)
+
+        def flush(batch):
+            rows = [answer_row(quiz_questions, question_ids, doc.get("answers", {})) for doc in batch]
+            correct, scores = grade_matrix(rows, answers)
+            evaluated_at = datetime.datetime.now().isoformat()
+            operations = []
+            for doc, row, correct_row, score in zip(batch, rows, correct, scores):
+                score = int(score)
+                operations.append(UpdateOne({"_id": doc["_id"]}, {"$set": {
+                    "user_response_id": str(doc["_id"]),
+                    "response_id": doc.get("response_id"),
+                    "form_id": form_id,
+                    "score": score,
+                    "percentage": round(score / total_questions * 100, 2),
+                    "total_questions": total_questions,
+                    "question_results": question_results_from_row(quiz_questions, answers, row, correct_row),
+                    "evaluated_at": evaluated_at
+                }}))
+            get_mongo().user_responses.bulk_write(operations, ordered=False)
+            return correct.sum(axis=0), np.bincount(scores.astype(np.int64), minlength=total_questions + 1)
+
+        batch = []
+        for doc in cursor:
+            batch.append(doc)
+            if len(batch) >= BULK_GRADE_BATCH_SIZE:
+                per_question, counts = flush(batch)
+                correct_per_question += per_question
+                score_counts += counts
+                graded += len(batch)
+                batch = []
+        if batch:
+            per_question, counts = flush(batch)
+            correct_per_question += per_question
+            score_counts += counts
+            graded += len(batch)
+
+        if not graded:
+            log.info("no_user_responses", form_id=form_id)
+            return jsonify({"error": "No user responses found"}), 404
+
+        mean_score = float((score_counts * np.arange(total_questions + 1)).sum() / graded)
+        log.info("bulk_evaluation_completed", form_id=form_id, graded=graded, mean_score=round(mean_score, 2), total_questions=total_questions)
+        return jsonify({
+            "form_id": form_id,
+            "responses_graded": graded,
+            "total_questions": total_questions,
+            "mean_score": round(mean_score, 2),
+            "mean_percentage": round(mean_score / total_questions * 100, 2),
+            "score_distribution": {str(score): int(count) for score, count in enumerate(score_counts)},
+            "question_stats": [
+                {
+                    "question": question["question"],
+                    "correct_count": int(correct_count),
+                    "correct_rate": round(int(correct_count) / graded, 4)
+                }
+                for question, correct_count in zip(quiz_questions, correct_per_question)
+            ],
+            "evaluated_at": datetime.datetime.now().isoformat()
+        })
+
+    except Exception as e:
+        error_details = traceback.format_exc()
+        log.exception("evaluate_quiz_bulk_failed")
         return jsonify({"error": str(e), "details": error_details}), 500
 
-@app.route('/api/health', methods=['GET'])
+@api.route('/api/cache-stats', methods=['GET'])
+def cache_stats():
+    # Report only what is already loaded; a stats call should not load the LLM stack
+    llm_cache = components["llm_cache"].value
+    question_cache = components["question_cache"].value
+    return jsonify({
+        "llm_cache": llm_cache.stats() if llm_cache else None,
+        "question_cache": question_cache.stats() if question_cache else None,
+        "quiz_cache": quiz_cache.stats()
+    }), 200
+
+def loaded_embedding_stats():
+    """Embedding service stats (with chunk_cache when the vector cache is on), or None until embeddings load."""
+    embeddings = components["embeddings"].value
+    if embeddings is None:
+        return None
+    from chunkcache import CachedChunkEmbeddings
+
+    if isinstance(embeddings, CachedChunkEmbeddings):
+        stats = embeddings.base.stats()
+        stats["chunk_cache"] = embeddings.stats()
+        return stats
+    return embeddings.stats()
+
+@api.route('/api/embedding-stats', methods=['GET'])
+def embedding_stats():
+    stats = loaded_embedding_stats()
+    if stats is None:
+        return jsonify({"embeddings": components["embeddings"].status()}), 200
+    return jsonify(stats), 200
+
+def collect_runtime_metrics():
+    """Scrape-time metrics: hit/miss counters of every loaded cache, queue depths and component readiness."""
+    caches = {"quiz": quiz_cache.stats()}
+    for name, component in (("llm", "llm_cache"), ("question", "question_cache"), ("form_structure", "form_structure")):
+        value = components[component].value
+        if value is not None:
+            caches[name] = value.stats()
+    queues = [({"queue": "quiz_jobs"}, job_queue.depth())]
+    embedding = loaded_embedding_stats()
+    if embedding is not None:
+        queues.append(({"queue": "embeddings"}, embedding["queue_depth"]))
+        if "chunk_cache" in embedding:
+            caches["chunk_embeddings"] = embedding["chunk_cache"]
+
+    yield ("cache_hits_total", "counter", "Cache hits by cache.",
+           [({"cache": name}, stats["hits"]) for name, stats in caches.items()])
+    yield ("cache_misses_total", "counter", "Cache misses by cache.",
+           [({"cache": name}, stats["misses"]) for name, stats in caches.items()])
+    yield ("cache_hit_ratio", "gauge", "Hit ratio since start by cache.",
+           [({"cache": name}, stats["hit_rate"]) for name, stats in caches.items()])
+    yield ("quiz_queue_depth", "gauge", "Work waiting or in progress by queue.", queues)
+    yield ("quiz_component_ready", "gauge", "1 once a component has loaded.",
+           [({"component": name}, int(status["state"] == "ready")) for name, status in components.status().items()])
+
+metrics.register_collector(collect_runtime_metrics)
+
+@api.route('/metrics', methods=['GET'])
+def metrics_endpoint():
+    """Prometheus scrape endpoint; never loads a component."""
+    return Response(metrics.render(), content_type="text/plain; version=0.0.4; charset=utf-8")
+
+@api.before_app_request
+def start_request_timer():
+    g.request_started = time.perf_counter()
+
+@api.after_app_request
+def record_request(response):
+    started = g.pop("request_started", None)
+    if started is None:
+        return response
+    elapsed = time.perf_counter() - started
+    # Label by URL rule, not path, so ids in the path do not explode the series count
+    route = request.url_rule.rule if request.url_rule else "unmatched"
+    HTTP_REQUEST_SECONDS.observe(elapsed, method=request.method, route=route, status=response.status_code)
+    log.info("request", method=request.method, route=route, status=response.status_code, ms=round(elapsed * 1000, 1))
+    return response
+
+@api.route('/api/health', methods=['GET'])
 def health_check():
-    print("Health check requested")
+    """Liveness: the process is up and serving requests, whether or not its components have loaded."""
     return jsonify({"status": "healthy"}), 200
 
+@api.route('/api/ready', methods=['GET'])
+def readiness_check():
+    """Readiness: 200 once every required component has loaded, 503 before that, with per-component status."""
+    ready = components.ready()
+    return jsonify({
+        "status": "ready" if ready else "not_ready",
+        "components": components.status()
+    }), 200 if ready else 503
+
+def create_app(warm_up=None):
+    """
+    Build the Flask app.
+
+    :param warm_up: Component names to load in a background thread, "all", or None to use WARM_UP_COMPONENTS.
+                    Components that are not warmed up load on first use.
+    :return: Flask app.
+    """
+    app = Flask(__name__)
+    app.config['UPLOAD_FOLDER'] = UPLOAD_FOLDER
+    CORS(app, resources=CORS_RESOURCES)
+    app.register_blueprint(api)
+
+    warm_up = WARM_UP_COMPONENTS if warm_up is None else warm_up
+    if isinstance(warm_up, str):
+        warm_up = None if warm_up == "all" else [name.strip() for name in warm_up.split(",") if name.strip()]
+    if warm_up is None or warm_up or PRECOMPUTE_QUERY_EXPANSIONS:
+        components.warm_up(warm_up, background=True, after=precompute_query_expansions)
+    return app
+
+# Module-level app for `gunicorn app:app` and `python app.py`
+app = create_app()
+
 if __name__ == "__main__":
-    print("Starting Flask server...")
+    log.info("server_starting")
     app.run(debug=True, host='0.0.0.0', port=int(os.environ.get('PORT', 5000)))
@@ -0,0 +1,105 @@
+import os
+import sys
+import json
+import random
+import logging
+import threading
+
+LOG_LEVEL = os.environ.get("LOG_LEVEL", "INFO").upper()
+# "json" (one object per line) or "text"
+LOG_FORMAT = os.environ.get("LOG_FORMAT", "json")
+# Fraction of DEBUG/INFO events kept; WARNING and above are always kept
+LOG_SAMPLE_RATE = float(os.environ.get("LOG_SAMPLE_RATE", 1.0))
+
+_configure_lock = threading.Lock()
+_configured = False
+
+
+class JsonFormatter(logging.Formatter):
+    """Render a record as one JSON object: ts, level, logger, event, then the event's fields."""
+
+    def format(self, record):
+        entry = {
+            "ts": round(record.created, 3),
+            "level": record.levelname,
+            "logger": record.name,
+            "event": record.getMessage()
+        }
+        entry.update(getattr(record, "fields", None) or {})
+        if record.exc_info:
+            entry["exc"] = self.formatException(record.exc_info)
+        return json.dumps(entry, default=str)
+
+
+class TextFormatter(logging.Formatter):
+    """Render a record as 'LEVEL logger event key=value ...' for local development."""
+
+    def format(self, record):
+        fields = getattr(record, "fields", None) or {}
+        line = " ".join([record.levelname, record.name, record.getMessage()] + [f"{key}={value}" for key, value in fields.items()])
+        if record.exc_info:
+            line += "\n" + self.formatException(record.exc_info)
+        return line
+
+
+def configure_logging():
+    """Attach one stdout handler to the root 'quiz' logger (idempotent)."""
+    global _configured
+    with _configure_lock:
+        if _configured:
+            return
+        handler = logging.StreamHandler(sys.stdout)
+        handler.setFormatter(JsonFormatter() if LOG_FORMAT == "json" else TextFormatter())
+        root = logging.getLogger("quiz")
+        root.addHandler(handler)
+        root.setLevel(LOG_LEVEL)
+        root.propagate = False
+        _configured = True
+
+
+class StructuredLogger:
+    """
+    A thin wrapper over a stdlib logger that logs events with keyword fields.
+    The level check and the sampling decision happen before any record is built, so a dropped event costs
+    one comparison and, when sampled, one random draw. Pass sample_rate=... to override the rate per event.
+    """
+
+    def __init__(self, name, sample_rate=None):
+        """
+        Initialize the StructuredLogger.
+
+        :param name: Logger name, placed under the 'quiz' hierarchy.
+        :param sample_rate: Fraction of DEBUG/INFO events kept (default: LOG_SAMPLE_RATE).
+        """
+        configure_logging()
+        self.logger = logging.getLogger(f"quiz.{name}")
+        self.sample_rate = LOG_SAMPLE_RATE if sample_rate is None else sample_rate
+
+    def log(self, level, event, sample_rate=None, exc_info=False, **fields):
+        if not self.logger.isEnabledFor(level):
+            return
+        if level < logging.WARNING:
+            rate = self.sample_rate if sample_rate is None else sample_rate
+            if rate < 1.0 and random.random() >= rate:
+                return
+        self.logger.log(level, event, exc_info=exc_info, extra={"fields": fields})
+
+    def debug(self, event, **fields):
+        self.log(logging.DEBUG, event, **fields)
+
+    def info(self, event, **fields):
+        self.log(logging.INFO, event, **fields)
+
+    def warning(self, event, **fields):
+        self.log(logging.WARNING, event, **fields)
+
+    def error(self, event, **fields):
+        self.log(logging.ERROR, event, **fields)
+
+    def exception(self, event, **fields):
+        """Log at ERROR with the current exception's traceback."""
+        self.log(logging.ERROR, event, exc_info=True, **fields)
+
+
+def get_logger(name, sample_rate=None):
+    return StructuredLogger(name, sample_rate)
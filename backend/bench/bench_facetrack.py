@@ -0,0 +1,197 @@
+"""
+Replay recorded or synthetic webcam frames through the facetrack pipeline and report throughput,
+per-stage latency percentiles (decode, face, eyes, gaze) and memory. Timings come from a pass with
+tracemalloc off; the Python peak is measured in a separate, traced pass. Tracking and adaptive reuse
+follow facetrack's settings (on by default); --compare also runs the plain full-detection pipeline.
+
+Examples:
+    python bench/bench_facetrack.py --frames recordings/session1
+    python bench/bench_facetrack.py --synthetic 300 --scale-factor 1.2 --min-neighbors 4
+    python bench/bench_facetrack.py --frames recordings/session1 --no-tracking --no-adaptive --json
+    python bench/bench_facetrack.py --synthetic 300 --compare
+"""
+import os
+import sys
+import json
+import time
+import argparse
+import tracemalloc
+import logging
+import numpy as np
+import cv2
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import facetrack  # noqa: E402
+
+try:
+    import resource
+except ImportError:
+    resource = None
+
+FRAME_EXTENSIONS = ('.jpg', '.jpeg', '.png', '.webp', '.bmp')
+
+
+def load_frames(directory):
+    """Return the encoded bytes of every image in a directory, in file-name order."""
+    frames = []
+    for name in sorted(os.listdir(directory)):
+        if name.lower().endswith(FRAME_EXTENSIONS):
+            with open(os.path.join(directory, name), 'rb') as file:
+                frames.append(file.read())
+    return frames
+
+
+def synthetic_frames(count, width=640, height=480, seed=0):
+    """Generate JPEG-encoded frames: a noisy background with a bright oval and two dark eye blobs that drift."""
+    rng = np.random.default_rng(seed)
+    frames = []
+    for i in range(count):
+        frame = rng.integers(60, 120, size=(height, width), dtype=np.uint8)
+        cx = width // 2 + int(30 * np.sin(i / 15))
+        cy = height // 2
+        cv2.ellipse(frame, (cx, cy), (90, 120), 0, 0, 360, 190, -1)
+        for dx in (-35, 35):
+            cv2.circle(frame, (cx + dx, cy - 30), 12, 30, -1)
+        ok, encoded = cv2.imencode('.jpg', frame, [cv2.IMWRITE_JPEG_QUALITY, 80])
+        if ok:
+            frames.append(encoded.tobytes())
+    return frames
+
+
+def percentile(values, pct):
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, max(0, int(round(pct / 100.0 * len(ordered))) - 1))
+    return ordered[index]
+
+
+def summarize(values):
+    return {
+        "count": len(values),
+        "p50_ms": round(percentile(values, 50), 3),
+        "p95_ms": round(percentile(values, 95), 3),
+        "p99_ms": round(percentile(values, 99), 3),
+        "mean_ms": round(sum(values) / len(values), 3) if values else 0.0
+    }
+
+
+def replay(frames, reduce):
+    """Run every frame once through decode + analysis + session state, without timing anything."""
+    session = facetrack.ProctorSession("bench")
+    for data in frames:
+        observation = facetrack.analyze_gray(facetrack.decode_frame_bytes(data, reduce), facetrack.tracking_hint(session))
+        facetrack.apply_observation(session, observation, time.time())
+
+
+def python_peak_mb(frames, reduce=1):
+    """Peak Python allocation over one replay of the frames, in a pass of its own (tracemalloc slows every frame)."""
+    tracemalloc.start()
+    try:
+        replay(frames, reduce)
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return round(peak / (1024 * 1024), 2)
+
+
+def run(frames, repeat=1, reduce=1):
+    """Run every frame through decode + analysis + session state, collecting per-stage latencies."""
+    session = facetrack.ProctorSession("bench")
+    stages = {"decode": [], "face": [], "eyes": [], "gaze": [], "total": []}
+    reused = 0
+
+    started = time.perf_counter()
+    for _ in range(repeat):
+        for data in frames:
+            frame_started = time.perf_counter()
+            gray = facetrack.decode_frame_bytes(data, reduce)
+            stages["decode"].append((time.perf_counter() - frame_started) * 1000)
+            observation = facetrack.analyze_gray(gray, facetrack.tracking_hint(session))
+            facetrack.apply_observation(session, observation, time.time())
+            for stage in ("face", "eyes", "gaze"):
+                if f"{stage}_ms" in observation["timing_ms"]:
+                    stages[stage].append(observation["timing_ms"][f"{stage}_ms"])
+            reused += observation["reused"]
+            stages["total"].append((time.perf_counter() - frame_started) * 1000)
+    elapsed = time.perf_counter() - started
+
+    processed = len(frames) * repeat
+    report = {
+        "frames": processed,
+        "seconds": round(elapsed, 3),
+        "fps": round(processed / elapsed, 2) if elapsed else 0.0,
+        "reused_frames": reused,
+        "stages": {stage: summarize(values) for stage, values in stages.items()},
+        "python_peak_mb": python_peak_mb(frames, reduce),
+        "settings": {
+            "scale_factor": facetrack.FACE_SCALE_FACTOR,
+            "min_neighbors": facetrack.FACE_MIN_NEIGHBORS,
+            "tracking": facetrack.TRACKING_ENABLED,
+            "adaptive": facetrack.ADAPTIVE_ENABLED,
+            "detect_max_width": facetrack.DETECT_MAX_WIDTH,
+            "reduce": reduce
+        }
+    }
+    if resource is not None:
+        # ru_maxrss is KiB on Linux
+        report["max_rss_mb"] = round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024, 2)
+    return report
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    source = parser.add_mutually_exclusive_group()
+    source.add_argument('--frames', help="Directory of recorded frames (.jpg/.png/.webp)")
+    source.add_argument('--synthetic', type=int, default=200, help="Number of synthetic frames (default: 200)")
+    parser.add_argument('--repeat', type=int, default=1, help="Replay the corpus this many times")
+    parser.add_argument('--reduce', type=int, default=1, choices=sorted(facetrack.DECODE_FLAGS), help="Decode downscale factor")
+    parser.add_argument('--scale-factor', type=float, default=facetrack.FACE_SCALE_FACTOR)
+    parser.add_argument('--min-neighbors', type=int, default=facetrack.FACE_MIN_NEIGHBORS)
+    parser.add_argument('--detect-max-width', type=int, default=facetrack.DETECT_MAX_WIDTH)
+    parser.add_argument('--tracking', action=argparse.BooleanOptionalAction, default=facetrack.TRACKING_ENABLED,
+                        help="ROI tracking between full detections")
+    parser.add_argument('--adaptive', action=argparse.BooleanOptionalAction, default=facetrack.ADAPTIVE_ENABLED,
+                        help="Motion-based observation reuse")
+    parser.add_argument('--compare', action='store_true', help="Also run with tracking and adaptive reuse off")
+    parser.add_argument('--json', action='store_true', help="Print the report as JSON")
+    args = parser.parse_args()
+
+    logging.getLogger(facetrack.__name__).setLevel(logging.WARNING)
+    facetrack.set_alert_backend(facetrack.noop_alert)
+    facetrack.FACE_SCALE_FACTOR = args.scale_factor
+    facetrack.FACE_MIN_NEIGHBORS = args.min_neighbors
+    facetrack.DETECT_MAX_WIDTH = args.detect_max_width
+    facetrack.TRACKING_ENABLED = args.tracking
+    facetrack.ADAPTIVE_ENABLED = args.adaptive
+
+    frames = load_frames(args.frames) if args.frames else synthetic_frames(args.synthetic)
+    if not frames:
+        parser.error("No frames found")
+
+    report = run(frames, repeat=args.repeat, reduce=args.reduce)
+    reports = {"configured": report}
+    if args.compare:
+        facetrack.TRACKING_ENABLED = facetrack.ADAPTIVE_ENABLED = False
+        reports["baseline"] = run(frames, repeat=args.repeat, reduce=args.reduce)
+    if args.json:
+        print(json.dumps(reports if args.compare else report, indent=2))
+        return
+
+    for name, report in reports.items():
+        if args.compare:
+            print(f"== {name}")
+        print_report(report)
+
+
+def print_report(report):
+    print(f"{report['frames']} frames in {report['seconds']}s -> {report['fps']} fps ({report['reused_frames']} reused)")
+    print(f"{'stage':<8}{'count':>8}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}")
+    for stage, stats in report["stages"].items():
+        print(f"{stage:<8}{stats['count']:>8}{stats['p50_ms']:>10}{stats['p95_ms']:>10}{stats['p99_ms']:>10}")
+    print(f"python peak: {report['python_peak_mb']} MB" + (f", max RSS: {report['max_rss_mb']} MB" if "max_rss_mb" in report else ""))
+    print(f"settings: {report['settings']}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,169 @@
+"""
+Measure the backend's cold start with `python -X importtime`: the cumulative import time of app.py, the
+slowest modules it pulls in, the time until /api/health answers, and what each heavy dependency that is now
+loaded lazily would add if imported up front. Every measurement runs in a fresh interpreter with warm-up off.
+
+Examples:
+    python bench/bench_import.py
+    python bench/bench_import.py --repeat 5 --top 20 --json
+"""
+import os
+import sys
+import json
+import argparse
+import statistics
+import subprocess
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Dependencies app.py imports lazily, inside component loaders and pipeline functions
+DEFERRED_MODULES = [
+    "langchain_core.prompts",
+    "langchain_groq",
+    "langchain_community.embeddings",
+    "langchain.vectorstores",
+    "langchain.retrievers",
+    "langgraph.graph",
+    "sentence_transformers",
+    "torch",
+    "faiss",
+    "googleapiclient.discovery",
+    "PyPDF2",
+    "groq",
+]
+
+HEALTH_SNIPPET = """
+import time
+started = time.perf_counter()
+import {module} as target
+client = target.app.test_client()
+status = client.get('/api/health').status_code
+print(status, (time.perf_counter() - started) * 1000)
+"""
+
+
+def child_env():
+    env = dict(os.environ)
+    # Measure the import itself: no background warm-up competing for the GIL
+    env["WARM_UP_COMPONENTS"] = ""
+    env["PYTHONDONTWRITEBYTECODE"] = "1"
+    return env
+
+
+def importtime(statement):
+    """
+    Run `python -X importtime -c statement` and parse its report.
+
+    :return: List of (module, self_us, cumulative_us, depth), or None if the statement failed.
+    """
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", statement],
+        cwd=BACKEND_DIR, env=child_env(), capture_output=True, text=True
+    )
+    if result.returncode != 0:
+        return None
+    rows = []
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "[us]" in line:
+            continue
+        self_us, cumulative_us, name = line[len("import time:"):].split("|", 2)
+        depth = (len(name) - len(name.lstrip(" "))) // 2
+        rows.append((name.strip(), int(self_us), int(cumulative_us), depth))
+    return rows
+
+
+def module_cumulative_ms(rows, module):
+    for name, _, cumulative_us, _ in rows:
+        if name == module:
+            return cumulative_us / 1000
+    return None
+
+
+def time_to_health(module):
+    result = subprocess.run(
+        [sys.executable, "-c", HEALTH_SNIPPET.format(module=module)],
+        cwd=BACKEND_DIR, env=child_env(), capture_output=True, text=True
+    )
+    if result.returncode != 0:
+        return None, result.stderr.strip().splitlines()[-1:] or ["failed"]
+    status, elapsed_ms = result.stdout.strip().splitlines()[-1].split()
+    return float(elapsed_ms), int(status)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--module', default="app", help="Module to import (default: app)")
+    parser.add_argument('--repeat', type=int, default=3, help="Fresh-interpreter runs per measurement")
+    parser.add_argument('--top', type=int, default=15, help="Number of slowest modules to list")
+    parser.add_argument('--skip-deferred', action='store_true', help="Do not time the lazily imported dependencies")
+    parser.add_argument('--json', action='store_true', help="Print the report as JSON")
+    args = parser.parse_args()
+
+    totals = []
+    last_rows = None
+    for _ in range(args.repeat):
+        rows = importtime(f"import {args.module}")
+        if rows is None:
+            sys.exit(f"import {args.module} failed; run it directly to see the error")
+        totals.append(module_cumulative_ms(rows, args.module))
+        last_rows = rows
+
+    health = []
+    health_error = None
+    for _ in range(args.repeat):
+        elapsed_ms, status = time_to_health(args.module)
+        if elapsed_ms is None:
+            health_error = status
+            break
+        health.append(elapsed_ms)
+
+    top_level = [row for row in last_rows if row[3] <= 1]
+    slowest = sorted(top_level, key=lambda row: row[2], reverse=True)[:args.top]
+
+    deferred = {}
+    if not args.skip_deferred:
+        for module in DEFERRED_MODULES:
+            rows = importtime(f"import {module}")
+            deferred[module] = round(module_cumulative_ms(rows, module), 1) if rows else None
+
+    report = {
+        "module": args.module,
+        "python": sys.version.split()[0],
+        "import_ms": {
+            "median": round(statistics.median(totals), 1),
+            "min": round(min(totals), 1),
+            "runs": len(totals)
+        },
+        "time_to_health_ms": {
+            "median": round(statistics.median(health), 1),
+            "min": round(min(health), 1),
+            "runs": len(health)
+        } if health else {"error": health_error},
+        "slowest_imports_ms": [
+            {"module": name, "cumulative": round(cumulative_us / 1000, 1), "self": round(self_us / 1000, 1)}
+            for name, self_us, cumulative_us, _ in slowest
+        ],
+        # None: not installed in this environment
+        "deferred_imports_ms": deferred
+    }
+
+    if args.json:
+        print(json.dumps(report, indent=2))
+        return
+
+    print(f"import {args.module}: median {report['import_ms']['median']} ms (min {report['import_ms']['min']} ms, {len(totals)} runs, Python {report['python']})")
+    if health:
+        print(f"import + first /api/health: median {report['time_to_health_ms']['median']} ms")
+    else:
+        print(f"import + first /api/health failed: {health_error}")
+    print(f"{'slowest imports':<40}{'cumulative ms':>15}{'self ms':>10}")
+    for row in report["slowest_imports_ms"]:
+        print(f"{row['module']:<40}{row['cumulative']:>15}{row['self']:>10}")
+    if deferred:
+        print(f"{'deferred until first use':<40}{'import ms':>15}")
+        for module, elapsed in deferred.items():
+            print(f"{module:<40}{elapsed if elapsed is not None else 'not installed':>15}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,185 @@
+"""
+Load synthetic quizzes, forms and responses into MongoDB and time the API's queries before and after
+storage.ensure_indexes, with and without projections. mongomock scans collections regardless of indexes,
+so it only shows the effect of projections; index timings and query plans need a real mongod.
+
+Examples:
+    python bench/bench_mongo.py --uri mongodb://localhost:27017 --count 1000000
+    python bench/bench_mongo.py --mongomock --count 20000 --json
+"""
+import os
+import sys
+import json
+import time
+import random
+import argparse
+import statistics
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from storage import create_mongo_client, ensure_indexes, utcnow, QUIZ_FIELDS, FORM_SCORING_FIELDS, RESPONSE_ANSWER_FIELDS, LATEST_FIRST  # noqa: E402
+
+QUESTIONS_PER_QUIZ = 10
+
+
+def make_questions(seed):
+    return [
+        {
+            "question": f"Question {seed}-{i}: which option is correct?",
+            "options": [f"Option {c}" for c in "ABCD"],
+            "correct_answer": "Option A",
+            "explanation": "Synthetic explanation text " * 8
+        }
+        for i in range(QUESTIONS_PER_QUIZ)
+    ]
+
+
+def load(db, count, forms, batch_size):
+    """Insert `forms` quizzes + form docs and `count` responses spread evenly over the forms."""
+    for name in ("listofquestion", "form_responses", "user_response", "form_sync_state"):
+        db[name].drop()
+
+    form_ids = []
+    for f in range(forms):
+        questions = make_questions(f)
+        quiz_id = db["listofquestion"].insert_one({
+            "quiz": questions, "metadata": {"difficulty": "medium"}, "created_at": utcnow()
+        }).inserted_id
+        form_id = f"form-{f:05d}"
+        db["form_responses"].insert_one({
+            "quiz_id": quiz_id, "form_id": form_id, "title": "Auto-Generated Quiz", "questions": questions,
+            "question_ids": [f"{form_id}-q{i}" for i in range(QUESTIONS_PER_QUIZ)], "created_at": utcnow()
+        })
+        form_ids.append(form_id)
+
+    started = time.perf_counter()
+    batch = []
+    for i in range(count):
+        form_id = form_ids[i % forms]
+        batch.append({
+            "response_id": f"resp-{i:08d}",
+            "form_id": form_id,
+            "response_time": "2024-01-01T00:00:00Z",
+            "last_submitted_time": "2024-01-01T00:00:00Z",
+            "answers": {f"{form_id}-q{q}": "Option A" for q in range(QUESTIONS_PER_QUIZ)},
+            "question_results": [{"question": "x" * 60, "user_answer": "Option A", "is_correct": True}] * QUESTIONS_PER_QUIZ,
+            "created_at": utcnow()
+        })
+        if len(batch) >= batch_size:
+            db["user_response"].insert_many(batch, ordered=False)
+            batch = []
+    if batch:
+        db["user_response"].insert_many(batch, ordered=False)
+    return form_ids, time.perf_counter() - started
+
+
+def timed(func, repeat):
+    samples = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        func()
+        samples.append((time.perf_counter() - started) * 1000)
+    ordered = sorted(samples)
+    return {
+        "runs": repeat,
+        "p50_ms": round(statistics.median(ordered), 3),
+        "p95_ms": round(ordered[min(len(ordered) - 1, int(0.95 * len(ordered)))], 3),
+        "mean_ms": round(sum(ordered) / len(ordered), 3)
+    }
+
+
+def winning_stage(cursor):
+    """Top stage of the winning plan (e.g. IXSCAN, COLLSCAN); None where explain is unsupported (mongomock)."""
+    try:
+        plan = cursor.explain()["queryPlanner"]["winningPlan"]
+    except Exception:
+        return None
+    while "inputStage" in plan:
+        plan = plan["inputStage"]
+    return plan.get("stage")
+
+
+def run_queries(db, form_ids, count, repeat, scan_repeat):
+    rng = random.Random(0)
+    responses = db["user_response"]
+    forms = db["form_responses"]
+    quizzes = db["listofquestion"]
+    some_form = form_ids[len(form_ids) // 2]
+
+    def random_response_id():
+        return f"resp-{rng.randrange(count):08d}"
+
+    results = {
+        "response_by_id": timed(lambda: responses.find_one({"response_id": random_response_id()}, RESPONSE_ANSWER_FIELDS), repeat),
+        "latest_form_id_full_doc": timed(lambda: forms.find_one({}, sort=LATEST_FIRST), repeat),
+        "latest_form_id_projected": timed(lambda: forms.find_one({}, {"form_id": 1}, sort=LATEST_FIRST), repeat),
+        "form_by_id_full_doc": timed(lambda: forms.find_one({"form_id": rng.choice(form_ids)}), repeat),
+        "form_by_id_projected": timed(lambda: forms.find_one({"form_id": rng.choice(form_ids)}, FORM_SCORING_FIELDS), repeat),
+        "latest_quiz_projected": timed(lambda: quizzes.find_one({}, QUIZ_FIELDS, sort=LATEST_FIRST), repeat),
+        "responses_for_form_full_docs": timed(lambda: list(responses.find({"form_id": some_form})), scan_repeat),
+        "responses_for_form_projected": timed(lambda: list(responses.find({"form_id": some_form}, RESPONSE_ANSWER_FIELDS)), scan_repeat),
+    }
+    plans = {
+        "response_by_id": winning_stage(responses.find({"response_id": random_response_id()})),
+        "responses_for_form": winning_stage(responses.find({"form_id": some_form})),
+        "form_by_id": winning_stage(forms.find({"form_id": some_form})),
+    }
+    return results, plans
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    target = parser.add_mutually_exclusive_group()
+    target.add_argument('--uri', default=os.environ.get("MONGO_URI", "mongodb://localhost:27017"), help="MongoDB URI (default: MONGO_URI or localhost)")
+    target.add_argument('--mongomock', action='store_true', help="Use an in-process mongomock client instead of a server")
+    parser.add_argument('--db', default="quiz_bench", help="Database to (re)create (default: quiz_bench)")
+    parser.add_argument('--count', type=int, default=1000000, help="Number of user responses (default: 1,000,000)")
+    parser.add_argument('--forms', type=int, default=200, help="Number of quizzes/forms the responses are spread over")
+    parser.add_argument('--batch-size', type=int, default=10000, help="insert_many batch size")
+    parser.add_argument('--repeat', type=int, default=200, help="Runs per point query")
+    parser.add_argument('--scan-repeat', type=int, default=5, help="Runs per per-form scan")
+    parser.add_argument('--json', action='store_true', help="Print the report as JSON")
+    args = parser.parse_args()
+
+    if args.mongomock:
+        import mongomock
+        client = mongomock.MongoClient()
+    else:
+        client = create_mongo_client(args.uri)
+    db = client[args.db]
+
+    form_ids, load_seconds = load(db, args.count, args.forms, args.batch_size)
+    # Unindexed full scans are slow; keep the point-query sample small for the baseline
+    baseline, baseline_plans = run_queries(db, form_ids, args.count, max(1, args.repeat // 20), 1)
+    started = time.perf_counter()
+    failed = ensure_indexes(db)
+    index_seconds = time.perf_counter() - started
+    indexed, indexed_plans = run_queries(db, form_ids, args.count, args.repeat, args.scan_repeat)
+
+    report = {
+        "backend": "mongomock" if args.mongomock else args.uri,
+        "responses": args.count,
+        "forms": args.forms,
+        "load_seconds": round(load_seconds, 2),
+        "index_build_seconds": round(index_seconds, 2),
+        "index_failures": failed,
+        "without_indexes": {"queries": baseline, "plans": baseline_plans},
+        "with_indexes": {"queries": indexed, "plans": indexed_plans}
+    }
+    if not args.mongomock:
+        client.drop_database(args.db)
+
+    if args.json:
+        print(json.dumps(report, indent=2))
+        return
+
+    print(f"{report['responses']} responses over {report['forms']} forms on {report['backend']}: "
+          f"loaded in {report['load_seconds']}s, indexes built in {report['index_build_seconds']}s")
+    print(f"{'query':<32}{'no index p50':>14}{'indexed p50':>14}{'indexed p95':>14}")
+    for name, stats in indexed.items():
+        print(f"{name:<32}{baseline[name]['p50_ms']:>14}{stats['p50_ms']:>14}{stats['p95_ms']:>14}")
+    print(f"plans without indexes: {baseline_plans}")
+    print(f"plans with indexes:    {indexed_plans}")
+
+
+if __name__ == '__main__':
+    main()
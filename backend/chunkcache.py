@@ -0,0 +1,187 @@
+import os
+import sqlite3
+import hashlib
+import threading
+from typing import List
+try:
+    import fcntl
+except ImportError:
+    fcntl = None
+import numpy as np
+from langchain_core.embeddings import Embeddings
+from applog import get_logger
+
+log = get_logger("chunkcache")
+
+
+class ChunkVectorStore:
+    """
+    A persistent chunk-hash -> vector store shared across documents.
+    Vectors are appended to a raw float32 file that is read back through a NumPy memory map,
+    and a SQLite index maps each chunk hash to its row in that file.
+    Several worker processes may share a store: appends hold an exclusive flock on the vector file while rows
+    are allocated, written and indexed. fcntl is POSIX-only; elsewhere a store must have a single writer process.
+    """
+
+    VECTORS_FILE = "vectors.f32"
+    INDEX_FILE = "index.sqlite"
+
+    def __init__(self, store_dir):
+        """
+        Initialize the ChunkVectorStore.
+
+        :param store_dir: Directory holding the vector file and index (created if missing).
+                          Use one directory per embedding model, since all vectors share one dimension.
+        """
+        os.makedirs(store_dir, mode=0o700, exist_ok=True)
+        self.vectors_path = os.path.join(store_dir, self.VECTORS_FILE)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(os.path.join(store_dir, self.INDEX_FILE), check_same_thread=False)
+        self._conn.execute("CREATE TABLE IF NOT EXISTS chunks (hash TEXT PRIMARY KEY, row INTEGER NOT NULL)")
+        self._conn.execute("CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value INTEGER NOT NULL)")
+        self._conn.commit()
+        row = self._conn.execute("SELECT value FROM meta WHERE key = 'dim'").fetchone()
+        self.dim = row[0] if row else None
+        self._mmap = None
+
+    def _vectors(self, max_row):
+        # Other processes may have appended rows since the file was mapped; remap to its current size
+        if self._mmap is None or self._mmap.shape[0] <= max_row:
+            rows = os.path.getsize(self.vectors_path) // (4 * self.dim)
+            self._mmap = np.memmap(self.vectors_path, dtype=np.float32, mode='r', shape=(rows, self.dim))
+        return self._mmap
+
+    def get_many(self, hashes):
+        """
+        Look up vectors for a list of chunk hashes.
+
+        :param hashes: List of chunk hashes.
+        :return: Dict mapping each known hash to its vector (as a list of floats).
+        """
+        if not hashes:
+            return {}
+        found = {}
+        with self._lock:
+            unique = list(set(hashes))
+            for start in range(0, len(unique), 500):
+                batch = unique[start:start + 500]
+                placeholders = ",".join("?" * len(batch))
+                rows = self._conn.execute(
+                    f"SELECT hash, row FROM chunks WHERE hash IN ({placeholders})", batch
+                ).fetchall()
+                found.update(rows)
+            if not found:
+                return {}
+            if self.dim is None:
+                self.dim = self._conn.execute("SELECT value FROM meta WHERE key = 'dim'").fetchone()[0]
+            vectors = self._vectors(max(found.values()))
+            return {h: vectors[row].tolist() for h, row in found.items()}
+
+    def add_many(self, items):
+        """
+        Append vectors for new chunk hashes. Hashes already present are ignored.
+
+        :param items: List of (hash, vector) pairs.
+        """
+        if not items:
+            return
+        with self._lock, open(self.vectors_path, 'ab') as file:
+            if fcntl is not None:
+                # Serializes appends across processes; released when the file is closed
+                fcntl.flock(file.fileno(), fcntl.LOCK_EX)
+            # Checked under the lock, so a chunk another process just stored is not appended twice
+            known = set()
+            hashes = [h for h, _ in items]
+            for start in range(0, len(hashes), 500):
+                batch = hashes[start:start + 500]
+                placeholders = ",".join("?" * len(batch))
+                known.update(h for (h,) in self._conn.execute(
+                    f"SELECT hash FROM chunks WHERE hash IN ({placeholders})", batch
+                ))
+            new_items = []
+            for h, vector in items:
+                if h not in known:
+                    known.add(h)
+                    new_items.append((h, vector))
+            if not new_items:
+                return
+
+            matrix = np.asarray([vector for _, vector in new_items], dtype=np.float32)
+            if self.dim is None:
+                row = self._conn.execute("SELECT value FROM meta WHERE key = 'dim'").fetchone()
+                self.dim = row[0] if row else matrix.shape[1]
+            if not self._conn.execute("SELECT 1 FROM meta WHERE key = 'dim'").fetchone():
+                self._conn.execute("INSERT OR REPLACE INTO meta (key, value) VALUES ('dim', ?)", (self.dim,))
+            if matrix.shape[1] != self.dim:
+                raise ValueError(f"Vector dimension {matrix.shape[1]} does not match store dimension {self.dim}")
+
+            row_bytes = 4 * self.dim
+            size = os.fstat(file.fileno()).st_size
+            first_row = size // row_bytes
+            if size % row_bytes:
+                # Drop a partial row left by a writer that died mid-append, so new rows stay aligned
+                file.truncate(first_row * row_bytes)
+            file.write(matrix.tobytes())
+            file.flush()
+            self._conn.executemany(
+                "INSERT OR IGNORE INTO chunks (hash, row) VALUES (?, ?)",
+                [(h, first_row + i) for i, (h, _) in enumerate(new_items)]
+            )
+            self._conn.commit()
+
+
+class CachedChunkEmbeddings(Embeddings):
+    """
+    Embeddings wrapper that only sends chunks it has never seen to the underlying model.
+    Revisions of the same notes share most of their chunks, so re-uploads mostly hit the store.
+    """
+
+    def __init__(self, base, store):
+        """
+        Initialize the CachedChunkEmbeddings.
+
+        :param base: Underlying LangChain Embeddings used for unseen chunks and queries.
+        :param store: ChunkVectorStore holding previously embedded chunks.
+        """
+        self.base = base
+        self.store = store
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def chunk_hash(text):
+        return hashlib.sha1(text.encode('utf-8')).hexdigest()
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        hashes = [self.chunk_hash(text) for text in texts]
+        vectors = self.store.get_many(hashes)
+
+        missing = {}
+        for h, text in zip(hashes, texts):
+            if h not in vectors and h not in missing:
+                missing[h] = text
+        if missing:
+            new_vectors = self.base.embed_documents(list(missing.values()))
+            new_items = list(zip(missing.keys(), new_vectors))
+            self.store.add_many(new_items)
+            vectors.update(new_items)
+
+        with self._lock:
+            self.hits += len(texts) - len(missing)
+            self.misses += len(missing)
+        log.debug("chunk_embeddings", reused=len(texts) - len(missing), embedded=len(missing))
+        return [list(vectors[h]) for h in hashes]
+
+    def embed_query(self, text: str) -> List[float]:
+        return self.base.embed_query(text)
+
+    def stats(self):
+        """Return chunk-level hit/miss counters."""
+        with self._lock:
+            total = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": round(self.hits / total, 4) if total else 0.0
+            }
@@ -0,0 +1,140 @@
+import time
+import threading
+from applog import get_logger
+
+log = get_logger("components")
+
+
+class Component:
+    """
+    A lazily initialized dependency (model, client, connection).
+    The loader runs on first get() - or ahead of time via warm() - under a lock, so concurrent callers
+    wait for a single load. A failed load is recorded and retried on the next get().
+    """
+
+    def __init__(self, name, loader, required=True):
+        """
+        Initialize the Component.
+
+        :param name: Name reported by status().
+        :param loader: Zero-argument callable that builds and returns the component.
+        :param required: Whether the app is not ready until this component has loaded.
+        """
+        self.name = name
+        self.loader = loader
+        self.required = required
+        self.state = "not_loaded"
+        self.error = None
+        self.load_ms = None
+        self._value = None
+        self._lock = threading.Lock()
+
+    @property
+    def value(self):
+        """The loaded component, or None; never triggers a load."""
+        return self._value
+
+    @property
+    def loaded(self):
+        return self.state == "ready"
+
+    def get(self):
+        """Return the component, loading it first if needed. Re-raises the loader's exception on failure."""
+        if self.state == "ready":
+            return self._value
+        with self._lock:
+            if self.state == "ready":
+                return self._value
+            self.state = "loading"
+            started = time.perf_counter()
+            try:
+                value = self.loader()
+            except Exception as e:
+                self.state = "failed"
+                self.error = str(e)
+                self.load_ms = round((time.perf_counter() - started) * 1000, 1)
+                log.exception("component_failed", component=self.name)
+                raise
+            self._value = value
+            self.error = None
+            self.load_ms = round((time.perf_counter() - started) * 1000, 1)
+            self.state = "ready"
+            log.info("component_loaded", component=self.name, load_ms=self.load_ms)
+            return value
+
+    def warm(self):
+        """Load the component if needed, swallowing errors (they are reported by status())."""
+        try:
+            self.get()
+            return True
+        except Exception:
+            return False
+
+    def status(self):
+        return {"state": self.state, "required": self.required, "load_ms": self.load_ms, "error": self.error}
+
+
+class ComponentRegistry:
+    """
+    Named lazily initialized components, with warm-up and readiness reporting.
+    """
+
+    def __init__(self):
+        self._components = {}
+        self._warm_lock = threading.Lock()
+        self._warm_thread = None
+
+    def register(self, name, loader, required=True):
+        """
+        Register a component loader.
+
+        :param name: Component name.
+        :param loader: Zero-argument callable that builds the component.
+        :param required: Whether readiness waits for this component.
+        :return: The Component.
+        """
+        component = Component(name, loader, required)
+        self._components[name] = component
+        return component
+
+    def __getitem__(self, name):
+        return self._components[name]
+
+    def get(self, name):
+        """Return the named component, loading it if needed."""
+        return self._components[name].get()
+
+    def warm_up(self, names=None, background=False, after=None):
+        """
+        Load components ahead of the first request that needs them.
+
+        :param names: Component names to load, in order (default: all, in registration order).
+        :param background: Load in a daemon thread and return immediately.
+        :param after: Optional callable run once the components have been loaded.
+        :return: The warm-up thread when background is True, otherwise a dict of name -> loaded.
+        """
+        names = list(names) if names is not None else list(self._components)
+
+        def run():
+            results = {name: self._components[name].warm() for name in names if name in self._components}
+            if after is not None:
+                try:
+                    after()
+                except Exception as e:
+                    log.warning("post_warm_up_failed", error=str(e))
+            return results
+
+        if not background:
+            return run()
+        with self._warm_lock:
+            if self._warm_thread is None or not self._warm_thread.is_alive():
+                self._warm_thread = threading.Thread(target=run, name="component-warm-up", daemon=True)
+                self._warm_thread.start()
+            return self._warm_thread
+
+    def ready(self):
+        """True once every required component has loaded."""
+        return all(component.loaded for component in self._components.values() if component.required)
+
+    def status(self):
+        return {name: component.status() for name, component in self._components.items()}
@@ -0,0 +1,113 @@
+import time
+import queue
+import threading
+from concurrent.futures import Future
+from typing import List
+from langchain_core.embeddings import Embeddings
+from applog import get_logger
+
+log = get_logger("embedservice")
+
+
+def configure_torch_threads(num_threads):
+    """
+    Set the number of intra-op threads torch uses for CPU inference.
+
+    :param num_threads: Thread count; ignored if falsy or torch is not installed.
+    """
+    if not num_threads:
+        return
+    try:
+        import torch
+        torch.set_num_threads(num_threads)
+        log.info("torch_threads_set", threads=num_threads)
+    except Exception as e:
+        log.warning("torch_threads_failed", error=str(e))
+
+
+class BatchingEmbeddings(Embeddings):
+    """
+    An in-process embedding server that funnels every embed_documents call through one worker thread.
+    Chunks submitted concurrently by several requests are merged into larger batches (up to max_batch_size
+    texts, waiting at most max_wait_ms for more work), so the model is never driven by competing threads.
+    """
+
+    def __init__(self, base, max_batch_size=256, max_wait_ms=10):
+        """
+        Initialize the BatchingEmbeddings.
+
+        :param base: Underlying LangChain Embeddings (e.g. HuggingFaceEmbeddings).
+        :param max_batch_size: Number of texts after which a merged batch is sent without waiting.
+        :param max_wait_ms: How long the worker waits for more requests before embedding a partial batch.
+        """
+        self.base = base
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait_ms / 1000.0
+        self._queue = queue.Queue()
+        self._stats_lock = threading.Lock()
+        self._chunks = 0
+        self._batches = 0
+        self._busy_seconds = 0.0
+        self._worker = threading.Thread(target=self._run, name="embedding-batcher", daemon=True)
+        self._worker.start()
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        if not texts:
+            return []
+        future = Future()
+        self._queue.put((list(texts), future))
+        return future.result()
+
+    def embed_query(self, text: str) -> List[float]:
+        return self.embed_documents([text])[0]
+
+    def _collect(self):
+        pending = [self._queue.get()]
+        size = len(pending[0][0])
+        deadline = time.monotonic() + self.max_wait
+        while size < self.max_batch_size:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            try:
+                item = self._queue.get(timeout=remaining)
+            except queue.Empty:
+                break
+            pending.append(item)
+            size += len(item[0])
+        return pending
+
+    def _run(self):
+        while True:
+            pending = self._collect()
+            texts = [text for item_texts, _ in pending for text in item_texts]
+            started = time.perf_counter()
+            try:
+                vectors = self.base.embed_documents(texts)
+            except Exception as e:
+                for _, future in pending:
+                    future.set_exception(e)
+                continue
+            elapsed = time.perf_counter() - started
+
+            offset = 0
+            for item_texts, future in pending:
+                future.set_result(vectors[offset:offset + len(item_texts)])
+                offset += len(item_texts)
+
+            with self._stats_lock:
+                self._chunks += len(texts)
+                self._batches += 1
+                self._busy_seconds += elapsed
+
+    def stats(self):
+        """Return throughput counters, including chunks embedded per second of model time."""
+        with self._stats_lock:
+            return {
+                "chunks": self._chunks,
+                "batches": self._batches,
+                "avg_batch_size": round(self._chunks / self._batches, 2) if self._batches else 0.0,
+                "busy_seconds": round(self._busy_seconds, 3),
+                "chunks_per_second": round(self._chunks / self._busy_seconds, 2) if self._busy_seconds else 0.0,
+                "queue_depth": self._queue.qsize()
+            }
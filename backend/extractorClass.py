@@ -1,15 +1,58 @@
 import os
+import tempfile
+import threading
+import multiprocessing
 import PyPDF2
 from docx import Document
 from youtube_transcript_api import YouTubeTranscriptApi
 import groq
 from groq import Groq
 import numpy as np
+from concurrent.futures import ProcessPoolExecutor
+from applog import get_logger
 # from pydub import AudioSegment
 
+log = get_logger("extractor")
+
 # Hide the API key
 client = Groq(api_key=os.getenv("GROQ_API_KEY", "xxx"))
 
+# PDFs with at least this many pages are extracted in parallel page ranges
+PDF_PARALLEL_MIN_PAGES = int(os.getenv("PDF_PARALLEL_MIN_PAGES", 64))
+PDF_WORKERS = int(os.getenv("PDF_WORKERS", os.cpu_count() or 1))
+# Fresh interpreters for the page-range workers: forking the threaded server can deadlock the child
+PDF_START_METHOD = os.getenv("PDF_START_METHOD", "spawn")
+
+_pdf_pool = None
+_pdf_pool_lock = threading.Lock()
+
+
+def get_pdf_pool():
+    """Return the shared page-range worker pool, starting it on first use."""
+    global _pdf_pool
+    with _pdf_pool_lock:
+        if _pdf_pool is None:
+            _pdf_pool = ProcessPoolExecutor(
+                max_workers=PDF_WORKERS,
+                mp_context=multiprocessing.get_context(PDF_START_METHOD)
+            )
+            log.info("pdf_pool_started", workers=PDF_WORKERS, start_method=PDF_START_METHOD)
+        return _pdf_pool
+
+
+def _extract_page_range(file_path, start, stop):
+    """
+    Extract the text of pages [start, stop) of a PDF file. Runs inside a worker process.
+
+    :param file_path: Path to the PDF file.
+    :param start: Index of the first page to extract.
+    :param stop: Index one past the last page to extract.
+    :return: List of page texts, in page order.
+    """
+    with open(file_path, 'rb') as file:
+        reader = PyPDF2.PdfReader(file)
+        return [reader.pages[i].extract_text() or '' for i in range(start, stop)]
+
 class ContextExtractor:
     """
     A class to extract context from various sources: text, PDF, DOCX, YouTube, and audio.
@@ -34,25 +77,60 @@ class ContextExtractor:
             with open(file_path, 'r', encoding='utf-8') as file:
                 return file.read()
         except Exception as e:
-            print(f"Error reading text file: {e}")
+            log.warning("text_read_failed", path=file_path, error=str(e))
             return None
 
+    def iter_pdf_pages(self, source):
+        """
+        Yield the text of a PDF page by page, so downstream processing can start early.
+
+        :param source: Path to the PDF file (e.g., 'example.pdf') or a binary file-like object.
+        :return: Generator of page texts, in page order.
+        """
+        if hasattr(source, 'read'):
+            source.seek(0)
+            reader = PyPDF2.PdfReader(source)
+            for page in reader.pages:
+                yield page.extract_text() or ''
+            return
+        with open(source, 'rb') as file:
+            reader = PyPDF2.PdfReader(file)
+            for page in reader.pages:
+                yield page.extract_text() or ''
+
+    def extract_from_pdf_parallel(self, file_path, num_pages, workers=None):
+        """
+        Extract text from a PDF file by splitting its pages into ranges handled by the shared process pool.
+        Workers receive only the path and their page range.
+
+        :param file_path: Path to the PDF file (e.g., 'example.pdf').
+        :param num_pages: Total number of pages in the PDF.
+        :param workers: Number of page ranges (defaults to PDF_WORKERS).
+        :return: Extracted text as a string, joined in page order.
+        """
+        workers = max(1, min(workers or PDF_WORKERS, num_pages))
+        step = -(-num_pages // workers)
+        ranges = [(start, min(start + step, num_pages)) for start in range(0, num_pages, step)]
+        pool = get_pdf_pool()
+        futures = [pool.submit(_extract_page_range, file_path, start, stop) for start, stop in ranges]
+        return ''.join(''.join(future.result()) for future in futures)
+
     def extract_from_pdf(self, file_path):
         """
         Extract text from a PDF file using PyPDF2.
+        Large PDFs (PDF_PARALLEL_MIN_PAGES pages or more) are extracted in parallel page ranges.
 
         :param file_path: Path to the PDF file (e.g., 'example.pdf').
         :return: Extracted text as a string, or None if an error occurs.
         """
         try:
             with open(file_path, 'rb') as file:
-                reader = PyPDF2.PdfReader(file)
-                text = ''
-                for page in reader.pages:
-                    text += page.extract_text()
-                return text
+                num_pages = len(PyPDF2.PdfReader(file).pages)
+            if num_pages >= PDF_PARALLEL_MIN_PAGES and PDF_WORKERS > 1:
+                return self.extract_from_pdf_parallel(file_path, num_pages)
+            return ''.join(self.iter_pdf_pages(file_path))
         except Exception as e:
-            print(f"Error reading PDF file: {e}")
+            log.warning("pdf_read_failed", path=file_path, error=str(e))
             return None
 
     def extract_from_doc(self, file_path):
@@ -69,7 +147,42 @@ class ContextExtractor:
                 text += para.text + '\n'
             return text
         except Exception as e:
-            print(f"Error reading DOCX file: {e}")
+            log.warning("docx_read_failed", path=file_path, error=str(e))
+            return None
+
+    def extract_from_buffer(self, buffer, file_type):
+        """
+        Extract text from an in-memory upload without writing it to disk.
+
+        :param buffer: Binary file-like object (e.g., io.BytesIO) holding the document.
+        :param file_type: One of 'pdf', 'docx' or 'text'.
+        :return: Extracted text as a string, or None if the type is unsupported or an error occurs.
+        """
+        try:
+            buffer.seek(0)
+            if file_type == 'pdf':
+                reader = PyPDF2.PdfReader(buffer)
+                num_pages = len(reader.pages)
+                # Large PDFs fit under the in-memory upload limit too; spill them to one temp file the
+                # page-range workers open, rather than shipping the whole document to every worker
+                if num_pages >= PDF_PARALLEL_MIN_PAGES and PDF_WORKERS > 1:
+                    buffer.seek(0)
+                    with tempfile.NamedTemporaryFile(suffix='.pdf', delete=False) as spill:
+                        spill.write(buffer.read())
+                    try:
+                        return self.extract_from_pdf_parallel(spill.name, num_pages)
+                    finally:
+                        os.remove(spill.name)
+                return ''.join(page.extract_text() or '' for page in reader.pages)
+            elif file_type == 'docx':
+                doc = Document(buffer)
+                return ''.join(para.text + '\n' for para in doc.paragraphs)
+            elif file_type == 'text':
+                return buffer.read().decode('utf-8')
+            log.warning("unsupported_buffer_type", file_type=file_type)
+            return None
+        except Exception as e:
+            log.warning("buffer_read_failed", file_type=file_type, error=str(e))
             return None
 
     def extract_from_youtube(self, video_url):
@@ -88,7 +201,7 @@ class ContextExtractor:
             transcript = " ".join([item['text'] for item in transcript_list])
             return transcript
         except Exception as e:
-            print(f"Error retrieving YouTube transcript: {e}")
+            log.warning("youtube_transcript_failed", url=video_url, error=str(e))
             return None
 
     # def extract_from_audio(self, file_path):
@@ -106,13 +219,17 @@ class ContextExtractor:
     #     return translation.text
 
 
-    def extract(self, source):
+    def extract(self, source, file_type=None):
         """
         Extract context from the given source, determining the type automatically.
 
-        :param source: Path to the file (e.g., 'example.pdf') or YouTube URL (e.g., 'https://www.youtube.com/watch?v=video_id').
+        :param source: Path to the file (e.g., 'example.pdf'), YouTube URL (e.g., 'https://www.youtube.com/watch?v=video_id'),
+                       or a binary file-like object holding an upload.
+        :param file_type: Document type ('pdf', 'docx' or 'text'); required when source is a file-like object.
         :return: Extracted text as a string, or None if the source type is unsupported or an error occurs.
         """
+        if hasattr(source, 'read'):
+            return self.extract_from_buffer(source, file_type)
         if source.startswith('http'):
             return self.extract_from_youtube(source)
         else:
@@ -124,5 +241,5 @@ class ContextExtractor:
             elif ext in ['.doc', '.docx']:
                 return self.extract_from_doc(source)
             else:
-                print(f"Unsupported source type: {source}")
+                log.warning("unsupported_source_type", source=source)
                 return None
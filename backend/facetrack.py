@@ -4,10 +4,22 @@ import cv2
 import numpy as np
 import base64
 import time
-import winsound
-from math import hypot
+try:
+    import winsound
+except ImportError:
+    winsound = None
+try:
+    from flask_sock import Sock
+except ImportError:
+    Sock = None
+from math import hypot, isfinite
 import logging
 import sys
+import threading
+import os
+import json
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
 
 # Set up logging
 logging.basicConfig(level=logging.DEBUG)
@@ -21,31 +33,159 @@ logger.info("Starting Flask application")
 logger.info(f"Python version: {sys.version}")
 logger.info(f"OpenCV version: {cv2.__version__}")
 
-# Load Haar Cascade models
-face_cascade = cv2.CascadeClassifier(cv2.data.haarcascades + 'haarcascade_frontalface_default.xml')
-eye_cascade = cv2.CascadeClassifier(cv2.data.haarcascades + 'haarcascade_eye.xml')
+def load_cascades():
+    """Load the Haar Cascade models; returns (face_cascade, eye_cascade)."""
+    face = cv2.CascadeClassifier(cv2.data.haarcascades + 'haarcascade_frontalface_default.xml')
+    eye = cv2.CascadeClassifier(cv2.data.haarcascades + 'haarcascade_eye.xml')
+    if face.empty() or eye.empty():
+        logger.error("Failed to load Haar Cascade models")
+        raise RuntimeError("Failed to load Haar Cascade models")
+    return face, eye
 
-if face_cascade.empty() or eye_cascade.empty():
-    logger.error("Failed to load Haar Cascade models")
-    raise RuntimeError("Failed to load Haar Cascade models")
+# Load Haar Cascade models
+face_cascade, eye_cascade = load_cascades()
 logger.info("Haar Cascade models loaded successfully")
 
-# Global variables
+# Global settings
 ALERT_ENABLED = True
-looking_away = False
-looking_away_start_time = 0
 alert_threshold = 1.5
-last_alert_time = 0
 alert_cooldown = 5.0
-warnings = 0
 max_warnings = 3
-long_blink_count = 0
+DEFAULT_SESSION_ID = "default"
+SESSION_IDLE_TIMEOUT = 30 * 60
+SESSION_SHARDS = 64
+
+# Face detection tuning
+FACE_SCALE_FACTOR = float(os.environ.get("FACE_SCALE_FACTOR", 1.3))
+FACE_MIN_NEIGHBORS = int(os.environ.get("FACE_MIN_NEIGHBORS", 5))
+# Tracking mode: full-frame detection only every DETECT_EVERY_N frames (or when the face is lost);
+# in between, only a padded ROI around the last face box is searched
+TRACKING_ENABLED = os.environ.get("TRACKING_ENABLED", "true").lower() == "true"
+DETECT_EVERY_N = int(os.environ.get("DETECT_EVERY_N", 10))
+TRACK_ROI_PAD = float(os.environ.get("TRACK_ROI_PAD", 0.25))
+# Full-frame detection runs on the first pyramid level narrower than this (0 = full resolution)
+DETECT_MAX_WIDTH = int(os.environ.get("DETECT_MAX_WIDTH", 320))
+
+# Adaptive pipeline: reuse the previous observation when a downscaled frame differs from the last
+# analyzed one by less than MOTION_THRESHOLD (mean absolute gray-level difference), at most MAX_REUSED_FRAMES in a row
+ADAPTIVE_ENABLED = os.environ.get("ADAPTIVE_ENABLED", "true").lower() == "true"
+MOTION_THUMB_SIZE = (32, 24)
+MOTION_THRESHOLD = float(os.environ.get("MOTION_THRESHOLD", 2.0))
+MAX_REUSED_FRAMES = int(os.environ.get("MAX_REUSED_FRAMES", 5))
+
+# Batch endpoint: frames are analyzed on a process pool, each worker holding its own cascades
+PROCTOR_WORKERS = int(os.environ.get("PROCTOR_WORKERS", os.cpu_count() or 1))
+# Fresh interpreters for frame workers: forking the threaded server could copy a logging (or other) lock held by
+# another thread and deadlock the child. "forkserver" also works on POSIX.
+PROCTOR_START_METHOD = os.environ.get("PROCTOR_START_METHOD", "spawn")
+MAX_BATCH_FRAMES = int(os.environ.get("MAX_BATCH_FRAMES", 256))
+# Batch frame timestamps are client capture times in epoch seconds; they are clamped to
+# [server time - MAX_FRAME_AGE, server time] so client clock skew cannot stretch or shrink the alert timers
+MAX_FRAME_AGE = float(os.environ.get("MAX_FRAME_AGE", 10.0))
+
+class ProctorSession:
+    """Per-candidate proctoring state, kept compact with __slots__."""
+    __slots__ = (
+        "session_id", "lock", "last_seen", "looking_away", "looking_away_start_time",
+        "last_alert_time", "warnings", "long_blink_count", "last_face", "frames_since_detect",
+        "prev_thumb", "last_observation", "reuse_streak"
+    )
+
+    def __init__(self, session_id):
+        self.session_id = session_id
+        self.lock = threading.Lock()
+        self.last_seen = time.time()
+        self.looking_away = False
+        self.looking_away_start_time = 0
+        self.last_alert_time = 0
+        self.warnings = 0
+        self.long_blink_count = 0
+        self.last_face = None
+        self.frames_since_detect = 0
+        self.prev_thumb = None
+        self.last_observation = None
+        self.reuse_streak = 0
+
+class SessionRegistry:
+    """
+    Sharded map of session id -> ProctorSession. Each shard has its own lock, so concurrent
+    candidates rarely contend; sessions idle for longer than idle_timeout are evicted.
+    """
+
+    def __init__(self, shards=SESSION_SHARDS, idle_timeout=SESSION_IDLE_TIMEOUT):
+        self._shards = [({}, threading.Lock()) for _ in range(shards)]
+        self.idle_timeout = idle_timeout
+        self._next_sweep = time.time() + idle_timeout
+
+    def _shard(self, session_id):
+        return self._shards[hash(session_id) % len(self._shards)]
+
+    def start(self, session_id):
+        """Create (or reset) a session and return it."""
+        sessions, lock = self._shard(session_id)
+        session = ProctorSession(session_id)
+        with lock:
+            sessions[session_id] = session
+        self._maybe_sweep()
+        return session
+
+    def get(self, session_id):
+        """Return the session for session_id, creating it if it does not exist yet."""
+        sessions, lock = self._shard(session_id)
+        with lock:
+            session = sessions.get(session_id)
+            if session is None:
+                session = sessions[session_id] = ProctorSession(session_id)
+        session.last_seen = time.time()
+        self._maybe_sweep()
+        return session
+
+    def close(self, session_id):
+        """Remove a session and return it, or None if it was not registered."""
+        sessions, lock = self._shard(session_id)
+        with lock:
+            return sessions.pop(session_id, None)
+
+    def __len__(self):
+        return sum(len(sessions) for sessions, _ in self._shards)
+
+    def _maybe_sweep(self):
+        now = time.time()
+        if now < self._next_sweep:
+            return
+        self._next_sweep = now + min(self.idle_timeout, 60)
+        cutoff = now - self.idle_timeout
+        evicted = 0
+        for sessions, lock in self._shards:
+            with lock:
+                idle = [sid for sid, session in sessions.items() if session.last_seen < cutoff]
+                for sid in idle:
+                    del sessions[sid]
+                evicted += len(idle)
+        if evicted:
+            logger.info(f"Evicted {evicted} idle proctoring sessions")
+
+sessions = SessionRegistry()
+
+def winsound_alert():
+    winsound.Beep(1000, 300)
+
+def noop_alert():
+    pass
+
+# Called when a warning is raised; winsound only exists on Windows, elsewhere alerts are log-only
+alert_backend = winsound_alert if winsound is not None else noop_alert
+
+def set_alert_backend(backend):
+    """Replace the alert sound backend (any zero-argument callable), e.g. noop_alert for servers and benchmarks."""
+    global alert_backend
+    alert_backend = backend
 
 def play_alert():
     global ALERT_ENABLED
     if ALERT_ENABLED:
         try:
-            winsound.Beep(1000, 300)
+            alert_backend()
             logger.info("Alert sound played")
         except Exception as e:
             logger.error(f"Failed to play alert: {e}")
@@ -77,102 +217,348 @@ def detect_gaze(eye_frame):
         logger.error(f"Error in detect_gaze: {e}")
         return "center", 0.5
 
-def process_image(image_data):
-    global looking_away, looking_away_start_time, last_alert_time, warnings, long_blink_count
+# imdecode flags per downscale factor; decoding straight to grayscale skips the BGR->gray conversion
+DECODE_FLAGS = {
+    1: cv2.IMREAD_GRAYSCALE,
+    2: cv2.IMREAD_REDUCED_GRAYSCALE_2,
+    4: cv2.IMREAD_REDUCED_GRAYSCALE_4,
+    8: cv2.IMREAD_REDUCED_GRAYSCALE_8
+}
+
+def decode_frame_bytes(buffer, reduce=1):
+    # np.frombuffer wraps the request buffer without copying it
+    np_arr = np.frombuffer(buffer, np.uint8)
+    gray = cv2.imdecode(np_arr, DECODE_FLAGS.get(reduce, cv2.IMREAD_GRAYSCALE))
+    if gray is None:
+        raise ValueError("Failed to decode image")
+    return gray
+
+def decode_data_url(image_data):
+    return decode_frame_bytes(base64.b64decode(image_data.split(',')[1]))
+
+def process_image(image_data, session):
     try:
-        img_bytes = base64.b64decode(image_data.split(',')[1])
-        np_arr = np.frombuffer(img_bytes, np.uint8)
-        frame = cv2.imdecode(np_arr, cv2.IMREAD_COLOR)
-        if frame is None:
-            raise ValueError("Failed to decode image")
-        gray = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)
-        faces = face_cascade.detectMultiScale(gray, 1.3, 5)
-        current_time = time.time()
-
-        face_detected = len(faces) > 0
-        looking_at_screen = False
-        look_direction = "Unknown"
-        eyes_closed = False
-        blink_duration = 0
-        violation_detected = False
-
-        if not face_detected:
-            if not looking_away:
-                looking_away = True
-                looking_away_start_time = current_time
-            elif current_time - looking_away_start_time > alert_threshold:
-                if current_time - last_alert_time > alert_cooldown:
-                    play_alert()
-                    last_alert_time = current_time
-                    warnings += 1
-                violation_detected = warnings >= max_warnings
-        else:
-            looking_away = False
-            for (x, y, w, h) in faces:
-                roi_gray = gray[y:y + h, x:x + w]
-                eyes = eye_cascade.detectMultiScale(roi_gray, 1.1, 5)
-                if len(eyes) == 0:
-                    eyes_closed = True
-                    blink_duration = current_time - (looking_away_start_time if looking_away else current_time)
-                    if blink_duration > 2:
-                        long_blink_count += 1
-                else:
-                    for (ex, ey, ew, eh) in eyes:
-                        eye_frame = roi_gray[ey:ey + eh, ex:ex + ew]
-                        direction, _ = detect_gaze(eye_frame)
-                        look_direction = direction
-                        looking_at_screen = direction == "center"
-                        break
-                if not looking_at_screen:
-                    if not looking_away:
-                        looking_away = True
-                        looking_away_start_time = current_time
-                    elif current_time - looking_away_start_time > alert_threshold:
-                        if current_time - last_alert_time > alert_cooldown:
-                            play_alert()
-                            last_alert_time = current_time
-                            warnings += 1
-                        violation_detected = warnings >= max_warnings
-
-        proctor_data = {
-            "face_detected": face_detected,
-            "looking_at_screen": looking_at_screen,
-            "warnings": warnings,
-            "max_warnings": max_warnings,
-            "violation_detected": violation_detected,
-            "look_direction": look_direction,
-            "eyes_closed": eyes_closed,
-            "blink_duration": blink_duration,
-            "long_blink_count": long_blink_count,
-            "head_pose": [0, 0, 0],
-            "ear": 0
-        }
-        logger.debug(f"Proctor data: {proctor_data}")
-        return proctor_data
+        started = time.perf_counter()
+        gray = decode_data_url(image_data)
+        pipeline_stats.record_stage("decode_ms", _elapsed_ms(started))
+    except Exception as e:
+        logger.error(f"Error decoding image: {e}")
+        return error_result(session, e)
+    return process_gray(gray, session)
+
+def largest_box(boxes):
+    return max((tuple(int(v) for v in box) for box in boxes), key=lambda b: b[2] * b[3])
+
+def detect_faces_full(gray):
+    levels = 0
+    small = gray
+    while DETECT_MAX_WIDTH and small.shape[1] > DETECT_MAX_WIDTH:
+        small = cv2.pyrDown(small)
+        levels += 1
+    faces = face_cascade.detectMultiScale(small, FACE_SCALE_FACTOR, FACE_MIN_NEIGHBORS)
+    scale = 2 ** levels
+    return [tuple(int(v) * scale for v in face) for face in faces]
+
+def track_face(gray, box):
+    x, y, w, h = box
+    pad_x, pad_y = int(w * TRACK_ROI_PAD), int(h * TRACK_ROI_PAD)
+    x0, y0 = max(0, x - pad_x), max(0, y - pad_y)
+    x1, y1 = min(gray.shape[1], x + w + pad_x), min(gray.shape[0], y + h + pad_y)
+    found = face_cascade.detectMultiScale(
+        gray[y0:y1, x0:x1], FACE_SCALE_FACTOR, FACE_MIN_NEIGHBORS,
+        minSize=(int(w * 0.6), int(h * 0.6))
+    )
+    if len(found) == 0:
+        return None
+    fx, fy, fw, fh = largest_box(found)
+    return (fx + x0, fy + y0, fw, fh)
+
+def locate_faces(gray, last_face=None, frames_since_detect=0):
+    """
+    Find faces, searching only around the last known face between periodic full detections.
+    Returns (faces, last_face, frames_since_detect) with the updated tracking hint.
+    """
+    if TRACKING_ENABLED and last_face is not None and frames_since_detect < DETECT_EVERY_N:
+        box = track_face(gray, last_face)
+        if box is not None:
+            return [box], box, frames_since_detect + 1
+        logger.debug("Lost face track, running full detection")
+
+    faces = detect_faces_full(gray)
+    return faces, (largest_box(faces) if faces else None), 0
+
+class PipelineStats:
+    """Process-wide counters for the adaptive pipeline: frames analyzed vs. reused and per-stage timings."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.frames = 0
+        self.reused = 0
+        self._stage_ms = {}
+        self._stage_count = {}
+
+    def record(self, reused, timing):
+        with self._lock:
+            self.frames += 1
+            if reused:
+                self.reused += 1
+        for stage, ms in timing.items():
+            self.record_stage(stage, ms)
+
+    def record_stage(self, stage, ms):
+        with self._lock:
+            self._stage_ms[stage] = self._stage_ms.get(stage, 0.0) + ms
+            self._stage_count[stage] = self._stage_count.get(stage, 0) + 1
+
+    def snapshot(self):
+        with self._lock:
+            return {
+                "frames": self.frames,
+                "reused_frames": self.reused,
+                "skip_rate": round(self.reused / self.frames, 4) if self.frames else 0.0,
+                "avg_stage_ms": {
+                    stage.replace("_ms", ""): round(total / self._stage_count[stage], 3)
+                    for stage, total in self._stage_ms.items()
+                }
+            }
+
+pipeline_stats = PipelineStats()
+
+def tracking_hint(session):
+    """Per-session inputs analyze_gray needs from earlier frames (picklable, so it can go to a worker)."""
+    return {
+        "last_face": session.last_face,
+        "frames_since_detect": session.frames_since_detect,
+        "prev_thumb": session.prev_thumb,
+        "prev_observation": session.last_observation,
+        "reuse_streak": session.reuse_streak
+    }
+
+def next_hint(observation):
+    """The tracking hint for the frame after the one that produced observation (what apply_observation stores)."""
+    return {
+        "last_face": observation["last_face"],
+        "frames_since_detect": observation["frames_since_detect"],
+        "prev_thumb": observation["thumb"],
+        "prev_observation": {key: value for key, value in observation.items() if key not in ("timing_ms", "motion")},
+        "reuse_streak": observation["reuse_streak"]
+    }
+
+def _elapsed_ms(started):
+    return round((time.perf_counter() - started) * 1000, 3)
+
+def analyze_gray(gray, hint=None):
+    """
+    Run face, eye and gaze detection on a grayscale frame. Pure function of its inputs, so it can run in a worker process.
+    If the frame barely differs from the last analyzed frame of the session, the previous observation is reused.
+    Returns an observation dict consumed by apply_observation.
+    """
+    hint = hint or {}
+    timing = {}
+
+    started = time.perf_counter()
+    thumb = cv2.resize(gray, MOTION_THUMB_SIZE, interpolation=cv2.INTER_AREA) if ADAPTIVE_ENABLED else None
+    prev_thumb = hint.get("prev_thumb")
+    prev_observation = hint.get("prev_observation")
+    reuse_streak = hint.get("reuse_streak", 0)
+    if thumb is not None and prev_thumb is not None and prev_observation is not None:
+        motion = float(cv2.absdiff(thumb, prev_thumb).mean())
+        timing["motion_ms"] = _elapsed_ms(started)
+        if motion < MOTION_THRESHOLD and reuse_streak < MAX_REUSED_FRAMES:
+            # Keep comparing against the last analyzed frame so slow drift still triggers analysis
+            return dict(prev_observation, reused=True, motion=motion, reuse_streak=reuse_streak + 1, timing_ms=timing)
+
+    started = time.perf_counter()
+    faces, last_face, frames_since_detect = locate_faces(gray, hint.get("last_face"), hint.get("frames_since_detect", 0))
+    timing["face_ms"] = _elapsed_ms(started)
+
+    face_observations = []
+    if faces:
+        # Only the primary (largest) face matters; eyes are searched in the upper half of it
+        x, y, w, h = largest_box(faces)
+        roi_gray = gray[y:y + h // 2, x:x + w]
+        started = time.perf_counter()
+        eyes = eye_cascade.detectMultiScale(roi_gray, 1.1, 5)
+        timing["eyes_ms"] = _elapsed_ms(started)
+        direction = None
+        for (ex, ey, ew, eh) in eyes:
+            started = time.perf_counter()
+            eye_frame = roi_gray[ey:ey + eh, ex:ex + ew]
+            direction, _ = detect_gaze(eye_frame)
+            timing["gaze_ms"] = _elapsed_ms(started)
+            break
+        face_observations.append({"eyes_found": len(eyes) > 0, "direction": direction})
+    return {
+        "faces": face_observations,
+        "last_face": last_face,
+        "frames_since_detect": frames_since_detect,
+        "thumb": thumb,
+        "reused": False,
+        "reuse_streak": 0,
+        "timing_ms": timing
+    }
+
+def apply_observation(session, observation, current_time):
+    """Advance a session's look-away/warning state with one frame's observation and build its proctor_data."""
+    hint = next_hint(observation)
+    session.last_face = hint["last_face"]
+    session.frames_since_detect = hint["frames_since_detect"]
+    session.prev_thumb = hint["prev_thumb"]
+    session.reuse_streak = hint["reuse_streak"]
+    session.last_observation = hint["prev_observation"]
+    pipeline_stats.record(observation["reused"], observation["timing_ms"])
+
+    face_detected = len(observation["faces"]) > 0
+    looking_at_screen = False
+    look_direction = "Unknown"
+    eyes_closed = False
+    blink_duration = 0
+    violation_detected = False
+
+    if not face_detected:
+        if not session.looking_away:
+            session.looking_away = True
+            session.looking_away_start_time = current_time
+        elif current_time - session.looking_away_start_time > alert_threshold:
+            if current_time - session.last_alert_time > alert_cooldown:
+                play_alert()
+                session.last_alert_time = current_time
+                session.warnings += 1
+            violation_detected = session.warnings >= max_warnings
+    else:
+        session.looking_away = False
+        for face in observation["faces"]:
+            if not face["eyes_found"]:
+                eyes_closed = True
+                blink_duration = current_time - (session.looking_away_start_time if session.looking_away else current_time)
+                if blink_duration > 2:
+                    session.long_blink_count += 1
+            else:
+                look_direction = face["direction"]
+                looking_at_screen = face["direction"] == "center"
+            if not looking_at_screen:
+                if not session.looking_away:
+                    session.looking_away = True
+                    session.looking_away_start_time = current_time
+                elif current_time - session.looking_away_start_time > alert_threshold:
+                    if current_time - session.last_alert_time > alert_cooldown:
+                        play_alert()
+                        session.last_alert_time = current_time
+                        session.warnings += 1
+                    violation_detected = session.warnings >= max_warnings
+
+    proctor_data = {
+        "face_detected": face_detected,
+        "looking_at_screen": looking_at_screen,
+        "warnings": session.warnings,
+        "max_warnings": max_warnings,
+        "violation_detected": violation_detected,
+        "look_direction": look_direction,
+        "eyes_closed": eyes_closed,
+        "blink_duration": blink_duration,
+        "long_blink_count": session.long_blink_count,
+        "head_pose": [0, 0, 0],
+        "ear": 0
+    }
+    logger.debug(f"Proctor data: {proctor_data}")
+    return proctor_data
+
+def process_gray(gray, session):
+    with session.lock:
+        try:
+            observation = analyze_gray(gray, tracking_hint(session))
+            return apply_observation(session, observation, time.time())
+        except Exception as e:
+            logger.error(f"Error processing image: {e}")
+            return error_result(session, e)
+
+def error_result(session, error):
+    return {
+        "face_detected": False,
+        "looking_at_screen": False,
+        "warnings": session.warnings,
+        "max_warnings": max_warnings,
+        "violation_detected": False,
+        "look_direction": "Unknown",
+        "eyes_closed": False,
+        "blink_duration": 0,
+        "long_blink_count": session.long_blink_count,
+        "head_pose": [0, 0, 0],
+        "ear": 0,
+        "error": str(error)
+    }
+
+_frame_pool = None
+_frame_pool_lock = threading.Lock()
+
+def _init_frame_worker():
+    # Give each worker process its own CascadeClassifier instances, whatever the start method
+    global face_cascade, eye_cascade
+    face_cascade, eye_cascade = load_cascades()
+
+def get_frame_pool():
+    global _frame_pool
+    with _frame_pool_lock:
+        if _frame_pool is None:
+            _frame_pool = ProcessPoolExecutor(
+                max_workers=PROCTOR_WORKERS,
+                mp_context=multiprocessing.get_context(PROCTOR_START_METHOD),
+                initializer=_init_frame_worker
+            )
+            logger.info(f"Started frame worker pool with {PROCTOR_WORKERS} {PROCTOR_START_METHOD} processes")
+        return _frame_pool
+
+def analyze_session_frames(job):
+    """
+    Decode and analyze one session's frames, in order, inside a worker process.
+    job is (frames, reduce, hint), where each frame is raw bytes or a base64 data URL and hint comes from
+    tracking_hint. Each frame is analyzed with the hint left by the previous one, exactly as if the frames had
+    arrived one request at a time, so motion reuse, MAX_REUSED_FRAMES and DETECT_EVERY_N count frames.
+    Returns a list of (observation, timing_ms, error) aligned with frames.
+    """
+    frames, reduce, hint = job
+    outcomes = []
+    for data in frames:
+        outcome = analyze_frame_job((data, reduce, hint))
+        if outcome[0] is not None:
+            # A frame that failed leaves the session state untouched, as in apply_observation's caller
+            hint = next_hint(outcome[0])
+        outcomes.append(outcome)
+    return outcomes
+
+def analyze_frame_job(job):
+    """
+    Decode and analyze one frame.
+    job is (data, reduce, hint), where data is raw bytes or a base64 data URL and hint comes from tracking_hint.
+    Returns (observation, timing_ms, error).
+    """
+    data, reduce, hint = job
+    timing = {}
+    try:
+        started = time.perf_counter()
+        if not data:
+            raise ValueError("No image data provided")
+        gray = decode_data_url(data) if isinstance(data, str) else decode_frame_bytes(data, reduce)
+        decoded = time.perf_counter()
+        observation = analyze_gray(gray, hint)
+        timing["decode_ms"] = round((decoded - started) * 1000, 3)
+        timing["analyze_ms"] = _elapsed_ms(decoded)
+        timing.update(observation["timing_ms"])
+        return observation, timing, None
     except Exception as e:
-        logger.error(f"Error processing image: {e}")
-        return {
-            "face_detected": False,
-            "looking_at_screen": False,
-            "warnings": warnings,
-            "max_warnings": max_warnings,
-            "violation_detected": False,
-            "look_direction": "Unknown",
-            "eyes_closed": False,
-            "blink_duration": 0,
-            "long_blink_count": long_blink_count,
-            "head_pose": [0, 0, 0],
-            "ear": 0,
-            "error": str(e)
-        }
+        return None, timing, str(e)
+
+def session_id_from_request(data=None):
+    data = data if data is not None else (request.get_json(silent=True) or {})
+    return str(data.get('session_id') or request.args.get('session_id') or DEFAULT_SESSION_ID)
 
 @app.route('/start-exam', methods=['POST'])
 def start_exam():
-    global warnings, long_blink_count
-    warnings = 0
-    long_blink_count = 0
-    logger.info("Exam session started")
-    return jsonify({"status": "Exam started"}), 200
+    # Clients that send no session_id share the legacy single-exam session
+    session_id = session_id_from_request()
+    sessions.start(session_id)
+    logger.info(f"Exam session started: {session_id} ({len(sessions)} active)")
+    return jsonify({"status": "Exam started", "session_id": session_id}), 200
 
 @app.route('/process-frame', methods=['POST'])
 def process_frame():
@@ -182,19 +568,146 @@ def process_frame():
             logger.error("No image data provided")
             return jsonify({"error": "No image data provided"}), 400
         logger.debug("Received frame for processing")
-        proctor_data = process_image(data['image'])
+        session = sessions.get(session_id_from_request(data))
+        proctor_data = process_image(data['image'], session)
         return jsonify(proctor_data), 200
     except Exception as e:
         logger.error(f"Error in process_frame: {e}")
         return jsonify({"error": str(e)}), 500
 
+@app.route('/process-frame/raw', methods=['POST'])
+def process_frame_raw():
+    """
+    Accepts a frame as raw JPEG/WebP bytes (or a multipart 'frame' file) instead of a base64 data URL.
+    Query parameters: session_id, and reduce=1|2|4|8 to decode at a reduced resolution.
+    """
+    try:
+        if 'frame' in request.files:
+            buffer = request.files['frame'].read()
+        else:
+            buffer = request.get_data(cache=False)
+        if not buffer:
+            logger.error("No image data provided")
+            return jsonify({"error": "No image data provided"}), 400
+        reduce = request.args.get('reduce', 1, type=int)
+        if reduce not in DECODE_FLAGS:
+            return jsonify({"error": f"reduce must be one of {sorted(DECODE_FLAGS)}"}), 400
+
+        session = sessions.get(request.args.get('session_id') or request.form.get('session_id') or DEFAULT_SESSION_ID)
+        try:
+            started = time.perf_counter()
+            gray = decode_frame_bytes(buffer, reduce)
+            pipeline_stats.record_stage("decode_ms", _elapsed_ms(started))
+        except Exception as e:
+            logger.error(f"Error decoding image: {e}")
+            return jsonify(error_result(session, e)), 200
+        return jsonify(process_gray(gray, session)), 200
+    except Exception as e:
+        logger.error(f"Error in process_frame_raw: {e}")
+        return jsonify({"error": str(e)}), 500
+
+def frame_time(timestamp, now):
+    """
+    Server-side time for a batch frame.
+
+    :param timestamp: Client capture time in epoch seconds (int or float), or None for the server time.
+    :param now: Server time the batch was received.
+    :return: The timestamp clamped to [now - MAX_FRAME_AGE, now].
+    :raises ValueError: If the timestamp is not a finite number.
+    """
+    if timestamp is None:
+        return now
+    if isinstance(timestamp, bool) or not isinstance(timestamp, (int, float)) or not isfinite(timestamp):
+        raise ValueError(f"Frame timestamp must be a number of epoch seconds, got {timestamp!r}")
+    return min(now, max(now - MAX_FRAME_AGE, float(timestamp)))
+
+@app.route('/process-frames', methods=['POST'])
+def process_frames():
+    """
+    Batch variant of /process-frame. Accepts JSON {"session_id", "frames": [{"image", "session_id", "timestamp"}]}
+    (timestamp: optional capture time in epoch seconds, see frame_time) or multipart 'frames' files (with a form/query session_id and optional ?reduce=). Frames may come from
+    several sessions; sessions are analyzed in parallel, each session's frames in order in one worker task,
+    and results are applied to each session in the order given.
+    """
+    try:
+        batch_started = time.perf_counter()
+        reduce = request.args.get('reduce', 1, type=int)
+        frames = []
+        if request.files:
+            session_id = request.form.get('session_id') or request.args.get('session_id') or DEFAULT_SESSION_ID
+            for file in request.files.getlist('frames'):
+                frames.append((session_id, file.read(), None))
+        else:
+            data = request.get_json(silent=True) or {}
+            default_session_id = data.get('session_id') or request.args.get('session_id') or DEFAULT_SESSION_ID
+            for item in data.get('frames', []):
+                frames.append((str(item.get('session_id') or default_session_id), item.get('image'), item.get('timestamp')))
+
+        if not frames:
+            logger.error("No frames provided")
+            return jsonify({"error": "No frames provided"}), 400
+        if len(frames) > MAX_BATCH_FRAMES:
+            return jsonify({"error": f"At most {MAX_BATCH_FRAMES} frames per batch"}), 413
+        if reduce not in DECODE_FLAGS:
+            return jsonify({"error": f"reduce must be one of {sorted(DECODE_FLAGS)}"}), 400
+
+        # Validate every timestamp before any session is touched, so a bad frame leaves the batch unapplied
+        now = time.time()
+        try:
+            frames = [(session_id, image, frame_time(timestamp, now)) for session_id, image, timestamp in frames]
+        except ValueError as e:
+            return jsonify({"error": str(e)}), 400
+
+        batch_sessions = [sessions.get(session_id) for session_id, _, _ in frames]
+        # Frames of one session depend on each other through the tracking hint, so they form a single task
+        groups = {}
+        for i, (session_id, _, _) in enumerate(frames):
+            groups.setdefault(session_id, []).append(i)
+        jobs = [
+            ([frames[i][1] for i in indexes], reduce, tracking_hint(batch_sessions[indexes[0]]))
+            for indexes in groups.values()
+        ]
+        outcomes = [None] * len(frames)
+        for indexes, group_outcomes in zip(groups.values(), get_frame_pool().map(analyze_session_frames, jobs)):
+            for i, outcome in zip(indexes, group_outcomes):
+                outcomes[i] = outcome
+
+        results = []
+        for (session_id, _, timestamp), session, (observation, timing, error) in zip(frames, batch_sessions, outcomes):
+            with session.lock:
+                if error is not None:
+                    result = error_result(session, error)
+                else:
+                    pipeline_stats.record_stage("decode_ms", timing["decode_ms"])
+                    result = apply_observation(session, observation, timestamp)
+            result["session_id"] = session_id
+            result["timing_ms"] = timing
+            results.append(result)
+
+        batch_ms = round((time.perf_counter() - batch_started) * 1000, 3)
+        logger.debug(f"Processed batch of {len(frames)} frames in {batch_ms} ms")
+        return jsonify({"results": results, "batch_ms": batch_ms}), 200
+    except Exception as e:
+        logger.error(f"Error in process_frames: {e}")
+        return jsonify({"error": str(e)}), 500
+
 @app.route('/end-exam', methods=['POST'])
 def end_exam():
-    global warnings, long_blink_count
-    warnings = 0
-    long_blink_count = 0
-    logger.info("Exam session ended")
-    return jsonify({"status": "Exam ended"}), 200
+    session_id = session_id_from_request()
+    session = sessions.close(session_id)
+    logger.info(f"Exam session ended: {session_id} ({len(sessions)} active)")
+    return jsonify({
+        "status": "Exam ended",
+        "session_id": session_id,
+        "warnings": session.warnings if session else 0,
+        "long_blink_count": session.long_blink_count if session else 0
+    }), 200
+
+@app.route('/pipeline-stats', methods=['GET'])
+def get_pipeline_stats():
+    stats = pipeline_stats.snapshot()
+    stats["active_sessions"] = len(sessions)
+    return jsonify(stats), 200
 
 @app.route('/toggle_alerts', methods=['GET'])
 def toggle_alerts():
@@ -204,6 +717,55 @@ def toggle_alerts():
     logger.info(f"Alerts {status}")
     return jsonify({"status": f"Alerts {status}"}), 200
 
+# Fields whose changes are pushed over the WebSocket channel
+STREAM_EVENT_FIELDS = ("looking_at_screen", "warnings", "violation_detected")
+
+def decode_socket_message(message, reduce):
+    if isinstance(message, (bytes, bytearray)):
+        return decode_frame_bytes(message, reduce)
+    if message.startswith('data:'):
+        return decode_data_url(message)
+    return decode_data_url(json.loads(message)['image'])
+
+if Sock is not None:
+    sock = Sock(app)
+
+    @sock.route('/ws/proctor')
+    def proctor_socket(ws):
+        """
+        Persistent proctoring channel. Clients send binary JPEG/WebP frames (or data URLs / {"image": ...} text),
+        and receive a compact JSON event only when looking_at_screen, warnings or violation_detected change.
+        Query parameters: session_id, and reduce=1|2|4|8 for reduced-resolution decoding.
+        """
+        session_id = request.args.get('session_id') or DEFAULT_SESSION_ID
+        reduce = request.args.get('reduce', 1, type=int)
+        if reduce not in DECODE_FLAGS:
+            reduce = 1
+        session = sessions.get(session_id)
+        logger.info(f"Proctoring stream opened for session {session_id}")
+        last_event = None
+        try:
+            while True:
+                message = ws.receive()
+                if message is None:
+                    break
+                try:
+                    gray = decode_socket_message(message, reduce)
+                except Exception as e:
+                    ws.send(json.dumps({"error": f"Failed to decode frame: {e}"}, separators=(',', ':')))
+                    continue
+                session.last_seen = time.time()
+                result = process_gray(gray, session)
+                event = {field: result[field] for field in STREAM_EVENT_FIELDS}
+                if event != last_event:
+                    ws.send(json.dumps(event, separators=(',', ':')))
+                    last_event = event
+        except Exception as e:
+            logger.info(f"Proctoring stream for session {session_id} closed: {e}")
+        logger.info(f"Proctoring stream ended for session {session_id}")
+else:
+    logger.warning("flask-sock is not installed; /ws/proctor streaming channel is disabled")
+
 if __name__ == '__main__':
     logger.info("Starting Flask server on port 4000")
     app.run(host='0.0.0.0', port=4000, debug=True, use_reloader=False)
\ No newline at end of file
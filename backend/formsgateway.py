@@ -0,0 +1,274 @@
+import time
+import queue
+import random
+import threading
+from contextlib import contextmanager
+from concurrent.futures import ThreadPoolExecutor
+from grading import question_id_map_from_form, question_id_map_from_replies, index_form
+from lrucache import LRUCache
+from applog import get_logger
+
+log = get_logger("formsgateway")
+
+# HTTP statuses worth retrying: quota (429) and transient server errors
+RETRYABLE_STATUSES = {429, 500, 502, 503, 504}
+# 403s that are really quota errors
+RATE_LIMIT_REASONS = ("rateLimitExceeded", "userRateLimitExceeded", "RATE_LIMIT_EXCEEDED")
+
+
+def is_retryable(error):
+    """
+    Whether a Forms API error is a quota or transient failure. Works with googleapiclient's HttpError
+    (status in error.resp.status, body in error.content) and with fakes that mimic it.
+    """
+    if isinstance(error, (ConnectionError, TimeoutError)):
+        return True
+    status = getattr(getattr(error, "resp", None), "status", None)
+    try:
+        status = int(status)
+    except (TypeError, ValueError):
+        return False
+    if status in RETRYABLE_STATUSES:
+        return True
+    if status == 403:
+        content = getattr(error, "content", b"") or b""
+        if isinstance(content, bytes):
+            content = content.decode("utf-8", "replace")
+        return any(reason in content for reason in RATE_LIMIT_REASONS)
+    return False
+
+
+def build_question_requests(questions):
+    """Build the batchUpdate createItem requests for a list of multiple-choice quiz questions."""
+    return [{
+        "createItem": {
+            "item": {
+                "title": question["question"],
+                "questionItem": {
+                    "question": {
+                        "required": True,
+                        "choiceQuestion": {
+                            "type": "RADIO",
+                            "options": [{"value": option} for option in question["options"]],
+                            "shuffle": False
+                        }
+                    }
+                }
+            },
+            "location": {"index": 0}
+        }
+    } for question in questions]
+
+
+class FormsGateway:
+    """
+    Thread-safe access to the Google Forms API.
+    googleapiclient resources (and their httplib2 connections) must not be used by two threads at once, so
+    clients live in a small pool: a thread borrows one for the duration of a request and returns it, and
+    clients are built from service_factory only while the pool is below pool_size. Short-lived request
+    threads therefore reuse warm clients instead of building one each. Every request is retried on quota and
+    transient errors with exponential backoff and jitter. Pass a service_factory that returns a local fake to
+    drive the gateway without network access.
+    """
+
+    def __init__(self, service_factory, num_retries=5, backoff_base=1.0, max_backoff=32.0, max_workers=4,
+                 pool_size=None, sleep=time.sleep):
+        """
+        Initialize the FormsGateway.
+
+        :param service_factory: Zero-argument callable returning a Forms API resource (or a compatible fake).
+        :param num_retries: Retries after the first attempt for retryable errors.
+        :param backoff_base: Backoff before the first retry, in seconds; doubled on each further retry.
+        :param max_backoff: Upper bound for a single backoff, in seconds.
+        :param max_workers: Threads used by create_forms.
+        :param pool_size: Maximum number of clients; defaults to max_workers. Borrowers wait when all are in use.
+        :param sleep: Sleep function (replaceable in tests).
+        """
+        self.service_factory = service_factory
+        self.num_retries = num_retries
+        self.backoff_base = backoff_base
+        self.max_backoff = max_backoff
+        self.max_workers = max_workers
+        self.sleep = sleep
+        self.pool_size = max(1, pool_size or max_workers)
+        self.retries = 0
+        self.clients_built = 0
+        self._idle = queue.LifoQueue()
+        self._lock = threading.Lock()
+
+    def _borrow(self):
+        try:
+            return self._idle.get_nowait()
+        except queue.Empty:
+            pass
+        with self._lock:
+            build = self.clients_built < self.pool_size
+            if build:
+                self.clients_built += 1
+        if not build:
+            return self._idle.get()
+        try:
+            return self.service_factory()
+        except Exception:
+            with self._lock:
+                self.clients_built -= 1
+            raise
+
+    @contextmanager
+    def client(self):
+        """Borrow a Forms API client from the pool for the duration of the with block."""
+        service = self._borrow()
+        try:
+            yield service
+        finally:
+            self._idle.put(service)
+
+    def request(self, build):
+        """
+        Build and execute one API request on a borrowed client, retrying quota and transient errors.
+
+        :param build: Callable taking the client's forms() resource and returning a prepared request,
+                      e.g. lambda forms: forms.get(formId=form_id).
+        :return: The decoded API response.
+        """
+        with self.client() as service:
+            return self.execute(build(service.forms()))
+
+    def execute(self, request):
+        """
+        Execute a prepared API request, retrying quota and transient errors.
+
+        The request stays bound to the client it was built from, so prefer request(), which holds that client.
+
+        :param request: Object with an execute() method (googleapiclient HttpRequest or a fake).
+        :return: The decoded API response.
+        """
+        attempt = 0
+        while True:
+            try:
+                return request.execute()
+            except Exception as e:
+                if attempt >= self.num_retries or not is_retryable(e):
+                    raise
+                delay = min(self.max_backoff, self.backoff_base * (2 ** attempt)) * random.uniform(0.5, 1.0)
+                attempt += 1
+                with self._lock:
+                    self.retries += 1
+                log.warning("forms_api_retry", error=str(e), attempt=attempt, max_retries=self.num_retries, delay=round(delay, 2))
+                self.sleep(delay)
+
+    def get_form(self, form_id):
+        return self.request(lambda forms: forms.get(formId=form_id))
+
+    def create_form(self, title, questions):
+        """
+        Create a form with one multiple-choice item per question.
+
+        :param title: Form title.
+        :param questions: Quiz questions (dicts with "question" and "options").
+        :return: Dict with form_id, google_form_link and question_id_map (from the batchUpdate replies).
+        """
+        form = self.request(lambda forms: forms.create(body={"info": {"title": title}}))
+        form_id = form["formId"]
+        log.info("form_created", form_id=form_id)
+        batch_response = self.request(lambda forms: forms.batchUpdate(
+            formId=form_id, body={"requests": build_question_requests(questions)}
+        ))
+        return {
+            "form_id": form_id,
+            "google_form_link": f"https://docs.google.com/forms/d/{form_id}/viewform",
+            "question_id_map": question_id_map_from_replies(questions, batch_response)
+        }
+
+    def create_forms(self, jobs):
+        """
+        Create several forms concurrently, each request on a client borrowed from the pool.
+
+        :param jobs: List of (title, questions) tuples.
+        :return: List aligned with jobs; each item is create_form's result or the exception it raised.
+        """
+        def run(job):
+            try:
+                return self.create_form(*job)
+            except Exception as e:
+                return e
+
+        if len(jobs) <= 1:
+            return [run(job) for job in jobs]
+        with ThreadPoolExecutor(max_workers=min(self.max_workers, len(jobs))) as executor:
+            return list(executor.map(run, jobs))
+
+
+class FormStructureStore:
+    """
+    Per-form scoring tables: the questionId of each question and the questionId -> correct answer key.
+    Tables are written to the form_responses document when the form is created; forms stored before that
+    are fetched once through the gateway and persisted. Resolved tables are also kept in an in-process LRU.
+    """
+
+    def __init__(self, collection, gateway, max_entries=256):
+        """
+        Initialize the FormStructureStore.
+
+        :param collection: The form_responses collection.
+        :param gateway: FormsGateway used for forms that have no stored table, or a zero-argument callable
+                        returning one, resolved only when a form actually has to be fetched.
+        :param max_entries: Number of forms kept in memory.
+        """
+        self.collection = collection
+        self.gateway = gateway
+        self._cache = LRUCache(max_entries=max_entries)
+
+    def question_ids(self, form_doc):
+        """Return the questionId of each question of a stored form (entries may be None)."""
+        return self.scoring_tables(form_doc)[0]
+
+    def scoring_tables(self, form_doc):
+        """
+        Return (question_ids, answer_key) for a stored form: question_ids[i] is the questionId of questions[i]
+        (or None) and answer_key maps questionId -> correct answer.
+
+        :param form_doc: form_responses document with at least _id, form_id and questions.
+        """
+        questions = form_doc.get("questions", [])
+        form_id = form_doc.get("form_id")
+        cached = self._cache.get(form_id) if form_id else None
+        if cached is not None and len(cached[0]) == len(questions):
+            return cached
+
+        question_ids = form_doc.get("question_ids")
+        if question_ids is not None and len(question_ids) == len(questions):
+            answer_key = form_doc.get("answer_key")
+            if answer_key is None:
+                answer_key = {
+                    question_id: question["correct_answer"]
+                    for question, question_id in zip(questions, question_ids) if question_id
+                }
+            if form_id:
+                self._cache.set(form_id, (question_ids, answer_key))
+            return question_ids, answer_key
+
+        question_id_map = {}
+        if form_id and self.gateway is not None:
+            try:
+                log.info("fetching_form_structure", form_id=form_id)
+                gateway = self.gateway if isinstance(self.gateway, FormsGateway) else self.gateway()
+                question_id_map = question_id_map_from_form(gateway.get_form(form_id))
+            except Exception as e:
+                log.warning("form_structure_fetch_failed", form_id=form_id, error=str(e))
+
+        question_ids, answer_key = index_form(questions, question_id_map)
+        if question_id_map:
+            self.collection.update_one(
+                {"_id": form_doc["_id"]},
+                {"$set": {"question_id_map": question_id_map, "question_ids": question_ids, "answer_key": answer_key}}
+            )
+            self._cache.set(form_id, (question_ids, answer_key))
+            log.info("question_index_stored", form_id=form_id)
+        return question_ids, answer_key
+
+    def invalidate(self, form_id):
+        self._cache.delete(form_id)
+
+    def stats(self):
+        return self._cache.stats()
@@ -0,0 +1,137 @@
+import numpy as np
+
+
+def normalize_text(text):
+    """Normalize question text for lookups: collapse whitespace and ignore case."""
+    return " ".join(str(text).split()).casefold()
+
+
+def question_id_map_from_form(form_data):
+    """
+    Build a questionId -> question title map from a Forms API form resource (forms().get).
+
+    :param form_data: Form resource dict with an "items" list.
+    :return: Dict mapping questionId to the item title.
+    """
+    question_id_map = {}
+    for item in form_data.get("items", []):
+        question_text = item.get("title", "")
+        question_id = item.get("questionItem", {}).get("question", {}).get("questionId", "")
+        if question_text and question_id:
+            question_id_map[question_id] = question_text
+    return question_id_map
+
+
+def question_id_map_from_replies(questions, batch_update_response):
+    """
+    Build a questionId -> question text map from the replies of the batchUpdate that created the items.
+    Replies come back in request order, so reply i belongs to questions[i].
+
+    :param questions: Quiz questions in the order their createItem requests were sent.
+    :param batch_update_response: Response of forms().batchUpdate(...).execute().
+    :return: Dict mapping questionId to question text.
+    """
+    question_id_map = {}
+    for question, reply in zip(questions, batch_update_response.get("replies", [])):
+        question_ids = reply.get("createItem", {}).get("questionId", [])
+        if question_ids:
+            question_id_map[question_ids[0]] = question["question"]
+    return question_id_map
+
+
+def index_form(questions, question_id_map):
+    """
+    Precompute the per-form lookup tables used for scoring.
+
+    :param questions: Quiz questions (dicts with "question" and "correct_answer").
+    :param question_id_map: questionId -> question text.
+    :return: Tuple (question_ids, answer_key): question_ids[i] is the questionId of questions[i] (or None),
+             and answer_key maps questionId -> correct answer.
+    """
+    text_to_id = {normalize_text(text): question_id for question_id, text in question_id_map.items()}
+    question_ids = []
+    answer_key = {}
+    for question in questions:
+        question_id = text_to_id.get(normalize_text(question["question"]))
+        question_ids.append(question_id)
+        if question_id:
+            answer_key[question_id] = question["correct_answer"]
+    return question_ids, answer_key
+
+
+def key_row(questions, question_ids, answer_key):
+    """
+    Return the correct answers aligned with the questions, looked up in the stored answer key by questionId.
+    Questions that could not be tied to a questionId have no key entry and keep their own correct_answer.
+    """
+    return [
+        answer_key[question_id] if question_id in answer_key else question_data["correct_answer"]
+        for question_data, question_id in zip(questions, question_ids)
+    ]
+
+
+def score_response(questions, question_ids, answer_key, user_answers):
+    """
+    Score one response in a single pass over the questions.
+
+    :param questions: Quiz questions (dicts with "question"; "correct_answer" only for questions without a questionId).
+    :param question_ids: questionId per question, as returned by index_form (entries may be None).
+    :param answer_key: questionId -> correct answer, as returned by index_form.
+    :param user_answers: questionId -> answer given by the user.
+    :return: Tuple (score, question_results).
+    """
+    row = answer_row(questions, question_ids, user_answers)
+    answers = key_row(questions, question_ids, answer_key)
+    question_results = [
+        {
+            "question": question_data["question"],
+            "correct_answer": correct_answer,
+            "user_answer": user_answer,
+            "is_correct": user_answer == correct_answer
+        }
+        for question_data, user_answer, correct_answer in zip(questions, row, answers)
+    ]
+    score = sum(1 for result in question_results if result["is_correct"])
+    return score, question_results
+
+
+def answer_row(questions, question_ids, user_answers):
+    """Return the stripped answers of one response, aligned with the questions."""
+    # Only needed when a question could not be tied to a questionId
+    answers_by_text = None
+    row = []
+    for question_data, question_id in zip(questions, question_ids):
+        if question_id:
+            user_answer = user_answers.get(question_id, "")
+        else:
+            if answers_by_text is None:
+                answers_by_text = {normalize_text(key): value for key, value in user_answers.items()}
+            user_answer = answers_by_text.get(normalize_text(question_data["question"]), "")
+        row.append(user_answer.strip())
+    return row
+
+
+def grade_matrix(rows, answers):
+    """
+    Grade many responses at once by comparing an answer matrix against the answer key.
+
+    :param rows: List of answer rows (see answer_row), one per response.
+    :param answers: Correct answer per question (see key_row).
+    :return: Tuple (correct, scores): a boolean matrix of shape (responses, questions) and per-response scores.
+    """
+    key = np.array(answers, dtype=object)
+    matrix = np.array(rows, dtype=object).reshape(len(rows), len(answers))
+    correct = matrix == key
+    return correct, correct.sum(axis=1)
+
+
+def question_results_from_row(questions, answers, row, correct_row):
+    return [
+        {
+            "question": question_data["question"],
+            "correct_answer": correct_answer,
+            "user_answer": user_answer,
+            "is_correct": bool(is_correct)
+        }
+        for question_data, correct_answer, user_answer, is_correct in zip(questions, answers, row, correct_row)
+    ]
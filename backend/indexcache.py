@@ -0,0 +1,209 @@
+import os
+import json
+import time
+import shutil
+import hashlib
+import threading
+from langchain.vectorstores import FAISS
+from applog import get_logger
+
+log = get_logger("indexcache")
+
+
+def _owned(path):
+    """Whether path (not following symlinks) belongs to the current user; always True off POSIX."""
+    if not hasattr(os, "getuid"):
+        return True
+    return os.lstat(path).st_uid == os.getuid()
+
+
+def _process_alive(pid):
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except OSError:
+        return True
+    return True
+
+
+class IndexCache:
+    """
+    A persistent, content-addressed cache of FAISS vector stores.
+    Entries are keyed by a hash of the source bytes plus the splitter and embedding settings,
+    so a repeat upload of the same document skips extraction, chunking and embedding.
+    Least recently used entries are evicted once the cache grows past its size budget.
+    Loading an entry unpickles it, so the cache directory must be private to the server's user: it is
+    created with mode 0700, and entries that are symlinks or not owned by that user are never loaded.
+    """
+
+    INDEX_DIR = "index"
+    CHUNKS_FILE = "chunks.json"
+
+    def __init__(self, cache_dir, max_bytes=1024 * 1024 * 1024):
+        """
+        Initialize the IndexCache.
+
+        :param cache_dir: Directory where cached indexes are stored (created with mode 0700 if missing).
+        :param max_bytes: Total size budget for all cached entries, in bytes.
+        :raises PermissionError: If cache_dir belongs to another user.
+        """
+        self.cache_dir = cache_dir
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        self._entry_locks = {}
+        os.makedirs(self.cache_dir, mode=0o700, exist_ok=True)
+        if not _owned(self.cache_dir):
+            raise PermissionError(f"Index cache directory {self.cache_dir} is not owned by the current user")
+        # makedirs leaves an existing directory's mode alone; chmod fails for a symlink to someone else's directory
+        os.chmod(self.cache_dir, 0o700)
+        self._remove_stale_tmp_dirs()
+
+    @staticmethod
+    def make_key(source, **settings):
+        """
+        Build a cache key from the file contents and the settings that affect the index.
+
+        :param source: Path to the source document, or a binary file-like object holding it.
+        :param settings: Splitter and embedding settings (e.g. chunk_size, chunk_overlap, embedding_model).
+        :return: Hex digest identifying the document/settings combination.
+        """
+        digest = hashlib.sha256()
+        if hasattr(source, 'read'):
+            source.seek(0)
+            for block in iter(lambda: source.read(1024 * 1024), b''):
+                digest.update(block)
+            source.seek(0)
+        else:
+            with open(source, 'rb') as file:
+                for block in iter(lambda: file.read(1024 * 1024), b''):
+                    digest.update(block)
+        digest.update(json.dumps(settings, sort_keys=True).encode('utf-8'))
+        return digest.hexdigest()
+
+    def _entry_dir(self, key):
+        return os.path.join(self.cache_dir, key)
+
+    def _entry_lock(self, key):
+        with self._lock:
+            return self._entry_locks.setdefault(key, threading.Lock())
+
+    def _remove_stale_tmp_dirs(self):
+        # Leftovers of store() calls interrupted by a crash; a live process's pid means it may still be writing
+        for name in os.listdir(self.cache_dir):
+            if '.tmp-' not in name:
+                continue
+            try:
+                pid = int(name.split('.tmp-', 1)[1].split('-', 1)[0])
+            except ValueError:
+                pid = None
+            if pid is not None and pid != os.getpid() and _process_alive(pid):
+                continue
+            shutil.rmtree(os.path.join(self.cache_dir, name), ignore_errors=True)
+            log.info("index_cache_tmp_removed", name=name)
+
+    @staticmethod
+    def _trusted(entry_dir):
+        """Whether every path of an entry is owned by us and none of them is a symlink."""
+        for root, dirs, files in os.walk(entry_dir):
+            for path in [root] + [os.path.join(root, name) for name in dirs + files]:
+                if os.path.islink(path) or not _owned(path):
+                    return False
+        return True
+
+    def load(self, key, embeddings):
+        """
+        Load a cached FAISS store and its chunk texts.
+
+        :param key: Cache key returned by make_key.
+        :param embeddings: Embeddings instance used for querying the loaded store.
+        :return: Tuple of (vectorstore, chunks), or None on a cache miss or unreadable entry.
+        """
+        entry_dir = self._entry_dir(key)
+        if not os.path.isdir(entry_dir):
+            return None
+        # Held while loading so _evict cannot remove the entry underneath us
+        with self._entry_lock(key):
+            return self._load_entry(key, entry_dir, embeddings)
+
+    def _load_entry(self, key, entry_dir, embeddings):
+        if not os.path.isdir(entry_dir):
+            return None
+        if not self._trusted(entry_dir):
+            log.warning("index_cache_entry_untrusted", key=key)
+            return None
+        try:
+            vectorstore = FAISS.load_local(
+                os.path.join(entry_dir, self.INDEX_DIR),
+                embeddings,
+                allow_dangerous_deserialization=True
+            )
+            with open(os.path.join(entry_dir, self.CHUNKS_FILE), 'r', encoding='utf-8') as file:
+                chunks = json.load(file)
+            # Touch the entry so eviction sees it as recently used
+            now = time.time()
+            os.utime(entry_dir, (now, now))
+            return vectorstore, chunks
+        except Exception as e:
+            log.warning("index_cache_entry_unreadable", key=key, error=str(e))
+            shutil.rmtree(entry_dir, ignore_errors=True)
+            return None
+
+    def store(self, key, vectorstore, chunks):
+        """
+        Save a FAISS store and its chunk texts, then evict old entries if over budget.
+
+        :param key: Cache key returned by make_key.
+        :param vectorstore: FAISS vector store to persist.
+        :param chunks: List of chunk texts the store was built from.
+        """
+        entry_dir = self._entry_dir(key)
+        tmp_dir = f"{entry_dir}.tmp-{os.getpid()}-{threading.get_ident()}"
+        try:
+            vectorstore.save_local(os.path.join(tmp_dir, self.INDEX_DIR))
+            with open(os.path.join(tmp_dir, self.CHUNKS_FILE), 'w', encoding='utf-8') as file:
+                json.dump(chunks, file)
+            with self._lock:
+                if os.path.isdir(entry_dir):
+                    shutil.rmtree(tmp_dir, ignore_errors=True)
+                else:
+                    os.replace(tmp_dir, entry_dir)
+                self._evict()
+        except Exception as e:
+            log.warning("index_cache_store_failed", key=key, error=str(e))
+            shutil.rmtree(tmp_dir, ignore_errors=True)
+
+    @staticmethod
+    def _dir_size(path):
+        total = 0
+        for root, _, files in os.walk(path):
+            for name in files:
+                try:
+                    total += os.path.getsize(os.path.join(root, name))
+                except OSError:
+                    pass
+        return total
+
+    def _evict(self):
+        # Called with self._lock held
+        entries = []
+        for name in os.listdir(self.cache_dir):
+            path = os.path.join(self.cache_dir, name)
+            if os.path.isdir(path) and '.tmp-' not in name:
+                entries.append((os.path.getmtime(path), self._dir_size(path), name))
+
+        total = sum(size for _, size, _ in entries)
+        for _, size, key in sorted(entries):
+            if total <= self.max_bytes:
+                break
+            entry_lock = self._entry_locks.setdefault(key, threading.Lock())
+            # An entry being loaded is in use right now, so it is not the one to evict
+            if not entry_lock.acquire(blocking=False):
+                continue
+            try:
+                shutil.rmtree(self._entry_dir(key), ignore_errors=True)
+                del self._entry_locks[key]
+            finally:
+                entry_lock.release()
+            total -= size
+            log.info("index_cache_evicted", key=key)
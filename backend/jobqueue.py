@@ -0,0 +1,208 @@
+import time
+import uuid
+import datetime
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from applog import get_logger
+
+log = get_logger("jobqueue")
+
+
+class QueueFullError(Exception):
+    """Raised when a job is submitted while the queue is at capacity."""
+
+
+class MemoryJobStore:
+    """
+    Job state kept in this process. A status poll answered by another worker process will not find the job,
+    so use it only when the app runs as a single process.
+    """
+
+    def __init__(self):
+        self._jobs = {}
+        self._lock = threading.Lock()
+
+    def create(self, job):
+        with self._lock:
+            self._jobs[job["job_id"]] = dict(job, stages=list(job["stages"]))
+
+    def update(self, job_id, fields, stage=None):
+        with self._lock:
+            job = self._jobs.get(job_id)
+            if job is None:
+                return
+            job.update(fields)
+            if stage is not None:
+                job["stages"].append(stage)
+
+    def get(self, job_id):
+        with self._lock:
+            job = self._jobs.get(job_id)
+            if job is None:
+                return None
+            return dict(job, stages=list(job["stages"]))
+
+    def delete(self, job_id):
+        with self._lock:
+            self._jobs.pop(job_id, None)
+
+    def purge(self, cutoff):
+        with self._lock:
+            expired = [
+                job_id for job_id, job in self._jobs.items()
+                if job["status"] in ("completed", "failed") and job["updated_at"] < cutoff
+            ]
+            for job_id in expired:
+                del self._jobs[job_id]
+
+
+class MongoJobStore:
+    """
+    Job state in a MongoDB collection, so a status poll can be answered by any worker process, not only the
+    one running the job. Finished jobs get an expires_at date that a TTL index (see storage.INDEX_PLAN) uses
+    to remove them after result_ttl seconds.
+    """
+
+    def __init__(self, collection, result_ttl=3600):
+        """
+        Initialize the MongoJobStore.
+
+        :param collection: The jobs collection, or a zero-argument callable returning it (resolved on first use).
+        :param result_ttl: Seconds a finished job is kept.
+        """
+        self._collection = collection
+        self.result_ttl = result_ttl
+
+    @property
+    def collection(self):
+        # pymongo collections are themselves callable, so tell them apart by their API
+        return self._collection if hasattr(self._collection, "insert_one") else self._collection()
+
+    def create(self, job):
+        self.collection.insert_one(dict(job, _id=job["job_id"]))
+
+    def update(self, job_id, fields, stage=None):
+        fields = dict(fields)
+        if fields.get("status") in ("completed", "failed"):
+            fields["expires_at"] = datetime.datetime.now(datetime.timezone.utc) + datetime.timedelta(seconds=self.result_ttl)
+        change = {"$set": fields}
+        if stage is not None:
+            change["$push"] = {"stages": stage}
+        self.collection.update_one({"_id": job_id}, change)
+
+    def get(self, job_id):
+        return self.collection.find_one({"_id": job_id}, {"_id": 0, "expires_at": 0})
+
+    def delete(self, job_id):
+        self.collection.delete_one({"_id": job_id})
+
+    def purge(self, cutoff):
+        # Expired jobs are removed by the TTL index
+        pass
+
+
+class JobQueue:
+    """
+    A bounded background job runner for long quiz-generation requests.
+    Jobs run on a fixed-size thread pool; at most max_pending jobs may be queued or running at once in this
+    process, after which submit raises QueueFullError so the API can apply backpressure.
+    Job state lives in a store (MemoryJobStore by default, MongoJobStore when several worker processes serve
+    the API) and finished jobs are kept for result_ttl seconds so clients can poll for them.
+    """
+
+    def __init__(self, max_workers=2, max_pending=16, result_ttl=3600, store=None):
+        """
+        Initialize the JobQueue.
+
+        :param max_workers: Number of jobs that run concurrently.
+        :param max_pending: Maximum number of queued plus running jobs.
+        :param result_ttl: Seconds a finished job is kept before it is purged.
+        :param store: Job state store (default: a MemoryJobStore).
+        """
+        self.max_pending = max_pending
+        self.result_ttl = result_ttl
+        self.store = store if store is not None else MemoryJobStore()
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="quiz-job")
+        self._slots = threading.BoundedSemaphore(max_pending)
+        self._active = 0
+        self._lock = threading.Lock()
+
+    def submit(self, func, *args, **kwargs):
+        """
+        Queue a job. The function is called with a `progress` keyword argument, a callable
+        that takes a stage name and records it as the job's current stage.
+
+        :param func: Function to run in the background; its return value becomes the job result.
+        :return: The new job id.
+        :raises QueueFullError: If max_pending jobs are already queued or running.
+        """
+        if not self._slots.acquire(blocking=False):
+            raise QueueFullError(f"Job queue is full ({self.max_pending} pending jobs)")
+
+        job_id = uuid.uuid4().hex
+        now = time.time()
+        try:
+            self.store.purge(now - self.result_ttl)
+            self.store.create({
+                "job_id": job_id,
+                "status": "queued",
+                "stage": None,
+                "stages": [],
+                "created_at": now,
+                "updated_at": now,
+                "result": None,
+                "error": None
+            })
+        except Exception:
+            self._slots.release()
+            raise
+        with self._lock:
+            self._active += 1
+
+        def progress(stage):
+            self._update(job_id, stage=stage, stage_entry={"stage": stage, "at": time.time()})
+
+        def run():
+            try:
+                self._update(job_id, status="running")
+                result = func(*args, progress=progress, **kwargs)
+                self._update(job_id, status="completed", result=result)
+            except Exception as e:
+                log.exception("job_failed", job_id=job_id)
+                self._update(job_id, status="failed", error=str(e))
+            finally:
+                self._finish()
+
+        try:
+            self._executor.submit(run)
+        except Exception:
+            self._finish()
+            self.store.delete(job_id)
+            raise
+        return job_id
+
+    def _finish(self):
+        with self._lock:
+            self._active -= 1
+        self._slots.release()
+
+    def _update(self, job_id, stage_entry=None, **fields):
+        try:
+            self.store.update(job_id, dict(fields, updated_at=time.time()), stage=stage_entry)
+        except Exception as e:
+            # A lost progress update must not fail the job itself
+            log.warning("job_update_failed", job_id=job_id, error=str(e))
+
+    def get(self, job_id):
+        """
+        Return a snapshot of a job, or None if it is unknown or has been purged.
+
+        :param job_id: Id returned by submit.
+        :return: Dict with status, stage, stages, timestamps, result and error.
+        """
+        return self.store.get(job_id)
+
+    def depth(self):
+        """Return the number of jobs queued or running in this process."""
+        with self._lock:
+            return self._active
@@ -0,0 +1,74 @@
+import json
+from applog import get_logger
+
+log = get_logger("jsonstream")
+
+
+class JsonArrayStreamParser:
+    """
+    An incremental parser for a streamed top-level JSON array of objects.
+    Feed it text as the LLM produces tokens; it returns each array element as soon as its closing
+    brace arrives. Text before the opening bracket (e.g. a ```json fence) is ignored.
+    """
+
+    def __init__(self):
+        self._buffer = ""
+        self._pos = 0
+        self._depth = 0
+        self._in_string = False
+        self._escape = False
+        self._obj_start = None
+        self.done = False
+
+    def feed(self, text):
+        """
+        Consume the next piece of streamed text.
+
+        :param text: Newly received text.
+        :return: List of objects completed by this piece (possibly empty).
+        """
+        if self.done or not text:
+            return []
+        self._buffer += text
+        completed = []
+        buffer = self._buffer
+        i = self._pos
+        while i < len(buffer):
+            char = buffer[i]
+            if self._in_string:
+                if self._escape:
+                    self._escape = False
+                elif char == "\\":
+                    self._escape = True
+                elif char == '"':
+                    self._in_string = False
+            elif self._depth == 0:
+                if char == "[":
+                    self._depth = 1
+            elif char == '"':
+                self._in_string = True
+            elif char in "{[":
+                if self._depth == 1 and char == "{":
+                    self._obj_start = i
+                self._depth += 1
+            elif char in "}]":
+                self._depth -= 1
+                if self._depth == 1 and char == "}" and self._obj_start is not None:
+                    try:
+                        completed.append(json.loads(buffer[self._obj_start:i + 1]))
+                    except json.JSONDecodeError as e:
+                        log.warning("streamed_object_malformed", error=str(e))
+                    self._obj_start = None
+                elif self._depth == 0:
+                    self.done = True
+                    i += 1
+                    break
+            i += 1
+
+        # Drop text that can no longer be part of an element to keep the buffer small
+        keep_from = self._obj_start if self._obj_start is not None else i
+        self._buffer = buffer[keep_from:]
+        self._pos = i - keep_from
+        if self._obj_start is not None:
+            self._obj_start = 0
+        return completed
@@ -0,0 +1,108 @@
+import json
+import time
+import hashlib
+import threading
+from langchain_core.caches import BaseCache
+from langchain_core.load import dumps, loads
+from lrucache import LRUCache
+from applog import get_logger
+
+log = get_logger("llmcache")
+
+
+class TieredLLMCache(BaseCache):
+    """
+    A LangChain LLM response cache with an in-process LRU tier in front of an optional persistent tier.
+    Entries are keyed by a hash of the whitespace-normalized prompt and the model's parameter string, so
+    identical prompts are answered without calling the model. It stores raw model output before any parser
+    runs, so quiz generation is cached with questioncache.QuestionCache instead.
+    Works with any LangChain chat model, including fakes such as FakeListChatModel, via its `cache` argument.
+    """
+
+    def __init__(self, persistent=None, max_entries=512, ttl=None):
+        """
+        Initialize the TieredLLMCache.
+
+        :param persistent: Optional persistent store with get(key, ttl)/set/delete/clear (e.g. SQLiteResponseStore).
+        :param max_entries: Size of the in-process LRU tier.
+        :param ttl: Seconds a cached response stays valid, or None for no expiry. Expired rows are purged from
+                    a persistent store that supports purge(max_age) on the first write and then once per ttl.
+        """
+        super().__init__()
+        self.persistent = persistent
+        self.ttl = ttl
+        self.memory = LRUCache(max_entries=max_entries, ttl=ttl)
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        self._last_purge = None
+
+    @staticmethod
+    def make_key(prompt, llm_string):
+        """
+        Build a cache key from a prompt and the model's parameter string.
+
+        :param prompt: Serialized prompt passed to the model.
+        :param llm_string: String describing the model and its parameters.
+        :return: Hex digest used as the cache key.
+        """
+        normalized = " ".join(prompt.split())
+        return hashlib.sha256(f"{normalized}\0{llm_string}".encode("utf-8")).hexdigest()
+
+    def _count(self, hit):
+        with self._lock:
+            if hit:
+                self.hits += 1
+            else:
+                self.misses += 1
+
+    def lookup(self, prompt, llm_string):
+        key = self.make_key(prompt, llm_string)
+        generations = self.memory.get(key)
+        if generations is None and self.persistent is not None:
+            try:
+                stored = self.persistent.get(key, ttl=self.ttl)
+                if stored is not None:
+                    generations = [loads(item) for item in json.loads(stored)]
+                    self.memory.set(key, generations)
+            except Exception as e:
+                log.warning("llm_cache_read_failed", error=str(e))
+        self._count(generations is not None)
+        return generations
+
+    def update(self, prompt, llm_string, return_val):
+        key = self.make_key(prompt, llm_string)
+        self.memory.set(key, return_val)
+        if self.persistent is not None:
+            try:
+                self.persistent.set(key, json.dumps([dumps(generation) for generation in return_val]))
+                self._maybe_purge()
+            except Exception as e:
+                log.warning("llm_cache_write_failed", error=str(e))
+
+    def _maybe_purge(self):
+        # lookup() only drops expired rows it happens to read, so prompts never repeated would pile up
+        if not self.ttl or not hasattr(self.persistent, "purge"):
+            return
+        now = time.monotonic()
+        with self._lock:
+            if self._last_purge is not None and now - self._last_purge < self.ttl:
+                return
+            self._last_purge = now
+        self.persistent.purge(self.ttl)
+
+    def clear(self, **kwargs):
+        self.memory.clear()
+        if self.persistent is not None:
+            self.persistent.clear()
+
+    def stats(self):
+        """Return hit/miss counters for the cache as a whole."""
+        with self._lock:
+            total = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": round(self.hits / total, 4) if total else 0.0,
+                "memory_entries": len(self.memory)
+            }
@@ -0,0 +1,58 @@
+import time
+import threading
+from langchain_core.callbacks import BaseCallbackHandler
+
+
+class LLMMetricsCallbackHandler(BaseCallbackHandler):
+    """
+    Records per-call LLM latency, errors and token usage into metrics.py instruments.
+    Attach it through the model's `callbacks` argument so every call is covered, including the query
+    expansion calls made by the retrievers. Tokens come from the provider's llm_output token_usage, which
+    is absent for responses replayed from the LLM cache, so cached calls add latency samples but no tokens.
+    """
+
+    def __init__(self, model_name, tokens, latency, errors):
+        """
+        Initialize the LLMMetricsCallbackHandler.
+
+        :param model_name: Value of the "model" label.
+        :param tokens: Counter labelled (model, kind), kind being "prompt" or "completion".
+        :param latency: Histogram labelled (model).
+        :param errors: Counter labelled (model).
+        """
+        self.model_name = model_name
+        self.tokens = tokens
+        self.latency = latency
+        self.errors = errors
+        self._started = {}
+        self._lock = threading.Lock()
+
+    def _start(self, run_id):
+        with self._lock:
+            self._started[run_id] = time.perf_counter()
+
+    def _finish(self, run_id):
+        with self._lock:
+            started = self._started.pop(run_id, None)
+        if started is not None:
+            self.latency.observe(time.perf_counter() - started, model=self.model_name)
+
+    def on_llm_start(self, serialized, prompts, *, run_id, **kwargs):
+        self._start(run_id)
+
+    def on_chat_model_start(self, serialized, messages, *, run_id, **kwargs):
+        self._start(run_id)
+
+    def on_llm_end(self, response, *, run_id, **kwargs):
+        self._finish(run_id)
+        usage = (response.llm_output or {}).get("token_usage") or {}
+        prompt_tokens = usage.get("prompt_tokens") or 0
+        completion_tokens = usage.get("completion_tokens") or 0
+        if prompt_tokens:
+            self.tokens.inc(prompt_tokens, model=self.model_name, kind="prompt")
+        if completion_tokens:
+            self.tokens.inc(completion_tokens, model=self.model_name, kind="completion")
+
+    def on_llm_error(self, error, *, run_id, **kwargs):
+        self._finish(run_id)
+        self.errors.inc(model=self.model_name)
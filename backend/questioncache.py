@@ -0,0 +1,116 @@
+import json
+import time
+import hashlib
+import threading
+from lrucache import LRUCache
+from applog import get_logger
+
+log = get_logger("questioncache")
+
+
+def is_question_list(output):
+    """Whether a parsed generation output is a non-empty list of questions with options, i.e. worth caching."""
+    return (
+        isinstance(output, list) and bool(output)
+        and all(isinstance(question, dict) and question.get("question") and question.get("options") for question in output)
+    )
+
+
+class QuestionCache:
+    """
+    Parsed quiz-generation results keyed by the generation inputs, with an in-process LRU tier in front of an
+    optional persistent tier.
+    Unlike a model-level response cache, it is written after the output parser runs and only for valid question
+    lists, so a malformed model answer is never replayed. Callers retrying a failed generation skip the lookup.
+    """
+
+    def __init__(self, persistent=None, max_entries=512, ttl=None, namespace=""):
+        """
+        Initialize the QuestionCache.
+
+        :param persistent: Optional persistent store with get(key, ttl)/set/delete/clear (e.g. SQLiteResponseStore).
+        :param max_entries: Size of the in-process LRU tier.
+        :param ttl: Seconds a cached result stays valid, or None for no expiry. Expired rows are purged from
+                    a persistent store that supports purge(max_age) on the first write and then once per ttl.
+        :param namespace: Model and prompt fingerprint; results from another model or prompt never match.
+        """
+        self.persistent = persistent
+        self.ttl = ttl
+        self.namespace = namespace
+        self.memory = LRUCache(max_entries=max_entries, ttl=ttl)
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        self._last_purge = None
+
+    def make_key(self, content, difficulty, num_questions):
+        """
+        Build a cache key from the generation inputs.
+
+        :param content: Retrieved content the questions are generated from (whitespace-normalized).
+        :param difficulty: Quiz difficulty.
+        :param num_questions: Number of questions requested.
+        :return: Hex digest used as the cache key.
+        """
+        normalized = " ".join(content.split())
+        return hashlib.sha256(f"{self.namespace}\0{difficulty}\0{num_questions}\0{normalized}".encode("utf-8")).hexdigest()
+
+    def _count(self, hit):
+        with self._lock:
+            if hit:
+                self.hits += 1
+            else:
+                self.misses += 1
+
+    def get(self, key):
+        questions = self.memory.get(key)
+        if questions is None and self.persistent is not None:
+            try:
+                stored = self.persistent.get(key, ttl=self.ttl)
+                if stored is not None:
+                    questions = json.loads(stored)
+                    self.memory.set(key, questions)
+            except Exception as e:
+                log.warning("question_cache_read_failed", error=str(e))
+        self._count(questions is not None)
+        return questions
+
+    def set(self, key, questions):
+        """Store a parsed result; anything that is not a valid question list is ignored."""
+        if not is_question_list(questions):
+            return False
+        self.memory.set(key, questions)
+        if self.persistent is not None:
+            try:
+                self.persistent.set(key, json.dumps(questions))
+                self._maybe_purge()
+            except Exception as e:
+                log.warning("question_cache_write_failed", error=str(e))
+        return True
+
+    def _maybe_purge(self):
+        # Results for documents nobody uploads again are never read back, so expiry alone would not remove them
+        if not self.ttl or not hasattr(self.persistent, "purge"):
+            return
+        now = time.monotonic()
+        with self._lock:
+            if self._last_purge is not None and now - self._last_purge < self.ttl:
+                return
+            self._last_purge = now
+        self.persistent.purge(self.ttl)
+
+    def delete(self, key):
+        self.memory.delete(key)
+        if self.persistent is not None:
+            self.persistent.delete(key)
+
+    def stats(self):
+        """Return hit/miss counters for the cache as a whole."""
+        with self._lock:
+            total = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": round(self.hits / total, 4) if total else 0.0,
+                "memory_entries": len(self.memory)
+            }
@@ -0,0 +1,103 @@
+import json
+import time
+import hashlib
+from lrucache import LRUCache
+from applog import get_logger
+
+log = get_logger("quizcache")
+
+
+class QuizCache:
+    """
+    A read-through cache of serialized /api/get-quiz responses.
+    Each entry is (etag, body) where body is the pre-serialized JSON bytes, so hot quizzes skip both
+    MongoDB and jsonify. Lookups go in-process LRU -> optional shared store -> loader. The shared store
+    (anything with get(key, ttl)/set/delete, e.g. SQLiteResponseStore) lets several worker processes on a
+    host reuse one serialization; the in-process TTL bounds how long another worker's invalidation can go unseen.
+    """
+
+    def __init__(self, loader, max_entries=256, ttl=60, shared=None, shared_ttl=None):
+        """
+        Initialize the QuizCache.
+
+        :param loader: Callable quiz_id -> response payload dict, or None if the quiz does not exist.
+        :param max_entries: Size of the in-process LRU.
+        :param ttl: Seconds an in-process entry stays valid, or None for no expiry.
+        :param shared: Optional shared store with get(key, ttl)/set(key, value)/delete(key).
+        :param shared_ttl: Seconds a shared-store entry stays valid, or None for no expiry. Expired entries are
+                           purged from stores that support purge(max_age) at most once per shared_ttl.
+        """
+        self.loader = loader
+        self.shared = shared
+        self.shared_ttl = shared_ttl
+        self._memory = LRUCache(max_entries=max_entries, ttl=ttl)
+        self._last_purge = time.monotonic()
+
+    @staticmethod
+    def serialize(payload):
+        """Return (etag, body) for a payload; the ETag is a hash of the exact bytes served."""
+        body = json.dumps(payload, sort_keys=True, separators=(",", ":")).encode("utf-8")
+        return hashlib.sha1(body).hexdigest(), body
+
+    def get(self, quiz_id):
+        """
+        Return (etag, body) for a quiz, loading and caching it on a miss, or None if it does not exist.
+
+        :param quiz_id: Quiz id as given in the URL.
+        """
+        entry = self._memory.get(quiz_id)
+        if entry is not None:
+            return entry
+
+        if self.shared is not None:
+            try:
+                body = self.shared.get(self._shared_key(quiz_id), self.shared_ttl)
+            except Exception as e:
+                log.warning("shared_quiz_cache_read_failed", error=str(e))
+                body = None
+            if body is not None:
+                body = body.encode("utf-8")
+                entry = (hashlib.sha1(body).hexdigest(), body)
+                self._memory.set(quiz_id, entry)
+                return entry
+
+        payload = self.loader(quiz_id)
+        if payload is None:
+            return None
+        entry = self.serialize(payload)
+        self._memory.set(quiz_id, entry)
+        if self.shared is not None:
+            try:
+                self.shared.set(self._shared_key(quiz_id), entry[1].decode("utf-8"))
+                self._maybe_purge_shared()
+            except Exception as e:
+                log.warning("shared_quiz_cache_write_failed", error=str(e))
+        return entry
+
+    def _maybe_purge_shared(self):
+        # Expired rows are otherwise only removed when read again, so quizzes nobody asks for would stay forever
+        if not self.shared_ttl or not hasattr(self.shared, "purge"):
+            return
+        now = time.monotonic()
+        if now - self._last_purge < self.shared_ttl:
+            return
+        self._last_purge = now
+        self.shared.purge(self.shared_ttl)
+
+    def invalidate(self, quiz_id):
+        """Drop a quiz from every tier; call after the quiz document changes."""
+        quiz_id = str(quiz_id)
+        self._memory.delete(quiz_id)
+        if self.shared is not None:
+            try:
+                self.shared.delete(self._shared_key(quiz_id))
+            except Exception as e:
+                log.warning("shared_quiz_cache_delete_failed", error=str(e))
+
+    def stats(self):
+        """Return in-process hit/miss counters."""
+        return dict(self._memory.stats(), shared=self.shared is not None)
+
+    @staticmethod
+    def _shared_key(quiz_id):
+        return f"quiz:{quiz_id}"
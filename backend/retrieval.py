@@ -0,0 +1,88 @@
+from typing import Any, List
+from langchain_core.callbacks import CallbackManagerForRetrieverRun
+from langchain_core.documents import Document
+from langchain_core.output_parsers import StrOutputParser
+from langchain_core.prompts import ChatPromptTemplate
+from langchain_core.retrievers import BaseRetriever
+from lrucache import LRUCache
+from applog import get_logger
+
+log = get_logger("retrieval")
+
+# Same wording as MultiQueryRetriever's default prompt, so expansions match the per-request behaviour
+QUERY_EXPANSION_PROMPT = ChatPromptTemplate.from_template(
+    """You are an AI language model assistant. Your task is
+    to generate 3 different versions of the given user
+    question to retrieve relevant documents from a vector  database.
+    By generating multiple perspectives on the user question,
+    your goal is to help the user overcome some of the limitations
+    of distance-based similarity search. Provide these alternative
+    questions separated by newlines. Original question: {question}"""
+)
+
+# Expanded queries per original query. The quiz query only varies by difficulty (validated by the API), and
+# the LRU bound keeps any other caller from growing it without limit
+_expanded_queries = LRUCache(max_entries=64)
+
+
+def expand_query(llm, query):
+    """
+    Return the LLM-expanded variants of a query, computing them only once per process.
+
+    :param llm: Chat model used to rephrase the query.
+    :param query: Original retrieval query.
+    :return: List of alternative queries (without the original).
+    """
+    cached = _expanded_queries.get(query)
+    if cached is not None:
+        return cached
+
+    chain = QUERY_EXPANSION_PROMPT | llm | StrOutputParser()
+    text = chain.invoke({"question": query})
+    queries = [line.strip() for line in text.split("\n") if line.strip()]
+    _expanded_queries.set(query, queries)
+    log.info("query_expansions_precomputed", query=query, count=len(queries))
+    return queries
+
+
+def precompute_expansions(llm, queries):
+    """
+    Warm the expansion cache for a list of queries (e.g. one per difficulty level).
+
+    :param llm: Chat model used to rephrase the queries.
+    :param queries: Iterable of original queries.
+    """
+    for query in queries:
+        try:
+            expand_query(llm, query)
+        except Exception as e:
+            log.warning("query_expansion_precompute_failed", query=query, error=str(e))
+
+
+class PrecomputedMultiQueryRetriever(BaseRetriever):
+    """
+    A drop-in replacement for MultiQueryRetriever that reuses process-wide cached query expansions,
+    so retrieval over a new document needs no LLM round trip once a query has been expanded.
+    """
+
+    retriever: BaseRetriever
+    llm: Any
+    include_original: bool = True
+
+    def _get_relevant_documents(self, query: str, *, run_manager: CallbackManagerForRetrieverRun) -> List[Document]:
+        try:
+            queries = list(expand_query(self.llm, query))
+        except Exception as e:
+            log.warning("query_expansion_failed", error=str(e))
+            queries = []
+        if self.include_original or not queries:
+            queries.append(query)
+
+        documents = []
+        seen = set()
+        for q in queries:
+            for doc in self.retriever.invoke(q, config={"callbacks": run_manager.get_child()}):
+                if doc.page_content not in seen:
+                    seen.add(doc.page_content)
+                    documents.append(doc)
+        return documents
@@ -0,0 +1,73 @@
+import os
+import time
+import sqlite3
+import threading
+
+
+class SQLiteResponseStore:
+    """
+    A small key -> text store in a SQLite file. Persistent tier for TieredLLMCache and QuestionCache and
+    shared tier for QuizCache, each with its own table.
+    """
+
+    def __init__(self, path, table="llm_cache"):
+        """
+        Initialize the store, creating the table if needed.
+
+        :param path: Path to the SQLite database file (its directory is created with mode 0700 if missing).
+        :param table: Table holding this store's entries.
+        """
+        if not table.isidentifier():
+            raise ValueError(f"Invalid table name: {table}")
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, mode=0o700, exist_ok=True)
+        self.table = table
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._lock = threading.Lock()
+        with self._lock:
+            self._conn.execute(
+                f"CREATE TABLE IF NOT EXISTS {self.table} (key TEXT PRIMARY KEY, value TEXT NOT NULL, created_at REAL NOT NULL)"
+            )
+            self._conn.commit()
+
+    def get(self, key, ttl=None):
+        """
+        Return the stored value for key, or None if it is missing or older than ttl seconds.
+        """
+        with self._lock:
+            row = self._conn.execute(f"SELECT value, created_at FROM {self.table} WHERE key = ?", (key,)).fetchone()
+        if row is None:
+            return None
+        value, created_at = row
+        if ttl and created_at + ttl < time.time():
+            self.delete(key)
+            return None
+        return value
+
+    def set(self, key, value):
+        """Insert or replace the value for key."""
+        with self._lock:
+            self._conn.execute(
+                f"INSERT OR REPLACE INTO {self.table} (key, value, created_at) VALUES (?, ?, ?)",
+                (key, value, time.time())
+            )
+            self._conn.commit()
+
+    def delete(self, key):
+        """Remove the value for key if present."""
+        with self._lock:
+            self._conn.execute(f"DELETE FROM {self.table} WHERE key = ?", (key,))
+            self._conn.commit()
+
+    def purge(self, max_age):
+        """Remove every value stored more than max_age seconds ago."""
+        with self._lock:
+            self._conn.execute(f"DELETE FROM {self.table} WHERE created_at < ?", (time.time() - max_age,))
+            self._conn.commit()
+
+    def clear(self):
+        """Remove every stored value."""
+        with self._lock:
+            self._conn.execute(f"DELETE FROM {self.table}")
+            self._conn.commit()
@@ -0,0 +1,101 @@
+import os
+import datetime
+from pymongo import MongoClient, IndexModel, ASCENDING, DESCENDING
+from applog import get_logger
+
+log = get_logger("storage")
+
+# Sort for "latest document" lookups; _id breaks ties and orders legacy documents stored without created_at
+LATEST_FIRST = [("created_at", DESCENDING), ("_id", DESCENDING)]
+
+# Collection name -> indexes the API's queries rely on
+INDEX_PLAN = {
+    "listofquestion": [
+        IndexModel(LATEST_FIRST, name="created_at_id_desc"),
+    ],
+    "form_responses": [
+        IndexModel([("form_id", ASCENDING)], name="form_id"),
+        IndexModel([("quiz_id", ASCENDING)], name="quiz_id"),
+        IndexModel(LATEST_FIRST, name="created_at_id_desc"),
+    ],
+    "user_response": [
+        IndexModel([("response_id", ASCENDING)], name="response_id_unique", unique=True),
+        IndexModel([("form_id", ASCENDING), ("_id", ASCENDING)], name="form_id_id"),
+        IndexModel(LATEST_FIRST, name="created_at_id_desc"),
+    ],
+    "form_sync_state": [
+        IndexModel([("form_id", ASCENDING)], name="form_id_unique", unique=True),
+    ],
+    "quiz_jobs": [
+        # Finished jobs are removed once their expires_at date passes
+        IndexModel([("expires_at", ASCENDING)], name="expires_at_ttl", expireAfterSeconds=0),
+    ],
+}
+
+# Projections: fetch only the fields each endpoint reads
+QUIZ_FIELDS = {"quiz": 1, "metadata": 1}
+FORM_SCORING_FIELDS = {"form_id": 1, "questions": 1, "question_ids": 1, "answer_key": 1}
+RESPONSE_ANSWER_FIELDS = {"response_id": 1, "answers": 1}
+
+
+def create_mongo_client(uri):
+    """
+    Build a MongoClient with pool settings taken from the environment.
+
+    :param uri: MongoDB connection string.
+    :return: Configured MongoClient.
+    """
+    return MongoClient(
+        uri,
+        maxPoolSize=int(os.environ.get("MONGO_MAX_POOL_SIZE", 50)),
+        minPoolSize=int(os.environ.get("MONGO_MIN_POOL_SIZE", 2)),
+        maxIdleTimeMS=int(os.environ.get("MONGO_MAX_IDLE_TIME_MS", 60000)),
+        serverSelectionTimeoutMS=int(os.environ.get("MONGO_SERVER_SELECTION_TIMEOUT_MS", 5000)),
+        connectTimeoutMS=int(os.environ.get("MONGO_CONNECT_TIMEOUT_MS", 5000)),
+    )
+
+
+class Collections:
+    """The app's MongoDB collections, by role."""
+
+    def __init__(self, client, db_name="Question"):
+        """
+        Initialize the Collections.
+
+        :param client: MongoClient.
+        :param db_name: Database holding the app's collections.
+        """
+        self.client = client
+        self.db = client[db_name]
+        self.quizzes = self.db["listofquestion"]
+        self.form_responses = self.db["form_responses"]
+        self.user_responses = self.db["user_response"]
+        self.sync_state = self.db["form_sync_state"]
+        self.jobs = self.db["quiz_jobs"]
+
+
+def ensure_indexes(db, plan=None):
+    """
+    Create every index in the plan. Safe to call on each startup; existing indexes are left alone.
+    An index that cannot be built (e.g. a unique index over legacy duplicates) is reported and skipped.
+
+    :param db: pymongo Database.
+    :param plan: Mapping of collection name -> list of IndexModel (defaults to INDEX_PLAN).
+    :return: Dict of collection name -> list of index names that could not be created.
+    """
+    failed = {}
+    for collection_name, indexes in (plan or INDEX_PLAN).items():
+        collection = db[collection_name]
+        for index in indexes:
+            try:
+                collection.create_indexes([index])
+            except Exception as e:
+                name = index.document.get("name")
+                log.warning("index_create_failed", collection=collection_name, index=name, error=str(e))
+                failed.setdefault(collection_name, []).append(name)
+    return failed
+
+
+def utcnow():
+    """Timestamp stored in created_at fields."""
+    return datetime.datetime.now(datetime.timezone.utc)
@@ -0,0 +1,149 @@
+import time
+import itertools
+import threading
+
+
+class FakeHttpError(Exception):
+    """Mimics googleapiclient's HttpError: status in resp.status, body in content."""
+
+    def __init__(self, status, content=b""):
+        super().__init__(f"HTTP {status}")
+        self.resp = type("Resp", (), {"status": status})()
+        self.content = content
+
+
+class FakeRequest:
+    def __init__(self, client, method, call):
+        self.client = client
+        self.method = method
+        self.call = call
+
+    def execute(self):
+        return self.client.run(self.method, self.call)
+
+
+class FakeFormsApi:
+    """
+    In-memory stand-in for the Google Forms API v1 (forms.create, forms.batchUpdate, forms.get and
+    forms.responses.list), shared by every client service_factory() returns.
+    Queue errors with fail(method, *errors) to make the next calls of that method raise them, and set
+    delays[title] to slow down the batchUpdate of a form so concurrent jobs finish out of order.
+    """
+
+    def __init__(self):
+        self.forms = {}
+        self.responses = {}
+        self.calls = []
+        self.list_params = []
+        self.delays = {}
+        self.clients = []
+        self.concurrent_use = 0
+        self._failures = {}
+        self._ids = itertools.count(1)
+        self._lock = threading.Lock()
+
+    def service_factory(self):
+        client = FakeService(self)
+        with self._lock:
+            self.clients.append(client)
+        return client
+
+    def fail(self, method, *errors):
+        self._failures.setdefault(method, []).extend(errors)
+
+    def add_response(self, form_id, response_id, submitted, answers=None):
+        """Add a response, or replace the one with the same id (an edited submission)."""
+        responses = [response for response in self.responses.get(form_id, []) if response["responseId"] != response_id]
+        responses.append({
+            "responseId": response_id, "createTime": submitted, "lastSubmittedTime": submitted, "answers": answers or {}
+        })
+        self.responses[form_id] = responses
+
+    def _next_failure(self, method):
+        with self._lock:
+            self.calls.append(method)
+            failures = self._failures.get(method)
+            return failures.pop(0) if failures else None
+
+    def create(self, body):
+        form_id = f"form-{next(self._ids)}"
+        with self._lock:
+            self.forms[form_id] = {"formId": form_id, "info": dict(body["info"]), "items": []}
+        return {"formId": form_id, "info": dict(body["info"])}
+
+    def batch_update(self, form_id, body):
+        form = self.forms[form_id]
+        time.sleep(self.delays.get(form["info"]["title"], 0))
+        replies = []
+        for request in body["requests"]:
+            question_id = f"q-{next(self._ids)}"
+            item = request["createItem"]["item"]
+            item["questionItem"]["question"]["questionId"] = question_id
+            form["items"].insert(request["createItem"]["location"]["index"], item)
+            replies.append({"createItem": {"itemId": f"i-{question_id}", "questionId": [question_id]}})
+        return {"replies": replies}
+
+    def get(self, form_id):
+        return self.forms[form_id]
+
+    def list_responses(self, formId, filter=None, pageToken=None, pageSize=None):
+        self.list_params.append({"formId": formId, "filter": filter, "pageToken": pageToken})
+        responses = sorted(self.responses.get(formId, []), key=lambda response: response["lastSubmittedTime"])
+        if filter:
+            boundary = filter.split(">=", 1)[1].strip()
+            responses = [response for response in responses if response["lastSubmittedTime"] >= boundary]
+        start = int(pageToken or 0)
+        stop = start + (pageSize or len(responses) or 1)
+        data = {"responses": responses[start:stop]}
+        if stop < len(responses):
+            data["nextPageToken"] = str(stop)
+        return data
+
+
+class FakeService:
+    """One client; records overlapping use, which the real httplib2-backed client does not survive."""
+
+    def __init__(self, api):
+        self.api = api
+        self.in_use = False
+
+    def forms(self):
+        return FakeForms(self)
+
+    def run(self, method, call):
+        if self.in_use:
+            with self.api._lock:
+                self.api.concurrent_use += 1
+        self.in_use = True
+        try:
+            error = self.api._next_failure(method)
+            if error is not None:
+                raise error
+            return call()
+        finally:
+            self.in_use = False
+
+
+class FakeForms:
+    def __init__(self, client):
+        self.client = client
+
+    def create(self, body):
+        return FakeRequest(self.client, "create", lambda: self.client.api.create(body))
+
+    def batchUpdate(self, formId, body):
+        return FakeRequest(self.client, "batchUpdate", lambda: self.client.api.batch_update(formId, body))
+
+    def get(self, formId):
+        return FakeRequest(self.client, "get", lambda: self.client.api.get(formId))
+
+    def responses(self):
+        return FakeResponses(self.client)
+
+
+class FakeResponses:
+    def __init__(self, client):
+        self.client = client
+
+    def list(self, **params):
+        return FakeRequest(self.client, "responses.list", lambda: self.client.api.list_responses(**params))
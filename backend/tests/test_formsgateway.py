@@ -0,0 +1,132 @@
+import threading
+
+import pytest
+
+from formsgateway import FormsGateway
+from formsync import FormResponseSync
+from fakeforms import FakeFormsApi, FakeHttpError
+
+QUESTIONS = [
+    {"question": "2 + 2?", "options": ["3", "4"]},
+    {"question": "Capital of France?", "options": ["Paris", "Rome"]},
+]
+
+
+def make_gateway(api, **kwargs):
+    delays = []
+    kwargs.setdefault("num_retries", 3)
+    gateway = FormsGateway(api.service_factory, backoff_base=1.0, max_backoff=3.0, sleep=delays.append, **kwargs)
+    return gateway, delays
+
+
+def test_retries_quota_and_server_errors_with_backoff():
+    api = FakeFormsApi()
+    api.fail("create", FakeHttpError(429), FakeHttpError(503), FakeHttpError(500))
+    gateway, delays = make_gateway(api)
+
+    result = gateway.create_form("Quiz", QUESTIONS)
+
+    assert api.calls == ["create"] * 4 + ["batchUpdate"]
+    assert gateway.retries == 3
+    # Exponential backoff with jitter in [0.5, 1.0], capped at max_backoff
+    for delay, ceiling in zip(delays, [1.0, 2.0, 3.0]):
+        assert ceiling / 2 <= delay <= ceiling
+    assert result["form_id"] in api.forms
+
+
+def test_rate_limited_403_is_retried_but_other_403_is_not():
+    api = FakeFormsApi()
+    api.fail("get", FakeHttpError(403, b'{"error": {"status": "RATE_LIMIT_EXCEEDED"}}'))
+    gateway, _ = make_gateway(api)
+    form_id = gateway.create_form("Quiz", QUESTIONS)["form_id"]
+
+    assert gateway.get_form(form_id)["formId"] == form_id
+    assert gateway.retries == 1
+
+    api.fail("get", FakeHttpError(403, b'{"error": {"status": "PERMISSION_DENIED"}}'))
+    with pytest.raises(FakeHttpError):
+        gateway.get_form(form_id)
+    assert gateway.retries == 1
+
+
+def test_gives_up_after_num_retries():
+    api = FakeFormsApi()
+    api.fail("create", *[FakeHttpError(429)] * 4)
+    gateway, delays = make_gateway(api)
+
+    with pytest.raises(FakeHttpError):
+        gateway.create_form("Quiz", QUESTIONS)
+    assert api.calls == ["create"] * 4
+    assert len(delays) == 3
+
+
+def test_client_error_is_not_retried():
+    api = FakeFormsApi()
+    api.fail("batchUpdate", FakeHttpError(400))
+    gateway, delays = make_gateway(api)
+
+    with pytest.raises(FakeHttpError):
+        gateway.create_form("Quiz", QUESTIONS)
+    assert delays == []
+
+
+def test_create_forms_keeps_job_order():
+    api = FakeFormsApi()
+    # Earlier jobs finish last, and one job fails for good
+    api.delays = {"Quiz 0": 0.15, "Quiz 1": 0.1, "Quiz 2": 0.05}
+    api.fail("batchUpdate", FakeHttpError(400))
+    jobs = [(f"Quiz {i}", QUESTIONS) for i in range(5)]
+    gateway, _ = make_gateway(api, max_workers=4)
+
+    results = gateway.create_forms(jobs)
+
+    assert len(results) == len(jobs)
+    failed = [i for i, result in enumerate(results) if isinstance(result, Exception)]
+    assert len(failed) == 1
+    for (title, _), result in zip(jobs, results):
+        if isinstance(result, Exception):
+            continue
+        form = api.forms[result["form_id"]]
+        assert form["info"]["title"] == title
+        assert sorted(result["question_id_map"].values()) == sorted(q["question"] for q in QUESTIONS)
+        assert result["google_form_link"].endswith(f"/{result['form_id']}/viewform")
+
+
+def test_clients_are_pooled_across_threads():
+    api = FakeFormsApi()
+    gateway, _ = make_gateway(api, max_workers=2)
+    form_id = gateway.create_form("Quiz", QUESTIONS)["form_id"]
+
+    # Short-lived threads (one per HTTP request under Werkzeug) reuse the same client
+    for _ in range(5):
+        thread = threading.Thread(target=gateway.get_form, args=(form_id,))
+        thread.start()
+        thread.join()
+    assert gateway.clients_built == 1
+
+    # Concurrent borrowers never exceed the pool or share a client
+    api.delays = {"Quiz": 0.02}
+    threads = [threading.Thread(target=gateway.create_form, args=("Quiz", QUESTIONS)) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert gateway.clients_built <= 2
+    assert api.concurrent_use == 0
+
+
+def test_response_sync_pages_through_the_gateway():
+    mongomock = pytest.importorskip("mongomock")
+    api = FakeFormsApi()
+    gateway, _ = make_gateway(api)
+    form_id = gateway.create_form("Quiz", QUESTIONS)["form_id"]
+    for i in range(5):
+        api.add_response(form_id, f"r{i}", f"2024-01-01T00:00:0{i}Z")
+    api.fail("responses.list", FakeHttpError(503))
+    db = mongomock.MongoClient().db
+
+    result = FormResponseSync(gateway, db.user_responses, db.sync_state, page_size=2).sync(form_id)
+
+    assert [doc["response_id"] for doc in result["responses"]] == ["r0", "r1", "r2", "r3", "r4"]
+    assert result["pages"] == 3
+    assert gateway.retries == 1
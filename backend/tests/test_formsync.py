@@ -0,0 +1,104 @@
+import pytest
+
+from formsync import FormResponseSync
+from fakeforms import FakeFormsApi
+
+mongomock = pytest.importorskip("mongomock")
+
+FORM_ID = "form-1"
+T1 = "2024-05-01T10:00:00Z"
+T2 = "2024-05-01T10:05:00.500Z"
+T3 = "2024-05-01T11:00:00Z"
+
+
+@pytest.fixture
+def setup():
+    from storage import ensure_indexes
+
+    api = FakeFormsApi()
+    db = mongomock.MongoClient().db
+    ensure_indexes(db)
+    engine = FormResponseSync(api.service_factory(), db.user_responses, db.sync_state, page_size=2)
+    return api, db, engine
+
+
+def synced_ids(result):
+    return [doc["response_id"] for doc in result["responses"]]
+
+
+def test_first_sync_reads_everything_and_records_the_high_water_mark(setup):
+    api, db, engine = setup
+    api.add_response(FORM_ID, "r1", T1)
+    api.add_response(FORM_ID, "r2", T2)
+
+    result = engine.sync(FORM_ID)
+
+    assert synced_ids(result) == ["r1", "r2"]
+    assert api.list_params[0]["filter"] is None
+    assert engine.high_water_mark(FORM_ID) == T2
+    assert db.user_responses.count_documents({}) == 2
+
+
+def test_later_syncs_filter_from_the_high_water_mark(setup):
+    api, db, engine = setup
+    api.add_response(FORM_ID, "r1", T1)
+    engine.sync(FORM_ID)
+    api.add_response(FORM_ID, "r2", T3)
+
+    result = engine.sync(FORM_ID)
+
+    assert api.list_params[-1]["filter"] == f"timestamp >= {T1}"
+    assert synced_ids(result) == ["r2"]
+    assert result["high_water_mark"] == T3
+
+
+def test_second_sync_without_new_responses_returns_nothing(setup):
+    api, db, engine = setup
+    api.add_response(FORM_ID, "r1", T1)
+    api.add_response(FORM_ID, "r2", T2)
+    engine.sync(FORM_ID)
+    state = db.sync_state.find_one({"form_id": FORM_ID})
+
+    result = engine.sync(FORM_ID)
+
+    assert result["responses"] == []
+    assert result["high_water_mark"] == T2
+    assert db.user_responses.count_documents({}) == 2
+    # The state document is not rewritten when nothing moved
+    assert db.sync_state.find_one({"form_id": FORM_ID}) == state
+
+
+def test_responses_sharing_the_boundary_timestamp(setup):
+    api, db, engine = setup
+    api.add_response(FORM_ID, "r1", T1)
+    api.add_response(FORM_ID, "r2", T2)
+    engine.sync(FORM_ID)
+
+    # A response submitted in the same instant as the high-water mark, seen only on the next sync
+    api.add_response(FORM_ID, "r3", T2)
+    result = engine.sync(FORM_ID)
+
+    assert synced_ids(result) == ["r3"]
+    assert engine.sync(FORM_ID)["responses"] == []
+    assert db.user_responses.count_documents({}) == 3
+
+
+def test_upserts_by_response_id_are_idempotent(setup):
+    api, db, engine = setup
+    api.add_response(FORM_ID, "r1", T1, {"q1": {"textAnswers": {"answers": [{"value": "A"}]}}})
+    engine.sync(FORM_ID)
+    created_at = db.user_responses.find_one({"response_id": "r1"})["created_at"]
+
+    # Losing the sync state re-reads everything without duplicating documents
+    db.sync_state.delete_many({})
+    assert synced_ids(engine.sync(FORM_ID)) == ["r1"]
+    assert db.user_responses.count_documents({"response_id": "r1"}) == 1
+
+    # An edited submission updates the stored document in place
+    api.add_response(FORM_ID, "r1", T3, {"q1": {"textAnswers": {"answers": [{"value": "B"}]}}})
+    assert synced_ids(engine.sync(FORM_ID)) == ["r1"]
+    doc = db.user_responses.find_one({"response_id": "r1"})
+    assert db.user_responses.count_documents({}) == 1
+    assert doc["answers"] == {"q1": "B"}
+    assert doc["last_submitted_time"] == T3
+    assert doc["created_at"] == created_at
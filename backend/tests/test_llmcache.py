@@ -0,0 +1,93 @@
+import pytest
+
+from questioncache import QuestionCache
+from sqlitestore import SQLiteResponseStore
+
+QUESTIONS = [{"question": "2 + 2?", "options": ["3", "4"], "correct_answer": "4"}]
+
+
+def age_rows(store, seconds):
+    with store._lock:
+        store._conn.execute(f"UPDATE {store.table} SET created_at = created_at - ?", (seconds,))
+        store._conn.commit()
+
+
+def keys(store):
+    with store._lock:
+        return {row[0] for row in store._conn.execute(f"SELECT key FROM {store.table}")}
+
+
+def test_llm_cache_answers_repeated_prompts_without_the_model(tmp_path):
+    pytest.importorskip("langchain_core")
+    from langchain_core.language_models import FakeListChatModel
+    from llmcache import TieredLLMCache
+
+    store = SQLiteResponseStore(str(tmp_path / "llm.sqlite"))
+    cache = TieredLLMCache(persistent=store, ttl=3600)
+    model = FakeListChatModel(responses=["first", "second", "third"], cache=cache)
+
+    assert model.invoke("Write a quiz").content == "first"
+    # Same prompt up to whitespace: served from the cache, the fake's next response is not consumed
+    assert model.invoke("Write   a quiz").content == "first"
+    assert model.i == 1
+    assert model.invoke("Write another quiz").content == "second"
+    assert cache.stats()["hits"] == 1
+    assert cache.stats()["misses"] == 2
+
+    # A new process sees the persistent tier (same responses, so the model parameters and the key match)
+    fresh_model = FakeListChatModel(responses=["first", "second", "third"], cache=TieredLLMCache(persistent=store, ttl=3600))
+    assert fresh_model.invoke("Write a quiz").content == "first"
+    assert fresh_model.i == 0
+
+
+def test_llm_cache_purges_expired_rows(tmp_path):
+    pytest.importorskip("langchain_core")
+    from langchain_core.language_models import FakeListChatModel
+    from llmcache import TieredLLMCache
+
+    store = SQLiteResponseStore(str(tmp_path / "llm.sqlite"))
+    FakeListChatModel(responses=["old"], cache=TieredLLMCache(persistent=store, ttl=60)).invoke("stale prompt")
+    age_rows(store, 120)
+
+    cache = TieredLLMCache(persistent=store, ttl=60)
+    FakeListChatModel(responses=["new"], cache=cache).invoke("fresh prompt")
+
+    assert len(keys(store)) == 1
+
+
+def test_question_cache_hits_misses_and_invalid_results(tmp_path):
+    store = SQLiteResponseStore(str(tmp_path / "llm.sqlite"), table="question_cache")
+    cache = QuestionCache(persistent=store, ttl=3600, namespace="model-a")
+    key = cache.make_key("Some  content", "easy", 1)
+
+    assert cache.get(key) is None
+    assert cache.set(key, "not json") is False
+    assert cache.set(key, [{"question": "no options"}]) is False
+    assert cache.get(key) is None
+    assert cache.set(key, QUESTIONS) is True
+    assert cache.get(key) == QUESTIONS
+    assert cache.stats()["hits"] == 1
+    assert cache.stats()["misses"] == 2
+
+    # Whitespace does not matter, the namespace does
+    assert cache.make_key("Some content", "easy", 1) == key
+    assert QuestionCache(namespace="model-b").make_key("Some content", "easy", 1) != key
+    assert QuestionCache(persistent=store, ttl=3600, namespace="model-a").get(key) == QUESTIONS
+
+
+def test_question_cache_purges_expired_rows(tmp_path):
+    store = SQLiteResponseStore(str(tmp_path / "llm.sqlite"), table="question_cache")
+    cache = QuestionCache(persistent=store, ttl=60)
+    old_key = cache.make_key("old", "easy", 1)
+    cache.set(old_key, QUESTIONS)
+    age_rows(store, 120)
+
+    cache = QuestionCache(persistent=store, ttl=60)
+    new_key = cache.make_key("new", "easy", 1)
+    cache.set(new_key, QUESTIONS)
+    assert keys(store) == {new_key}
+
+    # Later writes within the same ttl do not purge again
+    age_rows(store, 120)
+    cache.set(cache.make_key("newer", "easy", 1), QUESTIONS)
+    assert new_key in keys(store)